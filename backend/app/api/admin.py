@@ -0,0 +1,37 @@
+from fastapi import APIRouter, status, Query
+from fastapi.responses import PlainTextResponse
+from typing import Annotated, Literal
+from app.dependencies.admin import AdminAccess
+from app.services.profiler import profile_loop, ProfilerBusy, MAX_PROFILE_SECONDS
+from app.utils.exception import ApiError
+
+router = APIRouter(tags=["Admin"])
+
+
+# --- Profile this worker ---
+@router.post("/profile", status_code=status.HTTP_200_OK)
+async def profile_worker(
+    _: AdminAccess,
+    seconds: Annotated[float, Query(gt=0, le=MAX_PROFILE_SECONDS)] = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=100)] = 5,
+    block_threshold_ms: Annotated[float, Query(ge=10, le=10_000)] = 100,
+    format: Literal["collapsed", "json"] = "collapsed",
+):
+    """
+    Samples the worker that serves this request for `seconds` and returns its stacks.
+    `collapsed` is a flamegraph-compatible file; `json` also lists event-loop blocks longer than the threshold.
+    """
+    try:
+        result = await profile_loop(seconds, interval=interval_ms / 1000, block_threshold=block_threshold_ms / 1000)
+    except ProfilerBusy as e:
+        raise ApiError(status.HTTP_409_CONFLICT, str(e))
+
+    if format == "json":
+        return result.to_dict()
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.collapsed"',
+            "X-Loop-Blocks": str(len(result.blocks)),
+        },
+    )
@@ -1,16 +1,21 @@
 # app/api/v1/auth.py
 from fastapi import APIRouter, status, Response, Request
 from app.models.userModel import UserCreate, UserPublic, TokenResponse
+from app.models.session_model import SessionPublic
 from app.utils.hashPass import hash_password, is_password_correct
 from app.utils.exception import ApiError
 from app.database.connection import MongoDB
 from app.utils.jwt import create_access_token, create_refresh_token, decode_token, REFRESH_TOKEN_SECRET
 from datetime import datetime, timezone
 from app.dependencies.auth import AuthenticatedUser
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from bson import ObjectId
+from app.utils.logger import get_logger
+from app.utils.serialization import json_response
+from app.services.sessions import session_store, device_info
 
 router = APIRouter(tags=["Auth"])
+logger = get_logger(__name__)
 
 @router.post("/register", response_model=UserPublic, status_code=status.HTTP_201_CREATED)
 async def register_user(user_data: UserCreate):
@@ -53,6 +58,7 @@ async def register_user(user_data: UserCreate):
 async def login_user(
     email: str, 
     password: str, 
+    request: Request,
     response: Response # Used to set HttpOnly cookies
 ):
     db = MongoDB.get_db()
@@ -70,16 +76,13 @@ async def login_user(
         
     user_id = str(user_doc["_id"])
     
-    # 3. Generate tokens
-    access_token = create_access_token(subject=user_id)
-    refresh_token = create_refresh_token(subject=user_id)
+    # 3. Generate tokens for a new session (one per device)
+    session_id = session_store.new_session_id()
+    access_token = create_access_token(subject=user_id, session_id=session_id)
+    refresh_token = create_refresh_token(subject=user_id, session_id=session_id)
     
-    # 4. Save refresh token (for revocation/renewal)
-    now = datetime.now(timezone.utc)
-    await users_collection.update_one(
-        {"_id": user_doc["_id"]},
-        {"$set": {"refreshToken": refresh_token, "updatedAt": now}}
-    )
+    # 4. Save the session (hashed refresh token, for revocation/renewal)
+    await session_store.create(session_id, user_id, refresh_token, device_info(request))
     
     # 5. Set HttpOnly cookies (Best Practice for browser clients)
     cookie_params = {
@@ -110,24 +113,27 @@ async def login_user(
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout_user(
     current_user: AuthenticatedUser,
+    request: Request,
     response: Response
 ):
     """
-    Logs out the user by clearing the authentication cookies.
+    Logs out this device: revokes its session and clears the authentication cookies.
+    Other devices stay logged in.
     """
-    db = MongoDB.get_db()
-    users_collection = db["users"]
-    
-    # 2. Revoke Refresh Token (Essential Security Step)
-    # This prevents the old refresh token from being used to get a new access token
+    # 2. Revoke the session (Essential Security Step)
+    # This prevents its refresh token from being used to get a new access token
     try:
-        await users_collection.update_one(
-            {"_id": current_user.id}, # Use the authenticated user's ID
-            {"$set": {"refreshToken": None}}
-        )
+        session_id = getattr(request.state, "session_id", None)
+        if session_id:
+            await session_store.revoke(session_id, current_user.id)
+        else:
+            # Token issued before sessions existed: drop the refresh token kept on the user
+            await MongoDB.get_db()["users"].update_one(
+                {"_id": ObjectId(current_user.id)}, {"$unset": {"refreshToken": ""}}
+            )
     except Exception as e:
         # Log the error but continue, as cookie deletion is the priority
-        print(f"Error revoking refresh token for user {current_user.id}: {e}")
+        logger.warning("Error revoking refresh token", extra={"user_id": current_user.id, "error": str(e)})
     
     # Clear the cookies by setting them to empty and expiring them immediately
     response.delete_cookie(
@@ -174,25 +180,29 @@ async def refresh_token(request: Request, response: Response):
         raise ApiError(status.HTTP_401_UNAUTHORIZED, "Invalid or expired refresh token.")
     
     user_id = payload.get("sub")
-    if not user_id:
+    if not user_id or not ObjectId.is_valid(user_id):
         raise ApiError(status.HTTP_401_UNAUTHORIZED, "Invalid refresh token: No subject found.")
     
-    db = MongoDB.get_db()
-    user = await db["users"].find_one({"_id": ObjectId(user_id)})
-
-    if not user or user.get("refreshToken") != incomingRefreshToken:
-        raise ApiError(status.HTTP_401_UNAUTHORIZED, "Refresh token is not recognized.")
-    
-    # 3. Generate tokens
-    access_token = create_access_token(subject=user_id)
-    refresh_token = create_refresh_token(subject=user_id)
-
-    # 4. Save refresh token (for revocation/renewal)
-    now = datetime.now(timezone.utc)
-    await db['users'].update_one(
-        {"_id": user["_id"]},
-        {"$set": {"refreshToken": refresh_token, "updatedAt": now}}
-    )
+    session_id = payload.get("sid")
+    device = device_info(request)
+    
+    if session_id:
+        # 2-4. Rotate: one atomic update that only matches the session's current token
+        refresh_token = create_refresh_token(subject=user_id, session_id=session_id)
+        if not await session_store.rotate(session_id, user_id, incomingRefreshToken, refresh_token, device):
+            raise ApiError(status.HTTP_401_UNAUTHORIZED, "Refresh token is not recognized.")
+    else:
+        # Token issued before sessions existed: accept it once and move it into a session
+        db = MongoDB.get_db()
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"refreshToken": 1})
+        if not user or user.get("refreshToken") != incomingRefreshToken:
+            raise ApiError(status.HTTP_401_UNAUTHORIZED, "Refresh token is not recognized.")
+        session_id = session_store.new_session_id()
+        refresh_token = create_refresh_token(subject=user_id, session_id=session_id)
+        await session_store.create(session_id, user_id, refresh_token, device)
+        await db["users"].update_one({"_id": user["_id"]}, {"$unset": {"refreshToken": ""}})
+    
+    access_token = create_access_token(subject=user_id, session_id=session_id)
     
     # 5. Set HttpOnly cookies (Best Practice for browser clients)
     cookie_params = {
@@ -208,4 +218,37 @@ async def refresh_token(request: Request, response: Response):
     return {
         "status": "success",
         "message": "Access token refreshed successfully.",
-    }
\ No newline at end of file
+    }
+
+
+# --- Sessions (one per logged-in device) ---
+@router.get("/sessions", response_model=List[SessionPublic])
+async def list_sessions(current_user: AuthenticatedUser, request: Request):
+    """
+    Lists the user's active sessions, most recently used first.
+    """
+    current = getattr(request.state, "session_id", None)
+    sessions = await session_store.list_active(current_user.id)
+    return json_response([
+        {
+            "_id": doc["_id"],
+            "device": doc.get("device", {}),
+            "createdAt": doc.get("createdAt"),
+            "lastUsedAt": doc.get("lastUsedAt"),
+            "current": doc["_id"] == current,
+        }
+        for doc in sessions
+    ])
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_200_OK)
+async def revoke_session(session_id: str, current_user: AuthenticatedUser):
+    """
+    Logs out one of the user's devices.
+    """
+    if not await session_store.revoke(session_id, current_user.id):
+        raise ApiError(status.HTTP_404_NOT_FOUND, "Session not found.")
+    return {
+        "success": True,
+        "message": "Session revoked."
+    }
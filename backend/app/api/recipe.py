@@ -1,96 +1,68 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query
 from typing import List, Dict, Optional
 from app.dependencies.auth import AuthenticatedUser
+from app.dependencies.rate_limit import LLMRateLimit, refund_llm_call
 from app.database.connection import MongoDB
 from app.models.userModel import UserPublic, PyObjectId
-from app.models.recipe_model import RecipePublic, RecipeInDB, Ingredient, RecipeBase
+from app.models.recipe_model import RecipePublic, Ingredient, RecipeBase, AutocompleteSuggestion, RECIPE_PUBLIC_PROJECTION, recipe_public_dict, region_key
 from app.utils.exception import ApiError
 from datetime import datetime, timezone
 from bson import ObjectId
-import json
-from app.services.openAI import openAI_call
+import logging
+import re
+from app.services.recipe_generation import generate_suggestions, record_generation
+from app.services.ingredients import canonicalize, ingredient_keys
+from app.services.autocomplete import autocomplete_index, MAX_SUGGESTIONS
+from app.services.nutrition import compute_nutrition
+from app.services.search_cache import SEARCH_CACHE_ENABLED, search_cache, search_key, search_scope
+from app.services.retention import find_recipe, view_tracker
 
 # --- NEW: Import the embedding service ---
 # from app.services.embedding_service import get_embedding
 from app.models.request_model import VectorSearchRequest, RatingRequest
 from app.utils.pagination import get_pagination_params, PaginationParams
+from app.utils.logger import get_logger
+from app.utils.serialization import json_response, raw_json_response, dumps
 
 router = APIRouter(tags=["Recipes"])
-
-# --- Helper function for recipe generate ---
-async def generate_recipes_with_caching(
-    ingredients_str: str,
-    region: str,
-    dietary_pref: str
-)-> dict :
-    """
-    Call OpenAI with prompt caching for 90% cost reduction on static content.
-    """
-    
-    user_prompt = f"""
-    Region: {region}
-    Dietary Preferences: {dietary_pref}
-    Detected Ingredients: {ingredients_str}
-    
-    Generate 2 recipes following the system instructions.
-    """
-    
-    return openAI_call(user_prompt);
+logger = get_logger(__name__)
 
 # --- Recipe Generation Endpoint ---
 @router.post("/generate", response_model=List[RecipePublic], status_code=status.HTTP_201_CREATED)
 async def generate_recipes(
     current_user: AuthenticatedUser,
+    _: LLMRateLimit,
     ingredients: List[Ingredient],
     region: Optional[str] = None,
     dietary_preferences: Optional[str] = None
 ):
     """
     Generate recipes using LLM based on scanned ingredients and user context.
+    Identical (region, ingredients, diet) requests are served from the recipe cache
+    and don't count against the LLM rate limits.
     """
     recipe_db = MongoDB.get_db()["recipes"]
-    # print("Ingredients", ingredients)
-    ingredients_str = ", ".join([i.name for i in ingredients])
-    # print(ingredients_str)
-    
-    # print("Region: ", region)
     
     # If region is None
     if not region or region.strip() == "":
         region = current_user.region
-        
-    # print("region after: ", region)
     
     try:
-        ingredients_str = ", ".join([i.name for i in ingredients])
+        ingredient_names = [i.name for i in ingredients]
         
-        dietary_pref = dietary_preferences if dietary_preferences else "None"
-        
-        
-        # TODO: LLM response (OpenAI or other)
-        # response = openAI_call(prompt)
-        response = await generate_recipes_with_caching(
-            ingredients_str=ingredients_str,
+        generation = await generate_suggestions(
+            ingredient_names=ingredient_names,
             region=region,
-            dietary_pref=dietary_pref
+            dietary_pref=dietary_preferences
         )
-        print("Response: ", response)
-        
-        # Validate and parse response
-        try:
-            recipe_data = json.loads(response)
-        except json.JSONDecodeError as e:
-            print("Invalid JSON output from model:", response)
-            raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, "Failed to parse recipe generation response.from LLM")
+        if generation.cache_hit:
+            refund_llm_call(str(current_user.id))  # served from the cache; no model call to pay for
+        await record_generation(current_user.id, ingredient_names, region, dietary_preferences, generation)
         
-        # recipe_data = response  # Using mock response for now
+        recipe_suggestions = generation.suggestions
         
-        recipe_suggestions = recipe_data.get("recipe_suggestions", [])
-        if not recipe_suggestions:
-            raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, "No recipes generated by LLM.")
-        
-        saved_recipes = []
         now = datetime.now(timezone.utc)
+        documents = []
         
         for recipe in recipe_suggestions:
             # --- NEW: Step 1 - Prepare text for embedding ---
@@ -98,8 +70,6 @@ async def generate_recipes(
             
             ingredient_name = ", ".join([ing["name"] for ing in recipe.get("ingredients", [])])
             tags_str = ", ".join(recipe.get("tags", []))
-            # print("Ingredient Names:", ingredient_name)
-            # print("Tags:", tags_str)
             
             text_to_embed = (
                 f"Title: {recipe.get('title', '')}. "
@@ -109,8 +79,6 @@ async def generate_recipes(
                 f"Dietary Preferences: {recipe.get('dietary_preferences', '')}. "
             )
             
-            # print("Text to embed:", text_to_embed)
-            
             # --- NEW: Step 2 - Generate the vector embedding ---
             """
             try:
@@ -121,25 +89,59 @@ async def generate_recipes(
             """
             # For now, we'll skip embedding generation in this mock.
             
-            validated = RecipeBase(
-                **recipe
-            )
-            recipe_in_db = RecipeInDB(**validated.model_dump())
-            recipe_in_db.createdAt = now
-            recipe_in_db.updatedAt = now
-            recipe_in_db.owner = ObjectId(current_user.id)    # Track Ownership
-            
-            result = await recipe_db.insert_one(recipe_in_db.model_dump(by_alias=True, exclude={"id"}))
-            recipe_in_db.id = PyObjectId(result.inserted_id)
-            saved_recipes.append(RecipePublic(**recipe_in_db.model_dump(by_alias=True)))
+            # Validate once; the dumped dict is both the stored document and the response source
+            document = RecipeBase.model_validate(recipe).model_dump()
+            document["owner"] = ObjectId(current_user.id)    # Track Ownership
+            document["region_key"] = region_key(document.get("region"))
+            document["ingredient_keys"] = ingredient_keys(ing["name"] for ing in document.get("ingredients", []))
+            document["createdAt"] = now
+            document["updatedAt"] = now
+            document["lastViewedAt"] = now  # retention counts age from here
+            documents.append(document)
         
-        return saved_recipes
+        # Nutrition comes from the local nutrient table, not the model
+        for document, nutrition in zip(documents, compute_nutrition(documents)):
+            document["nutritional_info"] = nutrition
+        
+        await recipe_db.insert_many(documents)  # sets each document's _id
+        autocomplete_index.add_recipes(documents)
+        await search_cache.invalidate(doc["region_key"] for doc in documents)
+        return json_response([recipe_public_dict(doc) for doc in documents], status.HTTP_201_CREATED)
     except Exception as e:
         if isinstance(e, ApiError):
             raise e
         raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Recipe generation failed: {str(e)}")
   
 
+# --- Search helpers ---
+SEARCH_SORT = [("_id", -1)]  # newest first; stable order for skip/limit pagination
+
+
+def build_search_filter(
+    title: Optional[str],
+    region: Optional[str],
+    difficulty: Optional[str],
+    ingredient: Optional[str] = None,
+) -> Dict:
+    """
+    Region and difficulty are exact matches on normalized values, served by the
+    (region_key, _id), (difficulty, _id) and (difficulty, region_key, _id) indexes.
+    Ingredient matches the canonical name in `ingredient_keys` ((ingredient_keys, _id)
+    index). Title is a case-insensitive substring filter applied to the rows those
+    indexes yield.
+    """
+    filter_query = {}
+    if ingredient and canonicalize(ingredient):
+        filter_query["ingredient_keys"] = canonicalize(ingredient)
+    if region and region_key(region):
+        filter_query["region_key"] = region_key(region)
+    if difficulty and difficulty.strip():
+        filter_query["difficulty"] = difficulty.strip().capitalize()
+    if title and title.strip():
+        filter_query["title"] = {"$regex": re.escape(title.strip()), "$options": "i"}
+    return filter_query
+
+
 # --- Search Vector Embedding
 @router.post("/search/vector", response_model=List[RecipePublic])
 # async def vector_search_recipe(
@@ -183,28 +185,47 @@ async def filtered_search_recipes(
     pagination: PaginationParams = Depends(get_pagination_params),
     title: Optional[str] = None,
     region: Optional[str] = None,
-    difficulty: Optional[str] = None
+    difficulty: Optional[str] = None,
+    ingredient: Optional[str] = None
 ):
     """
-    Searches for recipes using filters for title, region, and difficulty. Supports pagination.
+    Searches for recipes using filters for title, region, difficulty and ingredient. Supports pagination.
+    Region and difficulty match whole values (case-insensitive); title matches any part;
+    ingredient matches by canonical name ("Tomatoes" finds recipes with "roma tomato"). Newest first.
+    Results are cached until a recipe in the same region is generated or rated.
     """
-    recipe_db = MongoDB.get_db()["recipes"]
-    filter_query = {}
-    
-    if title:
-        filter_query["title"] = {"$regex": title, "$options": "i"}
-    if region:
-        filter_query["region"] = {"$regex": region, "$options": "i"}
-    if difficulty:
-        filter_query["difficulty"] = {"$regex": difficulty, "$options": "i"}
+    filter_query = build_search_filter(title, region, difficulty, ingredient)
+    key = search_key(filter_query, pagination.skip, pagination.limit)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return raw_json_response(cached)
     
-    print("Filter: ", filter_query)
-    
-    cursor = recipe_db.find(filter_query).skip(pagination.skip).limit(pagination.limit)
-    print("Cursor: ", cursor)
+    # Read the generation before querying, so a write that races the query can't be cached over
+    scope = search_scope(filter_query)
+    generation = search_cache.generation(scope)
+    # A result that gets cached must come from the primary: a lagging secondary would return
+    # pre-write rows, cached under the post-write generation until the TTL
+    recipe_db = MongoDB.get_db()["recipes"] if SEARCH_CACHE_ENABLED else MongoDB.get_heavy_read_collection("recipes")
+    cursor = recipe_db.find(filter_query, RECIPE_PUBLIC_PROJECTION).sort(SEARCH_SORT).skip(pagination.skip).limit(pagination.limit)
     result = await cursor.to_list(length=pagination.limit)
-    print("result: ", result)
-    return [RecipePublic.model_validate(res) for res in result]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Recipe search", extra={"filter": filter_query, "results": len(result)})
+    body = dumps([recipe_public_dict(res) for res in result])
+    search_cache.put(key, scope, generation, body)
+    return raw_json_response(body)
+
+
+# --- Autocomplete ---
+@router.get("/autocomplete", response_model=List[AutocompleteSuggestion])
+async def autocomplete(
+    q: str = Query(..., max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+):
+    """
+    Suggests recipe titles, tags and ingredients starting with `q` (or, for titles,
+    with a word starting with `q`), most popular first. Served from memory.
+    """
+    return json_response(autocomplete_index.suggest(q, limit))
 
 
 # --- Recipe by ID ---
@@ -212,18 +233,19 @@ async def filtered_search_recipes(
 async def get_recipe_by_id(recipe_id: str):
     """
     Retrieves a single recipe by its unique ID.
+    Archived recipes are found too (and move back to the hot collection).
     """
-    recipe_db = MongoDB.get_db()["recipes"]
     try:
         if not ObjectId.is_valid(recipe_id):
             raise ApiError(status.HTTP_400_BAD_REQUEST, "Invalid recipe ID format.")
         
         # print("Recipe ID:", recipe_id)
-        recipe = await recipe_db.find_one({"_id": ObjectId(recipe_id)})
+        recipe = await find_recipe(ObjectId(recipe_id), RECIPE_PUBLIC_PROJECTION)
         
         if not recipe:
             raise ApiError(status.HTTP_404_NOT_FOUND, "Recipe not found.")
-        return RecipePublic(**recipe).model_dump(exclude={"vector_embedding", "owner"})
+        view_tracker.record(recipe["_id"])
+        return json_response(recipe_public_dict(recipe, include_owner=False))
     except Exception as e:
         if isinstance(e, ApiError):
             raise e
@@ -246,7 +268,7 @@ async def rate_recipe(
         if not ObjectId.is_valid(recipe_id):
             raise ApiError(status.HTTP_400_BAD_REQUEST, "Invalid recipe ID format.")
         
-        recipe = await recipe_db.find_one({"_id": ObjectId(recipe_id)})
+        recipe = await find_recipe(ObjectId(recipe_id))
         if not recipe:
             raise ApiError(status.HTTP_404_NOT_FOUND, "Recipe not found.")
         
@@ -289,11 +311,14 @@ async def rate_recipe(
                     "updatedAt": datetime.now(timezone.utc)
                 }
             },
+            projection=RECIPE_PUBLIC_PROJECTION,
             return_document=True
         )
         
+        await search_cache.invalidate([recipe.get("region_key") or region_key(recipe.get("region"))])
+        
         # Fetch the updated recipe
-        return RecipePublic.model_validate(updated_recipe)
+        return json_response(recipe_public_dict(updated_recipe))
     
     except Exception as e:
         if isinstance(e, ApiError):
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, status, Request
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timezone
+from bson import ObjectId
+import asyncio
+import os
+import re
+from app.dependencies.auth import AuthenticatedUser
+from app.database.connection import MongoDB
+from app.models.recipe_model import region_key
+from app.models.scan_model import ScanResponse
+from app.services.storage import get_blob_store, HashOnlyWriter
+from app.services.detection.service import detection_service
+from app.services.ingredients import canonical_detections
+from app.services.scan_cache import scan_cache, content_hash_fallback
+from app.utils.exception import ApiError
+from app.utils.multipart import stream_multipart_upload
+from app.utils.logger import get_logger
+
+router = APIRouter(tags=["Scan"])
+logger = get_logger(__name__)
+
+SCAN_MAX_UPLOAD_MB = float(os.getenv("SCAN_MAX_UPLOAD_MB", 15))
+ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/heic", "image/heif"}
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# --- Image Scan Endpoint ---
+@router.post("", response_model=ScanResponse, status_code=status.HTTP_201_CREATED)
+async def scan_image(
+    request: Request,
+    current_user: AuthenticatedUser
+):
+    """
+    Accepts a multipart upload with an `image` file and an optional `region` field.
+    The image is streamed to the blob store while being hashed, and stored once per distinct content.
+    Clients may send `X-Content-SHA256`; if that image is already stored, nothing is written.
+    Returns the detected ingredients, ready to pass to /recipes/generate.
+    A near-identical recent photo (same user and region) reuses the earlier scan's ingredients.
+    """
+    store = get_blob_store()
+    announced = (request.headers.get("X-Content-SHA256") or "").lower()
+    known = bool(_SHA256_RE.match(announced)) and await run_in_threadpool(store.exists, announced)
+
+    upload = await stream_multipart_upload(
+        request,
+        file_field="image",
+        open_writer=(lambda: HashOnlyWriter(announced)) if known else store.open_writer,
+        max_bytes=int(SCAN_MAX_UPLOAD_MB * 1024 * 1024),
+        allowed_types=ALLOWED_IMAGE_TYPES,
+    )
+    if upload.writer.size == 0:
+        upload.writer.abort()
+        raise ApiError(status.HTTP_400_BAD_REQUEST, "Uploaded image is empty.")
+    try:
+        stored = await run_in_threadpool(upload.writer.commit)
+    except ValueError as e:
+        raise ApiError(status.HTTP_400_BAD_REQUEST, str(e))
+
+    region = (upload.fields.get("region") or "").strip() or current_user.region
+    path = store.local_path(upload.writer.digest)
+    
+    # A near-identical recent photo from this user reuses that scan's ingredients
+    phash = await detection_service.hash_path(path) if path is not None else None
+    if phash is None:
+        phash = content_hash_fallback(upload.writer.digest)
+    cached = await scan_cache.lookup(current_user.id, region, phash)
+    
+    if cached is not None:
+        ingredients = cached[1].ingredients
+    else:
+        # Detection runs in the worker pool; the worker reads the stored blob itself
+        try:
+            if path is not None:
+                detections = await detection_service.detect_path(path)
+            else:
+                detections = await detection_service.detect_bytes(await run_in_threadpool(store.read, upload.writer.digest))
+        except asyncio.TimeoutError:
+            raise ApiError(status.HTTP_503_SERVICE_UNAVAILABLE, "Ingredient detection timed out. Please try again.")
+        except ValueError:
+            raise ApiError(status.HTTP_422_UNPROCESSABLE_ENTITY, "The uploaded file could not be decoded as an image.")
+        # Model labels become canonical names, the same form /recipes/generate keys its cache on
+        ingredients = canonical_detections(detections)
+    
+    scan_doc = {
+        "owner": ObjectId(current_user.id),
+        "image_id": upload.writer.digest,
+        "size": upload.writer.size,
+        "content_type": upload.content_type,
+        "region": region,
+        "region_key": region_key(region),
+        "deduplicated": not stored,
+        "phash": f"{phash:016x}",
+        "ingredients": ingredients,
+        "cached_from": ObjectId(cached[1].scan_id) if cached else None,
+        "createdAt": datetime.now(timezone.utc),
+    }
+    result = await MongoDB.get_db()["scans"].insert_one(scan_doc)
+    scan_doc["_id"] = result.inserted_id
+    if cached is None:
+        # Only detected scans become cache anchors, so repeated hits can't drift away from a real detection
+        await scan_cache.add(current_user.id, region, phash, str(result.inserted_id), ingredients)
+    logger.info("Image scanned", extra={
+        "image_id": scan_doc["image_id"], "size": scan_doc["size"], "deduplicated": not stored,
+        "cache_hit": cached is not None, "distance": cached[0] if cached else None,
+    })
+    return ScanResponse(**scan_doc)
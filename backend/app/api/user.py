@@ -2,13 +2,17 @@ from fastapi import APIRouter, status, Depends
 from app.database.connection import MongoDB
 from app.dependencies.auth import AuthenticatedUser
 from app.models.userModel import UserPublic, PyObjectId
-from app.models.recipe_model import RecipePublic
+from app.models.recipe_model import RecipePublic, RECIPE_PUBLIC_PROJECTION, recipe_public_dict
 from bson import ObjectId
 from app.utils.exception import ApiError
 from typing import List
 from app.utils.pagination import get_pagination_params, PaginationParams
+from app.utils.logger import get_logger
+from app.utils.serialization import json_response
+from app.services.retention import find_recipe, list_owned
 
 router = APIRouter(tags=["User"])
+logger = get_logger(__name__)
 
 @router.get("/profile", response_model=UserPublic)
 async def get_user_profile(
@@ -36,6 +40,9 @@ async def add_favorite_recipe(
     if not ObjectId.is_valid(recipe_id):
         raise ApiError(400, "Invalid recipe ID format.")
     
+    # Favorites are listed from the hot collection, so an archived recipe comes back first
+    await find_recipe(ObjectId(recipe_id), {"_id": 1})
+    
     # Add to favorites if not already present
     result = await users_collection.update_one(
         {"_id": ObjectId(current_user.id)},
@@ -79,17 +86,12 @@ async def get_my_recipes(
     pagination: PaginationParams = Depends(get_pagination_params)
 ):
     """
-    Retrieve all recipes created by the authenticated user.
+    Retrieve all recipes created by the authenticated user, archived ones included.
     """
-    recipe_db = MongoDB.get_db()["recipes"]
-    print("Current User ID:", current_user.id)
-    owner = recipe_db.find_one({"owner": ObjectId(current_user.id)})
-    print("Recipe DB owner:", owner)
+    logger.debug("Fetching recipes for owner", extra={"user_id": current_user.id})
     try:
-        cursor = recipe_db.find({"owner": ObjectId(current_user.id)}).skip(pagination.skip).limit(pagination.limit)
-        
-        my_recipes = await cursor.to_list(length=pagination.limit)
-        return [RecipePublic.model_validate(recipe) for recipe in my_recipes]
+        my_recipes = await list_owned(ObjectId(current_user.id), pagination.skip, pagination.limit, RECIPE_PUBLIC_PROJECTION)
+        return json_response([recipe_public_dict(recipe) for recipe in my_recipes])
     except Exception as e:
         raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Failed to fetch user's recipes: {str(e)}")
   
@@ -104,7 +106,7 @@ async def get_favorite_recipes(
     Retrieves the full recipe details for the user's favorite recipes.
     """
     user_db = MongoDB.get_db()["users"]
-    recipe_db = MongoDB.get_db()["recipes"]
+    recipe_db = MongoDB.get_heavy_read_collection("recipes")  # favorites are existing recipes; lag is harmless
     try:
         user = await user_db.find_one({"_id": ObjectId(current_user.id)})
         
@@ -113,9 +115,9 @@ async def get_favorite_recipes(
         
         favorites_ids = user["favorites"]
         
-        cursor = recipe_db.find({"_id": {"$in": favorites_ids}}).skip(pagination.skip).limit(pagination.limit)
+        cursor = recipe_db.find({"_id": {"$in": favorites_ids}}, RECIPE_PUBLIC_PROJECTION).sort("_id", -1).skip(pagination.skip).limit(pagination.limit)
         
         favorite_recipes = await cursor.to_list(length=pagination.limit)
-        return [RecipePublic.model_validate(recipe) for recipe in favorite_recipes]
+        return json_response([recipe_public_dict(recipe) for recipe in favorite_recipes])
     except Exception as e:
         raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Failed to fetch favorite recipes: {str(e)}")
\ No newline at end of file
@@ -1,20 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
 from app.utils.exception import ApiError
+from app.utils.logger import get_logger
+from app.database.monitoring import CommandMetricsListener, PoolMetricsListener
+from app.database.settings import MongoSettings
 
-load_dotenv()
-
-MONGODB_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME")
+logger = get_logger(__name__)
 
 # client: AsyncIOMotorClient | None = None
 # if MONGODB_URI:
 #     client = AsyncIOMotorClient(MONGODB_URI)
 
-if not MONGODB_URI or not DB_NAME:
-        raise ApiError(500, "Database configuration environment variables not set.")
-
 # def get_db():
 #     if not MONGODB_URI or not DB_NAME:
 #         raise ApiError(500, "Database configuration environment variables not set.")
@@ -50,18 +45,42 @@ if not MONGODB_URI or not DB_NAME:
 #         print("MongoDB connection closed.")
 
 
+def create_client(settings: MongoSettings, pool_listener: PoolMetricsListener | None = None) -> AsyncIOMotorClient:
+    """Builds the Motor client from settings, with command (and optionally pool) monitoring."""
+    listeners = [CommandMetricsListener()]
+    if pool_listener is not None:
+        listeners.append(pool_listener)
+    return AsyncIOMotorClient(settings.uri, event_listeners=listeners, **settings.client_kwargs())
+
+
 class MongoDB:
     client: AsyncIOMotorClient | None = None
+    settings: MongoSettings | None = None
+    pool_listener: PoolMetricsListener | None = None
+
+    @classmethod
+    def get_settings(cls) -> MongoSettings:
+        """Settings are read from the environment on first use, not at import."""
+        if cls.settings is None:
+            settings = MongoSettings.from_env()
+            if not settings.uri or not settings.db_name:
+                raise ApiError(500, "Database configuration environment variables not set.")
+            cls.settings = settings
+        return cls.settings
 
     @classmethod
     async def connect_db(cls):
+        settings = cls.get_settings()
         if cls.client is None:
-            cls.client = AsyncIOMotorClient(MONGODB_URI)
+            cls.pool_listener = PoolMetricsListener(settings.max_pool_size)
+            cls.client = create_client(settings, cls.pool_listener)
         try:
             await cls.client.admin.command('ping')
-            print("MongoDB connection established.")
+            logger.info("MongoDB connection established.", extra={
+                "max_pool_size": settings.max_pool_size, "compressors": settings.compressors,
+            })
         except Exception as e:
-            print("MongoDB connection Error: ", e)
+            logger.error("MongoDB connection error", extra={"error": str(e)})
             import sys
             sys.exit(1)
 
@@ -69,10 +88,27 @@ class MongoDB:
     def get_db(cls):
         if not cls.client:
             raise ApiError(500, "Database client is not initialized.")
-        return cls.client[DB_NAME]
+        return cls.client[cls.get_settings().db_name]
+
+    @classmethod
+    def get_heavy_read_collection(cls, name: str):
+        """
+        Collection handle for heavy, staleness-tolerant reads (favorites, uncached search),
+        routed by MONGO_HEAVY_READ_PREFERENCE. Never use it to read your own writes.
+        """
+        return cls.get_db()[name].with_options(read_preference=cls.get_settings().heavy_read())
+
+    @classmethod
+    def get_relaxed_write_collection(cls, name: str):
+        """Collection handle whose writes only wait for the primary (caches, history, rate-limit sync)."""
+        return cls.get_db()[name].with_options(write_concern=MongoSettings.relaxed_write_concern())
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        return cls.pool_listener.snapshot() if cls.pool_listener else {}
     
     @classmethod
     def close_db_connection(cls):
         if cls.client:
             cls.client.close()
-            print("🔌 MongoDB connection closed")
\ No newline at end of file
+            logger.info("MongoDB connection closed.")
@@ -0,0 +1,120 @@
+"""
+Every MongoDB index the app relies on, in one place.
+
+Each entry names the query it serves. `ensure_indexes` creates whatever is
+missing; the app runs it as a background task at startup (INDEX_BUILD_ON_STARTUP)
+and deploys can run it ahead of time with `python -m app.scripts.build_indexes`.
+`benchmarks/query_plans.py` checks that the routes' query shapes actually use them.
+
+Names follow the driver's default format (`field_1_other_-1`) so indexes created
+before this registry existed are recognised instead of conflicting.
+"""
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+INDEX_BUILD_ON_STARTUP = os.getenv("INDEX_BUILD_ON_STARTUP", "true").lower() == "true"
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    serves: str
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        options = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+
+INDEXES: List[IndexSpec] = [
+    # --- users ---
+    IndexSpec("users", (("email", ASCENDING),), "login, registration uniqueness", unique=True),
+    IndexSpec("users", (("username", ASCENDING),), "registration uniqueness", unique=True),
+    IndexSpec("users", (("favorites", ASCENDING),), "retention: favorited recipes are never archived"),
+    # --- recipes ---
+    IndexSpec("recipes", (("owner", ASCENDING), ("_id", DESCENDING)), "user/my_recipes, newest first"),
+    # Search sorts by _id, so every equality combination needs _id right after its equality keys
+    IndexSpec("recipes", (("region_key", ASCENDING), ("_id", DESCENDING)), "recipes/search by region"),
+    IndexSpec("recipes", (("difficulty", ASCENDING), ("_id", DESCENDING)), "recipes/search by difficulty"),
+    IndexSpec("recipes", (("difficulty", ASCENDING), ("region_key", ASCENDING), ("_id", DESCENDING)),
+              "recipes/search by difficulty and region"),
+    IndexSpec("recipes", (("ingredient_keys", ASCENDING), ("_id", DESCENDING)), "recipes/search by canonical ingredient"),
+    IndexSpec("recipes", (("lastViewedAt", ASCENDING),), "retention: cold recipe scan"),
+    # --- recipes_archive (cold recipes, compressed; see services/retention.py) ---
+    IndexSpec("recipes_archive", (("owner", ASCENDING), ("_id", DESCENDING)), "user/my_recipes, archived part"),
+    # --- sessions ---
+    IndexSpec("sessions", (("user", ASCENDING), ("lastUsedAt", DESCENDING)), "auth/sessions, per-user session cap"),
+    IndexSpec("sessions", (("revokedAt", ASCENDING),), "revocation sync across workers"),
+    # --- scans ---
+    IndexSpec("scans", (("owner", ASCENDING), ("region_key", ASCENDING), ("createdAt", DESCENDING)), "scan cache warm-up"),
+    # --- TTL collections ---
+    IndexSpec("sessions", (("expiresAt", ASCENDING),), "TTL for expired and revoked sessions", expire_after_seconds=0),
+    IndexSpec("rate_limits", (("expiresAt", ASCENDING),), "TTL for shared rate-limit buckets", expire_after_seconds=0),
+    IndexSpec("recipe_cache", (("expiresAt", ASCENDING),), "TTL for cached LLM suggestions", expire_after_seconds=0),
+    IndexSpec("generations", (("createdAt", ASCENDING),), "30-day TTL; pre-warmer lookback scan",
+              expire_after_seconds=30 * 24 * 60 * 60),
+]
+
+
+def indexes_by_collection(specs: Sequence[IndexSpec] = INDEXES) -> Dict[str, List[IndexSpec]]:
+    grouped: Dict[str, List[IndexSpec]] = defaultdict(list)
+    for spec in specs:
+        grouped[spec.collection].append(spec)
+    return grouped
+
+
+async def ensure_indexes(db, specs: Sequence[IndexSpec] = INDEXES) -> Dict[str, List[str]]:
+    """
+    Creates the declared indexes, one createIndexes call per collection (existing
+    identical indexes are a no-op). A failing collection is logged and skipped so
+    one conflict does not block the rest. Returns the index names per collection.
+    """
+    built: Dict[str, List[str]] = {}
+    for collection, group in indexes_by_collection(specs).items():
+        try:
+            built[collection] = await db[collection].create_indexes([spec.model() for spec in group])
+        except Exception as e:
+            logger.error("Index build failed", extra={"collection": collection, "code": getattr(e, "code", None), "error": str(e)})
+    logger.info("MongoDB indexes ensured", extra={"collections": len(built)})
+    return built
+
+
+async def missing_indexes(db, specs: Sequence[IndexSpec] = INDEXES) -> List[IndexSpec]:
+    """Declared indexes that do not exist yet."""
+    missing: List[IndexSpec] = []
+    for collection, group in indexes_by_collection(specs).items():
+        existing = {index["name"] async for index in db[collection].list_indexes()}
+        missing.extend(spec for spec in group if spec.name not in existing)
+    return missing
+
+
+async def undeclared_indexes(db, specs: Sequence[IndexSpec] = INDEXES) -> Dict[str, List[str]]:
+    """Indexes present on registry collections but not declared (candidates for review or removal)."""
+    extra: Dict[str, List[str]] = {}
+    for collection, group in indexes_by_collection(specs).items():
+        declared = {spec.name for spec in group} | {"_id_"}
+        existing = [index["name"] async for index in db[collection].list_indexes()]
+        unknown = [name for name in existing if name not in declared]
+        if unknown:
+            extra[collection] = unknown
+    return extra
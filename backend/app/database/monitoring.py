@@ -0,0 +1,95 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+from pymongo import monitoring
+from app.utils.metrics import MONGO_COMMAND_DURATION, MONGO_POOL_CONNECTIONS
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records the driver-observed duration of every MongoDB command."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name, outcome="success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name, outcome="failure")
+
+
+@dataclass
+class PoolStats:
+    max_size: int = 0
+    open: int = 0
+    checked_out: int = 0
+    waiting: int = 0
+
+    @property
+    def saturation(self) -> float:
+        return self.checked_out / self.max_size if self.max_size else 0.0
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks open, checked-out and waiting connections per server pool.
+    Events arrive on driver threads, hence the lock.
+    """
+
+    def __init__(self, default_max_size: int = 100):
+        # PoolCreatedEvent only lists non-default options, so maxPoolSize may be absent
+        self.default_max_size = default_max_size
+        self._lock = threading.Lock()
+        self._pools: Dict[str, PoolStats] = {}
+
+    def snapshot(self) -> Dict[str, PoolStats]:
+        with self._lock:
+            return {address: PoolStats(**vars(stats)) for address, stats in self._pools.items()}
+
+    def _update(self, address, **deltas: int) -> None:
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            stats = self._pools.setdefault(key, PoolStats())
+            for name, delta in deltas.items():
+                setattr(stats, name, max(0, getattr(stats, name) + delta))
+            MONGO_POOL_CONNECTIONS.set(stats.open, address=key, state="open")
+            MONGO_POOL_CONNECTIONS.set(stats.checked_out, address=key, state="checked_out")
+            MONGO_POOL_CONNECTIONS.set(stats.waiting, address=key, state="waiting")
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        key = f"{event.address[0]}:{event.address[1]}"
+        with self._lock:
+            self._pools.setdefault(key, PoolStats()).max_size = event.options.get("maxPoolSize", self.default_max_size)
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        key = f"{event.address[0]}:{event.address[1]}"
+        with self._lock:
+            self._pools.pop(key, None)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        self._update(event.address, waiting=-1)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self._update(event.address, waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._update(event.address, checked_out=-1)
@@ -0,0 +1,131 @@
+"""
+MongoDB client settings, read from the environment when the client is created
+(not at import), so tooling can import the app without a database configured.
+"""
+import importlib.util
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from pymongo.read_preferences import ReadPreference, Secondary, SecondaryPreferred, Nearest, PrimaryPreferred
+from pymongo.write_concern import WriteConcern
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Compressor -> module the driver needs for it (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+_READ_PREFERENCES = {
+    "primary": lambda staleness: ReadPreference.PRIMARY,
+    "primarypreferred": lambda staleness: PrimaryPreferred(max_staleness=staleness),
+    "secondary": lambda staleness: Secondary(max_staleness=staleness),
+    "secondarypreferred": lambda staleness: SecondaryPreferred(max_staleness=staleness),
+    "nearest": lambda staleness: Nearest(max_staleness=staleness),
+}
+
+
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def available_compressors(requested: List[str]) -> List[str]:
+    """Keeps the requested compressors whose optional dependency is installed, in order."""
+    usable = []
+    for name in requested:
+        if name not in _COMPRESSOR_MODULES:
+            logger.warning("Unknown MongoDB compressor ignored", extra={"compressor": name})
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module is not None and importlib.util.find_spec(module) is None:
+            logger.warning("MongoDB compressor unavailable; install its package", extra={"compressor": name, "package": module})
+            continue
+        usable.append(name)
+    return usable
+
+
+@dataclass
+class MongoSettings:
+    uri: Optional[str]
+    db_name: Optional[str]
+    app_name: str = "dishguru-api"
+    # Pool: one pool per server the driver talks to
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = 300_000
+    max_connecting: int = 2
+    wait_queue_timeout_ms: Optional[int] = 2_000
+    # Timeouts
+    connect_timeout_ms: int = 5_000
+    server_selection_timeout_ms: int = 5_000
+    socket_timeout_ms: Optional[int] = None
+    compressors: List[str] = field(default_factory=list)
+    # Routing: heavy, staleness-tolerant reads (favorites, uncached search) may go to secondaries
+    heavy_read_preference: str = "secondaryPreferred"
+    max_staleness_seconds: int = -1  # -1: no limit; otherwise >= 90 per the server spec
+    # Durability: default for all writes, and a relaxed one for caches/telemetry
+    write_concern: Optional[str] = None  # None: server default (majority since MongoDB 5.0)
+    write_timeout_ms: Optional[int] = None
+    # /ready reports not-ready when this fraction of the pool is checked out and callers are queued
+    ready_max_saturation: float = 0.9
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        load_dotenv()
+        compressors = [c.strip().lower() for c in os.getenv("MONGO_COMPRESSORS", "").split(",") if c.strip()]
+        return cls(
+            uri=os.getenv("MONGO_URI"),
+            db_name=os.getenv("DB_NAME"),
+            app_name=os.getenv("MONGO_APP_NAME", cls.app_name),
+            max_pool_size=_int_env("MONGO_MAX_POOL_SIZE", cls.max_pool_size),
+            min_pool_size=_int_env("MONGO_MIN_POOL_SIZE", cls.min_pool_size),
+            max_idle_time_ms=_int_env("MONGO_MAX_IDLE_TIME_MS", cls.max_idle_time_ms),
+            max_connecting=_int_env("MONGO_MAX_CONNECTING", cls.max_connecting),
+            wait_queue_timeout_ms=_int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", cls.wait_queue_timeout_ms),
+            connect_timeout_ms=_int_env("MONGO_CONNECT_TIMEOUT_MS", cls.connect_timeout_ms),
+            server_selection_timeout_ms=_int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", cls.server_selection_timeout_ms),
+            socket_timeout_ms=_int_env("MONGO_SOCKET_TIMEOUT_MS", cls.socket_timeout_ms),
+            compressors=available_compressors(compressors),
+            heavy_read_preference=os.getenv("MONGO_HEAVY_READ_PREFERENCE", cls.heavy_read_preference),
+            max_staleness_seconds=_int_env("MONGO_MAX_STALENESS_SECONDS", cls.max_staleness_seconds),
+            write_concern=os.getenv("MONGO_WRITE_CONCERN") or None,
+            write_timeout_ms=_int_env("MONGO_WRITE_TIMEOUT_MS", cls.write_timeout_ms),
+            ready_max_saturation=float(os.getenv("MONGO_READY_MAX_SATURATION", cls.ready_max_saturation)),
+        )
+
+    def client_kwargs(self) -> dict:
+        """Keyword arguments for AsyncIOMotorClient (besides the URI and listeners)."""
+        kwargs = {
+            "appname": self.app_name,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "maxConnecting": self.max_connecting,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+        }
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+        if self.write_concern:
+            kwargs["w"] = int(self.write_concern) if self.write_concern.isdigit() else self.write_concern
+            if self.write_timeout_ms:
+                kwargs["wTimeoutMS"] = self.write_timeout_ms
+        return kwargs
+
+    def heavy_read(self):
+        """Read preference for staleness-tolerant, heavy reads."""
+        try:
+            build = _READ_PREFERENCES[self.heavy_read_preference.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown MONGO_HEAVY_READ_PREFERENCE: {self.heavy_read_preference}")
+        return build(self.max_staleness_seconds)
+
+    @staticmethod
+    def relaxed_write_concern() -> WriteConcern:
+        """Acknowledged by the primary only: for caches and telemetry that can be rebuilt if lost."""
+        return WriteConcern(w=1)
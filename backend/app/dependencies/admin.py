@@ -0,0 +1,26 @@
+# app/dependencies/admin.py
+import hmac
+import os
+from typing import Annotated
+from fastapi import Depends, Request, status
+from dotenv import load_dotenv
+from app.utils.exception import ApiError
+
+load_dotenv()
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(request: Request) -> None:
+    """
+    FastAPI dependency guarding operational endpoints.
+    Expects the shared ADMIN_TOKEN in the X-Admin-Token header; admin routes are disabled when it is unset.
+    """
+    if not ADMIN_TOKEN:
+        raise ApiError(status.HTTP_404_NOT_FOUND, "Not found.")
+
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise ApiError(status.HTTP_403_FORBIDDEN, "Admin access required.")
+
+# Convenience alias for use in route handlers
+AdminAccess = Annotated[None, Depends(require_admin)]
@@ -5,7 +5,11 @@ from app.utils.exception import ApiError
 from app.utils.jwt import decode_token, ACCESS_TOKEN_SECRET
 from app.database.connection import MongoDB
 from app.models.userModel import UserPublic
+from app.services.sessions import session_store
 from bson import ObjectId
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Utility to fetch user (should be in a repo layer for production)
 async def get_user_by_id(user_id: str) -> Optional[UserPublic]:
@@ -25,7 +29,7 @@ async def get_user_by_id(user_id: str) -> Optional[UserPublic]:
             # Use UserPublic model to ensure only public data is returned and validated
             return UserPublic(**user_data)
     except Exception as e:
-        print(f"Database error in get_user_by_id: {e}")
+        logger.error("Database error in get_user_by_id", extra={"error": str(e)})
         return None
     return None
 
@@ -60,6 +64,12 @@ async def get_current_user(request: Request) -> UserPublic:
     
     if not user_id:
         raise ApiError(status.HTTP_401_UNAUTHORIZED, "Invalid access token: No subject found.")
+    
+    # Logged-out sessions; usually answered from memory (see services/sessions.py)
+    session_id = payload.get("sid")
+    if session_id and await session_store.is_revoked(session_id):
+        raise ApiError(status.HTTP_401_UNAUTHORIZED, "Session has been logged out.")
+    request.state.session_id = session_id
         
     user = await get_user_by_id(user_id) # Fetch from MongoDB
     
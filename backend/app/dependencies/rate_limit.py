@@ -0,0 +1,36 @@
+# app/dependencies/rate_limit.py
+import math
+from typing import Annotated
+from fastapi import Depends, status
+from app.dependencies.auth import AuthenticatedUser
+from app.services.rate_limiter import llm_rate_limiter, RATE_LIMIT_ENABLED
+from app.utils.exception import ApiError
+from app.utils.metrics import RATE_LIMITED
+
+async def limit_llm_calls(current_user: AuthenticatedUser) -> None:
+    """
+    FastAPI dependency applying the per-user and global LLM token buckets.
+    Responds 429 with Retry-After when either bucket is empty.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    await llm_rate_limiter.prepare(str(current_user.id))
+    scope, retry_after = llm_rate_limiter.acquire(str(current_user.id))
+    if scope:
+        RATE_LIMITED.inc(limiter=llm_rate_limiter.name, scope=scope)
+        retry_seconds = "3600" if math.isinf(retry_after) else str(max(1, math.ceil(retry_after)))
+        message = (
+            "Too many recipe generations. Please try again later."
+            if scope == "user" else
+            "Recipe generation is busy. Please try again later."
+        )
+        raise ApiError(status.HTTP_429_TOO_MANY_REQUESTS, message, headers={"Retry-After": retry_seconds})
+
+def refund_llm_call(user_id: str) -> None:
+    """Returns the tokens `limit_llm_calls` took, for requests answered without calling the model."""
+    if RATE_LIMIT_ENABLED:
+        llm_rate_limiter.refund(user_id)
+
+# Convenience alias for use in route handlers
+LLMRateLimit = Annotated[None, Depends(limit_llm_calls)]
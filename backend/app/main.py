@@ -1,27 +1,56 @@
-import uvicorn
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 # from app.database.connection import connect_db, close_db_connection, get_db
 from app.database.connection import MongoDB
-from app.api import auth, user, recipe
+from app.database.indexes import ensure_indexes, INDEX_BUILD_ON_STARTUP
+from app.api import auth, user, recipe, admin, scan
+from fastapi.responses import PlainTextResponse, JSONResponse
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.utils.logger import configure_logging, get_logger
+from app.utils.metrics import REGISTRY
+from app.services.profiler import install_signal_handler
+from app.services.rate_limiter import llm_rate_limiter
+from app.services.prewarm import cache_prewarmer
+from app.services.autocomplete import autocomplete_index
+from app.services.search_cache import search_cache
+from app.services.sessions import session_store
+from app.services.retention import view_tracker, recipe_archiver
+from app.services.detection.service import detection_service
+import asyncio
+import time
+
+configure_logging()
+logger = get_logger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Starting up...")
+    logger.info("Starting up...")
+    install_signal_handler(asyncio.get_running_loop())  # kill -USR2 <pid> profiles this worker
     await MongoDB.connect_db()  # Connect and check the database
     
-    # You can get the db instance here if needed for startup tasks like creating indexes
-    db = MongoDB.get_db()
-    # TODO: Create indexes on startup for better performance
-    try:
-        await db["users"].create_index("email", unique=True)
-        await db["users"].create_index("username", unique=True)
-        # await db["history"].create_index("user_email")
-        print("MongoDB indexes created successfully.")
-    except Exception as e:
-        print(f"Error creating indexes: {e}")
+    # Indexes (app/database/indexes.py) build in the background; startup doesn't wait for them
+    index_build = asyncio.create_task(ensure_indexes(MongoDB.get_db())) if INDEX_BUILD_ON_STARTUP else None
+    
+    await llm_rate_limiter.start()
+    await cache_prewarmer.start()  # no-op unless PREWARM_ENABLED=true
+    await autocomplete_index.start()  # first build runs in the background
+    await search_cache.start()  # syncs invalidations made by other workers
+    await session_store.start()  # syncs logouts made through other workers
+    await view_tracker.start()  # batches lastViewedAt writes
+    await recipe_archiver.start()  # no-op unless RETENTION_ENABLED=true
     
     yield
+    if index_build is not None and not index_build.done():
+        index_build.cancel()
+    await cache_prewarmer.stop()
+    await autocomplete_index.stop()
+    await search_cache.stop()
+    await session_store.stop()
+    await recipe_archiver.stop()
+    await view_tracker.stop()
+    await detection_service.stop()
+    await llm_rate_limiter.stop()
     MongoDB.close_db_connection() # Close the connection when the app shuts down
 
 app = FastAPI(
@@ -34,13 +63,59 @@ app = FastAPI(
 # API Routes
 prestring = "/api/v1"
 
+# Added last runs first: metrics also see the requests the limiter sheds
+app.add_middleware(ConcurrencyLimitMiddleware, prefix=prestring)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router, prefix=f"{prestring}/auth")
 app.include_router(user.router, prefix=f"{prestring}/user")
 app.include_router(recipe.router, prefix=f"{prestring}/recipes")
+app.include_router(scan.router, prefix=f"{prestring}/scan")
+app.include_router(admin.router, prefix=f"{prestring}/admin")
 
 @app.get("/")
 async def root():
     return {"message": "Application running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    """
+    Readiness probe: 503 when MongoDB does not answer a ping, or when a connection pool
+    is saturated (checked-out share >= MONGO_READY_MAX_SATURATION with callers waiting).
+    """
+    settings = MongoDB.get_settings()
+    mongo = {"ping_ms": None, "pools": {}}
+    healthy = True
+    try:
+        start = time.perf_counter()
+        await asyncio.wait_for(MongoDB.client.admin.command("ping"), settings.server_selection_timeout_ms / 1000)
+        mongo["ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as e:
+        healthy = False
+        mongo["error"] = str(e) or type(e).__name__
+    
+    for address, stats in MongoDB.pool_stats().items():
+        saturated = stats.waiting > 0 and stats.saturation >= settings.ready_max_saturation
+        healthy = healthy and not saturated
+        mongo["pools"][address] = {
+            "max_size": stats.max_size,
+            "open": stats.open,
+            "checked_out": stats.checked_out,
+            "waiting": stats.waiting,
+            "saturation": round(stats.saturation, 3),
+            "saturated": saturated,
+        }
+    return JSONResponse(
+        {"status": "ready" if healthy else "not_ready", "mongo": mongo},
+        status_code=200 if healthy else 503,
+    )
+
 if __name__ == "__main__":
+    # Development server with auto-reload; production runs `python -m app.server`
+    import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
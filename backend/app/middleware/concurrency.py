@@ -0,0 +1,67 @@
+import math
+import re
+import time
+from typing import Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from app.services.concurrency_limiter import CONCURRENCY_LIMIT_ENABLED, Shed, route_limiters
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Pure ASGI middleware applying the adaptive concurrency limits (services.concurrency_limiter).
+    Routes are classed by method and path before routing: model-backed routes share the "llm"
+    budget, other API routes the "db" budget. Health, metrics, docs and admin routes are never limited.
+    Shed requests get 503 with Retry-After, before their body is read.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = ""):
+        self.app = app
+        self.prefix = prefix
+        self.llm_routes: Tuple[Tuple[str, re.Pattern], ...] = (
+            ("POST", re.compile(rf"^{re.escape(prefix)}/recipes/generate/?$")),
+            ("POST", re.compile(rf"^{re.escape(prefix)}/scan/?$")),
+        )
+        self.exempt_prefixes = (f"{prefix}/admin",)
+
+    def route_class(self, method: str, path: str) -> Optional[str]:
+        if not path.startswith(f"{self.prefix}/") or path.startswith(self.exempt_prefixes):
+            return None
+        for route_method, pattern in self.llm_routes:
+            if method == route_method and pattern.match(path):
+                return "llm"
+        return "db"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_class = self.route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if not CONCURRENCY_LIMIT_ENABLED or route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = route_limiters[route_class]
+        try:
+            await limiter.acquire()
+        except Shed as shed:
+            response = JSONResponse(
+                {"detail": {"success": False, "message": "Server is busy. Please retry shortly."}},
+                status_code=503,
+                headers={"Retry-After": str(math.ceil(shed.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.perf_counter() - start, failed=status_code >= 500)
@@ -0,0 +1,41 @@
+import time
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template and in-flight requests.
+    Routes are labelled by their template (e.g. /api/v1/recipes/{recipe_id}) to keep cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -50,4 +50,48 @@ class RecipePublic(RecipeBase):
     
     class Config:
         populate_by_name = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AutocompleteSuggestion(BaseModel):
+    text: str
+    kind: str = Field(..., description="title, tag or ingredient")
+
+# --- Search keys ---
+def region_key(region: Optional[str]) -> Optional[str]:
+    """Normalized region stored as `region_key`, so region search is an exact, indexable match."""
+    key = (region or "").strip().lower()
+    return key or None
+
+
+# --- Lean output path ---
+# Stored recipes were validated on write, so read routes project the raw document
+# instead of rebuilding RecipePublic. Keep this in step with RecipePublic's fields.
+RECIPE_PUBLIC_PROJECTION = {"vector_embedding": 0}  # embeddings are internal and large
+
+
+def recipe_public_dict(doc: dict, include_owner: bool = True) -> dict:
+    """Maps a recipe document to the RecipePublic JSON shape (ObjectIds/datetimes are left for the encoder)."""
+    ratings = doc.get("ratings") or {}
+    return {
+        "title": doc.get("title"),
+        "ingredients": doc.get("ingredients", []),
+        "instructions": doc.get("instructions", []),
+        "region": doc.get("region"),
+        "dietary_preferences": doc.get("dietary_preferences"),
+        "prep_time_minutes": doc.get("prep_time_minutes"),
+        "cook_time_minutes": doc.get("cook_time_minutes"),
+        "servings": doc.get("servings"),
+        "difficulty": doc.get("difficulty"),
+        "tags": doc.get("tags"),
+        "nutritional_info": doc.get("nutritional_info"),
+        "ratings": {
+            "count": ratings.get("count", 0),
+            "average": ratings.get("average", 0.0),
+            "user_ratings": ratings.get("user_ratings") or {},
+        },
+        "owner": doc.get("owner") if include_owner else None,
+        "vector_embedding": None,
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+        "_id": doc["_id"],
+    }
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.models.userModel import PyObjectId
+
+
+class DetectedIngredient(BaseModel):
+    """One ingredient found in a scanned image."""
+    name: str
+    confidence: float = Field(..., ge=0, le=1)
+    bbox: List[float] = Field(..., description="[x1, y1, x2, y2] normalized to the image size")
+
+
+class ScanResponse(BaseModel):
+    """Response model for an image scan upload."""
+    id: PyObjectId = Field(alias="_id", description="Scan ID")
+    image_id: str = Field(..., description="SHA-256 of the image; identical photos share one stored copy")
+    size: int = Field(..., description="Image size in bytes")
+    content_type: str
+    region: Optional[str] = None
+    deduplicated: bool = Field(False, description="True if the image was already stored")
+    ingredients: List[DetectedIngredient] = []
+    cached_from: Optional[PyObjectId] = Field(None, description="Earlier scan whose ingredients were reused for this near-identical photo")
+
+    class Config:
+        populate_by_name = True
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class SessionDevice(BaseModel):
+    user_agent: str = ""
+    ip: Optional[str] = None
+
+
+class SessionPublic(BaseModel):
+    """One logged-in device."""
+    id: str = Field(alias="_id", description="Session ID")
+    device: SessionDevice
+    createdAt: Optional[datetime] = None
+    lastUsedAt: Optional[datetime] = None
+    current: bool = Field(False, description="True for the session making this request")
+
+    class Config:
+        populate_by_name = True
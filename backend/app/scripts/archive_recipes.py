@@ -0,0 +1,64 @@
+"""
+Moves cold generated recipes into `recipes_archive` (see services/retention.py),
+the same pass the API runs on a schedule when RETENTION_ENABLED=true:
+
+    python -m app.scripts.archive_recipes [--days 90] [--batch-size 500] [--max-batches N]
+    python -m app.scripts.archive_recipes --dry-run        # count candidates only
+    python -m app.scripts.archive_recipes --restore <id>   # bring one recipe back
+
+Archived recipes stay reachable by id; the first lookup restores them.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.database.connection import MongoDB, create_client
+from app.services.retention import (
+    ARCHIVE_COLLECTION, RECIPES_COLLECTION, RETENTION_BATCH_SIZE, RETENTION_COLD_DAYS,
+    archive_cold, cold_filter, restore,
+)
+
+
+async def run(args: argparse.Namespace) -> int:
+    settings = MongoDB.get_settings()
+    MongoDB.client = create_client(settings)
+    db = MongoDB.get_db()
+    try:
+        if args.restore:
+            if not ObjectId.is_valid(args.restore):
+                print(f"Invalid recipe id: {args.restore}")
+                return 1
+            restored = await restore(ObjectId(args.restore))
+            print("Restored" if restored else "Not in the archive")
+            return 0 if restored else 1
+        if args.dry_run:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
+            cold = await db[RECIPES_COLLECTION].count_documents(cold_filter(cutoff))
+            print(f"{cold} cold unrated recipes (favorited ones are skipped when archiving)")
+        else:
+            archived = await archive_cold(args.days, args.batch_size, args.max_batches)
+            print(f"Archived {archived} recipes")
+        hot = await db[RECIPES_COLLECTION].estimated_document_count()
+        archive = await db[ARCHIVE_COLLECTION].estimated_document_count()
+        print(f"recipes: {hot}, recipes_archive: {archive}")
+        return 0
+    finally:
+        MongoDB.close_db_connection()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive cold recipes, or restore one")
+    parser.add_argument("--days", type=float, default=RETENTION_COLD_DAYS, help="Not viewed for this long")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="Only count candidates")
+    mode.add_argument("--restore", metavar="RECIPE_ID", help="Move one archived recipe back")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Recomputes `nutritional_info` on stored recipes from the bundled nutrient table
+(see services/nutrition.py), replacing the values the LLM used to invent:
+
+    python -m app.scripts.backfill_nutrition [--batch-size 1000] [--all]
+
+Only recipes without table-computed values (no `nutritional_info.coverage`) are
+touched unless --all is given; use --all after editing app/data/nutrients.csv.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from app.database.connection import MongoDB, create_client
+from app.services.nutrition import compute_nutrition
+
+
+async def run(batch_size: int, recompute_all: bool) -> int:
+    settings = MongoDB.get_settings()
+    client = create_client(settings)
+    recipes = client[settings.db_name]["recipes"]
+    query = {} if recompute_all else {"nutritional_info.coverage": {"$exists": False}}
+    updated = 0
+
+    async def flush(docs: list) -> int:
+        # One vectorized pass and one bulk write per batch
+        writes = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"nutritional_info": nutrition}})
+            for doc, nutrition in zip(docs, compute_nutrition(docs))
+        ]
+        return (await recipes.bulk_write(writes, ordered=False)).modified_count
+
+    try:
+        batch = []
+        async for doc in recipes.find(query, {"ingredients": 1, "servings": 1}):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                updated += await flush(batch)
+                batch = []
+        if batch:
+            updated += await flush(batch)
+    finally:
+        client.close()
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute recipe nutrition from the nutrient table")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="Recompute every recipe")
+    args = parser.parse_args()
+    updated = asyncio.run(run(args.batch_size, args.all))
+    print(f"Updated {updated} recipes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Backfills the normalized search keys on stored recipes: `region_key`
+(recipe_model.region_key) and `ingredient_keys` (services.ingredients).
+
+Recipes written before a key existed are invisible to the searches that use it,
+so run this once after deploying a change that adds or redefines a key:
+
+    python -m app.scripts.backfill_recipe_keys [--batch-size 500] [--all]
+
+Only documents missing a key are touched unless --all is given. Use --all after
+editing app/data/ingredient_synonyms.json to re-normalize every recipe.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from app.database.connection import MongoDB, create_client
+from app.models.recipe_model import region_key
+from app.services.ingredients import ingredient_keys
+
+
+def search_keys(doc: dict) -> dict:
+    return {
+        "region_key": region_key(doc.get("region")),
+        "ingredient_keys": ingredient_keys(ing.get("name", "") for ing in doc.get("ingredients") or []),
+    }
+
+
+async def run(batch_size: int, recompute_all: bool) -> int:
+    settings = MongoDB.get_settings()
+    client = create_client(settings)
+    recipes = client[settings.db_name]["recipes"]
+    keys = ("region_key", "ingredient_keys")
+    query = {} if recompute_all else {"$or": [{key: {"$exists": False}} for key in keys]}
+    updated = 0
+    try:
+        batch = []
+        async for doc in recipes.find(query, {"region": 1, "ingredients.name": 1}):
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": search_keys(doc)}))
+            if len(batch) >= batch_size:
+                updated += (await recipes.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            updated += (await recipes.bulk_write(batch, ordered=False)).modified_count
+    finally:
+        client.close()
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill normalized recipe search keys")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="Recompute keys on every recipe")
+    args = parser.parse_args()
+    updated = asyncio.run(run(args.batch_size, args.all))
+    print(f"Updated {updated} recipes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Builds the indexes declared in app/database/indexes.py, outside app startup.
+
+Run from `backend/` (reads MONGO_URI / DB_NAME like the app):
+
+    python -m app.scripts.build_indexes            # create what is missing
+    python -m app.scripts.build_indexes --check    # exit 1 if anything is missing
+    python -m app.scripts.build_indexes --list     # print the registry
+
+Index builds on MongoDB 4.2+ do not block reads or writes for their duration,
+so this is safe against a live database. Set INDEX_BUILD_ON_STARTUP=false on
+the API when deploys run this instead.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database.connection import MongoDB, create_client
+from app.database.indexes import INDEXES, ensure_indexes, missing_indexes, undeclared_indexes
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.list:
+        for spec in INDEXES:
+            flags = " unique" if spec.unique else ""
+            if spec.expire_after_seconds is not None:
+                flags += f" ttl={spec.expire_after_seconds}s"
+            print(f"{spec.collection:16} {spec.name:40}{flags:18} {spec.serves}")
+        return 0
+
+    settings = MongoDB.get_settings()
+    client = create_client(settings)
+    try:
+        db = client[settings.db_name]
+        if args.check:
+            missing = await missing_indexes(db)
+            for spec in missing:
+                print(f"missing  {spec.collection}.{spec.name}")
+        else:
+            built = await ensure_indexes(db)
+            for collection, names in built.items():
+                print(f"ok       {collection}: {', '.join(names)}")
+            missing = await missing_indexes(db)
+        for collection, names in (await undeclared_indexes(db)).items():
+            print(f"extra    {collection}: {', '.join(names)} (not in the registry)")
+        return 1 if missing else 0
+    finally:
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or check the declared MongoDB indexes")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="Only report missing indexes; exit 1 if any")
+    mode.add_argument("--list", action="store_true", help="Print the index registry and exit")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Production entry point: `python -m app.server` (run from `backend/`).
+
+Runs gunicorn as a process manager over uvicorn workers:
+
+- SERVER_WORKERS workers (WEB_CONCURRENCY is honoured too), one per usable CPU by default.
+- uvloop and httptools when installed, else uvicorn's asyncio loop and h11 parser.
+- The app is imported once in the master and forked into the workers, so each worker
+  starts in milliseconds and shares the imported modules' memory copy-on-write.
+  Connections, background tasks and thread pools are created per worker in the
+  lifespan (app.main), never at import time.
+- SIGTERM drains: workers stop accepting, finish in-flight requests (an LLM call
+  lasts at most LLM_TIMEOUT_SECONDS) and run the lifespan shutdown before exiting.
+- Each worker is replaced after SERVER_MAX_REQUESTS (+ random jitter, so they
+  don't all restart together), which caps memory growth from fragmentation and caches.
+
+`python -m app.main` stays the single-process development server with auto-reload.
+On Windows, where gunicorn doesn't run, this falls back to uvicorn's own multi-process mode.
+"""
+import os
+
+from dotenv import load_dotenv
+
+from app.services.openAI import LLM_TIMEOUT_SECONDS
+
+load_dotenv()
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # respects CPU pinning (taskset, cgroup cpusets)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+SERVER_HOST = os.getenv("HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("PORT", 8000))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS") or os.getenv("WEB_CONCURRENCY") or _cpu_count())
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 10_000))  # 0 disables restarts
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 1_000))
+# Long enough for the slowest in-flight request, an LLM call at its client timeout
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", LLM_TIMEOUT_SECONDS + 15))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", 5))
+SERVER_WORKER_TIMEOUT = int(os.getenv("SERVER_WORKER_TIMEOUT", 30))  # a worker that stops heartbeating is restarted
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+SERVER_LOG_LEVEL = os.getenv("SERVER_LOG_LEVEL", "info")
+
+# Time the worker gets after draining connections for the lifespan shutdown (closing Mongo, pools)
+_SHUTDOWN_MARGIN_SECONDS = 10
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+SERVER_LOOP = "uvloop" if _installed("uvloop") else "asyncio"
+SERVER_HTTP = "httptools" if _installed("httptools") else "h11"
+
+
+def run_gunicorn() -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": SERVER_LOOP,
+            "http": SERVER_HTTP,
+            "lifespan": "on",
+            # uvicorn drains connections for this long; gunicorn's graceful_timeout kills after it
+            "timeout_graceful_shutdown": int(SERVER_GRACEFUL_TIMEOUT),
+        }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{SERVER_HOST}:{SERVER_PORT}",
+                "workers": SERVER_WORKERS,
+                "worker_class": Worker,
+                "preload_app": SERVER_PRELOAD,
+                "max_requests": SERVER_MAX_REQUESTS,
+                "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+                "graceful_timeout": int(SERVER_GRACEFUL_TIMEOUT) + _SHUTDOWN_MARGIN_SECONDS,
+                "timeout": SERVER_WORKER_TIMEOUT,
+                "keepalive": SERVER_KEEPALIVE_SECONDS,
+                "loglevel": SERVER_LOG_LEVEL,
+                "proc_name": "dishguru",
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Server().run()
+
+
+def run_uvicorn() -> None:
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=SERVER_WORKERS,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        limit_max_requests=SERVER_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=int(SERVER_GRACEFUL_TIMEOUT),
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        log_level=SERVER_LOG_LEVEL,
+    )
+
+
+def main() -> None:
+    if _installed("gunicorn") and os.name != "nt":
+        run_gunicorn()
+    else:
+        run_uvicorn()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Prefix autocomplete over recipe titles, tags and ingredient names.
+
+The index is a sorted array of normalized keys with parallel NumPy arrays of
+weights and label ids, so a prefix is a contiguous range found with two bisects.
+Short prefixes ("c", "ch", "chi") match huge ranges; their top suggestions are
+precomputed when the index is built. Longer prefixes take the top of their (much
+smaller) range with argpartition. Titles are also indexed from every later word,
+so "curry" finds "Thai Green Curry".
+
+Weights are popularity: for titles, recipes with that title plus their ratings;
+for tags and ingredients, the number of recipes carrying them.
+
+Each worker rebuilds its snapshot from Mongo every AUTOCOMPLETE_REFRESH_SECONDS
+(the sort runs in the threadpool, then the new snapshot is swapped in). Recipes
+generated by this worker in between go into a small pending index that queries
+merge in, so they are suggested right away. Memory is bounded by
+AUTOCOMPLETE_MAX_TERMS keys (lowest weights dropped) and AUTOCOMPLETE_MAX_PENDING.
+"""
+import asyncio
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app.database.connection import MongoDB
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+AUTOCOMPLETE_ENABLED = os.getenv("AUTOCOMPLETE_ENABLED", "true").lower() == "true"
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", 600))
+AUTOCOMPLETE_MAX_TERMS = int(os.getenv("AUTOCOMPLETE_MAX_TERMS", 2_000_000))
+AUTOCOMPLETE_MAX_PENDING = int(os.getenv("AUTOCOMPLETE_MAX_PENDING", 5000))
+AUTOCOMPLETE_PRECOMPUTED_PREFIX = int(os.getenv("AUTOCOMPLETE_PRECOMPUTED_PREFIX", 3))
+
+MAX_SUGGESTIONS = 20  # upper bound of the endpoint's `limit`
+_FETCH = MAX_SUGGESTIONS * 2  # a title can match through more than one of its words
+_PREFIX_END = "\uffff"  # sorts after every normalized character
+
+Label = Tuple[str, str]  # (kind, text)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII words separated by single spaces; the form keys and queries share."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return " ".join(_WORD.findall(text))
+
+
+def label_keys(kind: str, text: str) -> List[str]:
+    key = normalize(text)
+    if not key:
+        return []
+    if kind != "title":
+        return [key]
+    starts = [0] + [i + 1 for i, ch in enumerate(key) if ch == " "]
+    return [key[start:] for start in starts]
+
+
+def _top(weights: np.ndarray, lo: int, hi: int, k: int) -> np.ndarray:
+    """Positions of the k largest weights in [lo, hi), heaviest first."""
+    window = weights[lo:hi]
+    if hi - lo > k:
+        picked = np.argpartition(-window, k)[:k]
+    else:
+        picked = np.arange(hi - lo)
+    return lo + picked[np.argsort(-window[picked], kind="stable")]
+
+
+class _Snapshot:
+    """Immutable sorted-array index; built off the event loop, swapped in whole."""
+
+    def __init__(self, terms: Iterable[Tuple[str, str, float]], max_terms: int, precomputed_prefix: int):
+        entries: List[Tuple[str, int]] = []
+        self.labels: List[Label] = []
+        label_weights: List[float] = []
+        # Heaviest labels first, so the key budget drops the least popular ones
+        for kind, text, weight in sorted(terms, key=lambda term: -term[2]):
+            keys = label_keys(kind, text)
+            if not keys or len(entries) + len(keys) > max_terms:
+                continue
+            label_id = len(self.labels)
+            self.labels.append((kind, text))
+            label_weights.append(weight)
+            entries.extend((key, label_id) for key in keys)
+        entries.sort()
+
+        self.keys: List[str] = [key for key, _ in entries]
+        self.label_ids = np.fromiter((label_id for _, label_id in entries), dtype=np.int32, count=len(entries))
+        self.label_weights = np.asarray(label_weights, dtype=np.float64)
+        self.weights = self.label_weights[self.label_ids]
+        self.top: Dict[str, np.ndarray] = {}
+        for length in range(1, precomputed_prefix + 1):
+            self._precompute(length)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _precompute(self, length: int) -> None:
+        """Top entries of every prefix of `length`; one bisect per distinct prefix."""
+        i = 0
+        while i < len(self.keys):
+            prefix = self.keys[i][:length]
+            end = bisect_left(self.keys, prefix + _PREFIX_END, i)
+            if len(prefix) == length:
+                self.top[prefix] = _top(self.weights, i, end, _FETCH)
+            i = end
+
+    def search(self, prefix: str) -> List[Tuple[int, float]]:
+        """(label id, weight) of the heaviest entries under `prefix`."""
+        positions = self.top.get(prefix)
+        if positions is None:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + _PREFIX_END, lo)
+            positions = _top(self.weights, lo, hi, _FETCH)
+        return [(int(self.label_ids[p]), float(self.weights[p])) for p in positions]
+
+
+class _Pending:
+    """Labels added since the last rebuild: a sorted key list and weight increments."""
+
+    def __init__(self):
+        self.keys: List[Tuple[str, Label]] = []
+        self.weights: Dict[Label, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def add(self, kind: str, text: str, weight: float) -> None:
+        label = (kind, text)
+        if label not in self.weights:
+            for key in label_keys(kind, text):
+                insort(self.keys, (key, label))
+            self.weights[label] = 0.0
+        self.weights[label] += weight
+
+    def search(self, prefix: str) -> List[Label]:
+        lo = bisect_left(self.keys, (prefix,))
+        hi = bisect_left(self.keys, (prefix + _PREFIX_END,), lo)
+        return [label for _, label in self.keys[lo:hi]]
+
+
+# --- Loading from Mongo ---
+def title_terms_pipeline(limit: int) -> List[dict]:
+    return [
+        {"$group": {
+            "_id": {"$toLower": "$title"},
+            "text": {"$first": "$title"},
+            "weight": {"$sum": {"$add": [1, {"$ifNull": ["$ratings.count", 0]}]}},
+        }},
+        {"$sort": {"weight": -1}},
+        {"$limit": limit},
+    ]
+
+
+def array_terms_pipeline(field: str, limit: int) -> List[dict]:
+    """Tags and ingredient keys are suggested lowercase, one label per value."""
+    return [
+        {"$unwind": f"${field}"},
+        {"$group": {"_id": {"$toLower": f"${field}"}, "weight": {"$sum": 1}}},
+        {"$sort": {"weight": -1}},
+        {"$limit": limit},
+    ]
+
+
+async def load_terms(limit: int) -> List[Tuple[str, str, float]]:
+    recipes = MongoDB.get_heavy_read_collection("recipes")
+    terms: List[Tuple[str, str, float]] = []
+    for kind, pipeline in (
+        ("title", title_terms_pipeline(limit)),
+        ("tag", array_terms_pipeline("tags", limit)),
+        ("ingredient", array_terms_pipeline("ingredient_keys", limit)),
+    ):
+        async for doc in recipes.aggregate(pipeline, allowDiskUse=True):
+            text = doc.get("text", doc["_id"])
+            if isinstance(text, str) and text.strip():
+                terms.append((kind, text.strip(), float(doc["weight"])))
+    return terms
+
+
+class AutocompleteIndex:
+    def __init__(self, max_terms: int, max_pending: int, precomputed_prefix: int):
+        self.max_terms = max_terms
+        self.max_pending = max_pending
+        self.precomputed_prefix = precomputed_prefix
+        self._snapshot = _Snapshot([], max_terms, precomputed_prefix)
+        self._pending = _Pending()
+        self._rebuilding = _Pending()  # pending labels the running rebuild is reading from Mongo
+        self._refresh = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        snapshot, pendings = self._snapshot, (self._pending, self._rebuilding)
+        scores: Dict[Label, float] = {}
+        for label_id, weight in snapshot.search(prefix):
+            label = snapshot.labels[label_id]
+            scores[label] = weight + sum(p.weights.get(label, 0.0) for p in pendings)
+        for pending in pendings:
+            for label in pending.search(prefix):
+                if label not in scores:
+                    scores[label] = sum(p.weights.get(label, 0.0) for p in pendings)
+        suggestions, seen = [], set()
+        for (kind, text), _ in sorted(scores.items(), key=lambda item: (-item[1], item[0][1])):
+            if (kind, text.lower()) not in seen and len(suggestions) < limit:
+                seen.add((kind, text.lower()))
+                suggestions.append({"text": text, "kind": kind})
+        return suggestions
+
+    def add_recipes(self, documents: Iterable[dict]) -> None:
+        """Makes freshly inserted recipes suggestible before the next rebuild."""
+        if not AUTOCOMPLETE_ENABLED:
+            return
+        for doc in documents:
+            if len(self._pending) >= self.max_pending:
+                self._refresh.set()  # bounded: further labels wait for the rebuild
+                return
+            if doc.get("title"):
+                self._pending.add("title", doc["title"].strip(), 1.0)
+            for tag in doc.get("tags") or []:
+                self._pending.add("tag", tag.strip().lower(), 1.0)
+            for ingredient in doc.get("ingredient_keys") or []:
+                self._pending.add("ingredient", ingredient, 1.0)
+
+    async def rebuild(self) -> int:
+        """Reloads every term from Mongo; pending labels are covered by the new snapshot."""
+        self._rebuilding, self._pending = self._pending, _Pending()
+        start = time.perf_counter()
+        try:
+            terms = await load_terms(self.max_terms)
+            self._snapshot = await run_in_threadpool(_Snapshot, terms, self.max_terms, self.precomputed_prefix)
+        except Exception:
+            # Keep suggesting what was pending until the next attempt
+            for (kind, text), weight in self._rebuilding.weights.items():
+                self._pending.add(kind, text, weight)
+            raise
+        finally:
+            self._rebuilding = _Pending()
+        logger.info("Autocomplete index rebuilt", extra={
+            "keys": len(self._snapshot), "labels": len(self._snapshot.labels),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+        return len(self._snapshot)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.warning("Autocomplete rebuild failed", extra={"error": str(e)})
+            self._refresh.clear()
+            try:
+                await asyncio.wait_for(self._refresh.wait(), AUTOCOMPLETE_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if AUTOCOMPLETE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+autocomplete_index = AutocompleteIndex(
+    max_terms=AUTOCOMPLETE_MAX_TERMS,
+    max_pending=AUTOCOMPLETE_MAX_PENDING,
+    precomputed_prefix=AUTOCOMPLETE_PRECOMPUTED_PREFIX,
+)
@@ -0,0 +1,177 @@
+"""
+Adaptive concurrency limits with load shedding, one budget per route class.
+
+Each class ("llm" for routes waiting on the model or detection, "db" for the
+rest of the API) admits at most `limit` requests at once; the others wait in a
+FIFO queue. The limit adapts AIMD-style to the latency observed on completed
+requests:
+
+- a request that finishes within the class's target latency while the class
+  was using its whole budget raises the limit by 1/limit (+1 per full window);
+- a request slower than the target, or failing with a 5xx, multiplies it by
+  `backoff`, at most once per observed latency so one slow burst counts once.
+
+Queued requests are shed with 503 instead of waiting forever: immediately when
+the queue is full or the expected wait (queue position x average latency / limit)
+exceeds the queue timeout, otherwise once they have waited that long. A slow
+model therefore fills only the "llm" budget and its short queue, while reads
+keep their own budget.
+
+Limits are per worker process.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.utils.metrics import CONCURRENCY_LIMIT, CONCURRENCY_QUEUED, LOAD_SHED
+
+load_dotenv()
+
+CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true"
+
+# Weight of the newest sample in the latency average
+_LATENCY_ALPHA = 0.1
+
+
+@dataclass(frozen=True)
+class LimitSettings:
+    initial: int
+    min_limit: int
+    max_limit: int
+    target_seconds: float  # completions slower than this count as overload
+    queue_timeout_seconds: float  # longest a request may wait for a slot
+    max_queue: int
+    backoff: float = 0.75
+
+    @classmethod
+    def from_env(cls, route_class: str, **defaults) -> "LimitSettings":
+        """Reads CONCURRENCY_<CLASS>_<FIELD> (e.g. CONCURRENCY_LLM_MAX_LIMIT), falling back to `defaults`."""
+        values = {}
+        for name, default in defaults.items():
+            raw = os.getenv(f"CONCURRENCY_{route_class.upper()}_{name.upper()}")
+            values[name] = type(default)(raw) if raw not in (None, "") else default
+        return cls(**values)
+
+
+class Shed(Exception):
+    """Raised by `acquire` when a request is rejected instead of admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, settings: LimitSettings):
+        self.name = name
+        self.settings = settings
+        self.limit = float(settings.initial)
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # moving average of completed requests, seconds
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        CONCURRENCY_LIMIT.set(self.limit, route_class=name)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self) -> float:
+        return max(1.0, self.latency or 1.0)
+
+    def expected_wait(self, position: int) -> Optional[float]:
+        """Seconds until the request at `position` in the queue gets a slot, from the average latency."""
+        if self.latency is None:
+            return None
+        return position * self.latency / max(self.limit, 1.0)
+
+    # --- Admission ---
+    async def acquire(self) -> None:
+        """Waits for a slot; raises Shed if the request should be rejected instead."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.settings.max_queue:
+            self._shed("queue_full")
+        expected = self.expected_wait(len(self._waiters) + 1)
+        if expected is not None and expected > self.settings.queue_timeout_seconds:
+            self._shed("expected_wait")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        CONCURRENCY_QUEUED.set(len(self._waiters), route_class=self.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.settings.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                return  # the slot was handed over just as the timeout fired
+            self._shed("deadline")
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot that was already handed over
+            if not self._abandon(waiter):
+                self.release_slot()
+            raise
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Takes the waiter out of the queue; False if it had already been given a slot."""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        CONCURRENCY_QUEUED.set(len(self._waiters), route_class=self.name)
+        return True
+
+    def _shed(self, reason: str) -> None:
+        LOAD_SHED.inc(route_class=self.name, reason=reason)
+        raise Shed(reason, self._retry_after())
+
+    def release_slot(self) -> None:
+        """Frees a slot, handing it to the oldest waiter if the limit allows."""
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+        CONCURRENCY_QUEUED.set(len(self._waiters), route_class=self.name)
+
+    # --- Adaptation ---
+    def release(self, latency: float, failed: bool) -> None:
+        """Called when an admitted request completes, with its service time (queueing excluded)."""
+        saturated = self.in_flight >= int(self.limit)
+        self.release_slot()
+        self.latency = latency if self.latency is None else self.latency + _LATENCY_ALPHA * (latency - self.latency)
+
+        settings = self.settings
+        if failed or latency > settings.target_seconds:
+            now = time.monotonic()
+            if now - self._last_decrease >= min(self.latency, settings.target_seconds):
+                self.limit = max(float(settings.min_limit), self.limit * settings.backoff)
+                self._last_decrease = now
+        elif saturated:
+            self.limit = min(float(settings.max_limit), self.limit + 1.0 / self.limit)
+        CONCURRENCY_LIMIT.set(self.limit, route_class=self.name)
+
+
+route_limiters: Dict[str, AdaptiveLimiter] = {
+    # Generation and scans wait seconds on the model or the detection pool; they also
+    # hold threadpool threads, so the ceiling stays below anyio's default of 40
+    "llm": AdaptiveLimiter("llm", LimitSettings.from_env(
+        "llm", initial=8, min_limit=2, max_limit=32,
+        target_seconds=20.0, queue_timeout_seconds=5.0, max_queue=64,
+    )),
+    "db": AdaptiveLimiter("db", LimitSettings.from_env(
+        "db", initial=64, min_limit=8, max_limit=512,
+        target_seconds=0.5, queue_timeout_seconds=1.0, max_queue=512,
+    )),
+}
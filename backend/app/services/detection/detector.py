@@ -0,0 +1,170 @@
+"""
+Ingredient detectors.
+
+A detector turns a batch of preprocessed images into per-image detections.
+`StubDetector` is deterministic and needs no model or image decoding (tests,
+benchmarks, local dev); `OnnxYoloDetector` runs a YOLOv8 export on CPU with
+onnxruntime. Both run inside detection worker processes, never in the API loop.
+"""
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_LABELS = [
+    "tomato", "onion", "potato", "carrot", "cucumber", "bell pepper", "garlic", "ginger",
+    "spinach", "cabbage", "cauliflower", "broccoli", "eggplant", "okra", "peas", "corn",
+    "lemon", "lime", "apple", "banana", "mango", "orange", "chili", "mushroom",
+    "egg", "paneer", "rice", "chickpea", "lentil", "coriander",
+]
+
+
+@dataclass
+class Detection:
+    name: str
+    confidence: float
+    bbox: List[float]  # [x1, y1, x2, y2], normalized to 0..1 of the original image
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class ImageMeta:
+    """Original size and letterbox transform of one batch slot."""
+    width: int
+    height: int
+    scale: float = 1.0
+    pad_x: float = 0.0
+    pad_y: float = 0.0
+
+
+class Detector(ABC):
+    #: Square model input size in pixels
+    input_size: int = 640
+    #: False if the detector works from raw bytes and images need not be decoded
+    needs_pixels: bool = True
+
+    def __init__(self, labels: Optional[Sequence[str]] = None):
+        self.labels = list(labels or DEFAULT_LABELS)
+
+    @abstractmethod
+    def detect_batch(self, batch: Optional[np.ndarray], metas: List[ImageMeta], raws: List[bytes]) -> List[List[Detection]]:
+        """
+        `batch` is float32 (N, 3, S, S) in 0..1 when `needs_pixels`, else None.
+        `raws` holds the encoded image bytes of each slot.
+        """
+
+
+class StubDetector(Detector):
+    """Deterministic detections derived from the image bytes: same image, same result."""
+    needs_pixels = False
+
+    def detect_batch(self, batch, metas, raws):
+        results = []
+        for raw in raws:
+            digest = hashlib.sha256(raw).digest()
+            count = 2 + digest[0] % 3
+            detections = []
+            for i in range(count):
+                b = digest[1 + i * 5: 6 + i * 5]
+                x1, y1 = b[1] / 512, b[2] / 512
+                detections.append(Detection(
+                    name=self.labels[b[0] % len(self.labels)],
+                    confidence=round(0.5 + b[3] / 512, 3),
+                    bbox=[round(x1, 4), round(y1, 4), round(x1 + 0.25 + b[4] / 1024, 4), round(y1 + 0.25, 4)],
+                ))
+            # One entry per label, keeping the most confident
+            best = {}
+            for det in detections:
+                if det.name not in best or det.confidence > best[det.name].confidence:
+                    best[det.name] = det
+            results.append(sorted(best.values(), key=lambda d: -d.confidence))
+        return results
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression; boxes are (K, 4) xyxy. Returns kept indices."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxYoloDetector(Detector):
+    """YOLOv8 ONNX export (output shape (N, 4 + classes, anchors)) on the CPU execution provider."""
+
+    def __init__(self, model_path: str, labels: Optional[Sequence[str]] = None,
+                 conf_threshold: float = 0.35, iou_threshold: float = 0.5, threads: int = 1):
+        super().__init__(labels)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("DETECTOR=onnx requires the 'onnxruntime' package.") from e
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        if isinstance(model_input.shape[-1], int):
+            self.input_size = model_input.shape[-1]
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+
+    def detect_batch(self, batch, metas, raws):
+        output = self.session.run(None, {self.input_name: batch})[0]  # (N, 4 + C, A)
+        results = []
+        for preds, meta in zip(output, metas):
+            preds = preds.T  # (A, 4 + C)
+            class_scores = preds[:, 4:]
+            class_ids = class_scores.argmax(axis=1)
+            confidences = class_scores[np.arange(len(class_ids)), class_ids]
+            mask = confidences >= self.conf_threshold
+            if not mask.any():
+                results.append([])
+                continue
+            cx, cy, w, h = preds[mask, :4].T
+            boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+            confidences, class_ids = confidences[mask], class_ids[mask]
+
+            # Class-aware NMS by offsetting each class into its own coordinate range
+            offsets = class_ids[:, None].astype(np.float32) * (self.input_size + 1)
+            keep = _nms(boxes + offsets, confidences, self.iou_threshold)
+
+            # Undo the letterbox and normalize to the original image
+            boxes = boxes[keep]
+            boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - meta.pad_x) / meta.scale / meta.width).clip(0, 1)
+            boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - meta.pad_y) / meta.scale / meta.height).clip(0, 1)
+            results.append([
+                Detection(
+                    name=self.labels[int(c)] if int(c) < len(self.labels) else f"class_{int(c)}",
+                    confidence=round(float(s), 4),
+                    bbox=[round(float(v), 4) for v in box],
+                )
+                for box, s, c in zip(boxes, confidences[keep], class_ids[keep])
+            ])
+        return results
+
+
+def create_detector(kind: str, model_path: Optional[str] = None, labels: Optional[Sequence[str]] = None) -> Detector:
+    if kind == "stub":
+        return StubDetector(labels)
+    if kind == "onnx":
+        if not model_path or not os.path.exists(model_path):
+            raise RuntimeError("DETECTOR=onnx requires DETECTOR_MODEL_PATH to point at a YOLOv8 .onnx file.")
+        return OnnxYoloDetector(model_path, labels)
+    raise ValueError(f"Unknown detector '{kind}'.")
@@ -0,0 +1,111 @@
+"""
+Vectorized image preprocessing for detection: decode, letterbox-resize and
+normalize a batch into one float32 (N, 3, S, S) tensor. Also the perceptual
+hash used by the scan cache.
+"""
+import io
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.detection.detector import ImageMeta
+
+PAD_VALUE = 114 / 255.0  # YOLO letterbox grey
+
+
+def decode_image(raw: bytes) -> np.ndarray:
+    """Decodes encoded image bytes to an (H, W, 3) uint8 RGB array."""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Decoding images requires the 'Pillow' package.") from e
+    with Image.open(io.BytesIO(raw)) as img:
+        img.draft("RGB", (1280, 1280))  # lets JPEG decode at reduced scale when the photo is huge
+        return np.asarray(img.convert("RGB"))
+
+
+def decode_grayscale(raw: bytes, max_side: int = 256) -> np.ndarray:
+    """Decodes to a small (H, W) float32 luminance array; JPEGs decode at reduced scale, so this is cheap."""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Decoding images requires the 'Pillow' package.") from e
+    with Image.open(io.BytesIO(raw)) as img:
+        img.draft("L", (max_side, max_side))
+        return np.asarray(img.convert("L"), dtype=np.float32)
+
+
+def block_mean(image: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    """Area-average downscale of an (H, W) array; unlike point sampling it doesn't alias on large inputs."""
+    if image.shape[0] < out_h or image.shape[1] < out_w:
+        image = np.repeat(np.repeat(image, out_h, axis=0), out_w, axis=1)
+    in_h, in_w = image.shape
+    rows = np.linspace(0, in_h, out_h + 1).astype(np.int64)
+    cols = np.linspace(0, in_w, out_w + 1).astype(np.int64)
+    sums = np.add.reduceat(np.add.reduceat(image, rows[:-1], axis=0), cols[:-1], axis=1)
+    return sums / np.outer(np.diff(rows), np.diff(cols))
+
+
+def dhash(gray: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash: downscale to hash_size x (hash_size + 1) and record whether each
+    cell is brighter than its right neighbour. Re-encoding, resizing and small exposure
+    changes flip few bits, so near-identical photos have a small Hamming distance.
+    """
+    small = block_mean(gray, hash_size, hash_size + 1)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def resize_bilinear(image: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    """Bilinear resize of an (H, W, C) array using vectorized gathers (no per-pixel Python)."""
+    in_h, in_w = image.shape[:2]
+    ys = (np.arange(out_h, dtype=np.float32) + 0.5) * (in_h / out_h) - 0.5
+    xs = (np.arange(out_w, dtype=np.float32) + 0.5) * (in_w / out_w) - 0.5
+    ys = ys.clip(0, in_h - 1)
+    xs = xs.clip(0, in_w - 1)
+    y0 = ys.astype(np.int32)
+    x0 = xs.astype(np.int32)
+    y1 = np.minimum(y0 + 1, in_h - 1)
+    x1 = np.minimum(x0 + 1, in_w - 1)
+    wy = (ys - y0)[:, None, None]
+    wx = (xs - x0)[None, :, None]
+
+    img = image.astype(np.float32)
+    top = img[y0][:, x0] * (1 - wx) + img[y0][:, x1] * wx
+    bottom = img[y1][:, x0] * (1 - wx) + img[y1][:, x1] * wx
+    return top * (1 - wy) + bottom * wy
+
+
+def letterbox_into(image: np.ndarray, size: int, out: np.ndarray) -> ImageMeta:
+    """
+    Resizes `image` to fit a size x size square keeping aspect ratio, normalizes to 0..1
+    and writes it channel-first into `out` (3, size, size), padding the rest.
+    """
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    new_h, new_w = max(1, round(height * scale)), max(1, round(width * scale))
+    pad_y, pad_x = (size - new_h) // 2, (size - new_w) // 2
+
+    resized = resize_bilinear(image, new_h, new_w)
+    out.fill(PAD_VALUE)
+    out[:, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized.transpose(2, 0, 1) * (1.0 / 255.0)
+    return ImageMeta(width=width, height=height, scale=scale, pad_x=pad_x, pad_y=pad_y)
+
+
+def ensure_batch_buffer(buffer: Optional[np.ndarray], n: int, size: int) -> np.ndarray:
+    """Returns `buffer` if it can hold n images of size x size, else a larger one (grown, never shrunk)."""
+    if buffer is not None and buffer.shape[0] >= n and buffer.shape[2] == size:
+        return buffer
+    capacity = max(n, buffer.shape[0] if buffer is not None else 0)
+    return np.empty((capacity, 3, size, size), dtype=np.float32)
+
+
+def preprocess_batch(images: List[np.ndarray], buffer: np.ndarray) -> Tuple[np.ndarray, List[ImageMeta]]:
+    """
+    Builds the model input for decoded images inside `buffer` (see `ensure_batch_buffer`),
+    so a worker reuses one batch tensor instead of allocating per batch. Returns the filled view.
+    """
+    size = buffer.shape[2]
+    metas = [letterbox_into(image, size, buffer[i]) for i, image in enumerate(images)]
+    return buffer[:len(images)], metas
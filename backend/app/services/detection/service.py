@@ -0,0 +1,150 @@
+"""
+Async front-end of the detection worker pool.
+
+Requests are queued and grouped into micro-batches: the first queued image opens
+a window of DETECTION_BATCH_WINDOW_MS, and the batch is dispatched when the window
+closes or DETECTION_MAX_BATCH images are waiting. At most one batch per worker is
+in flight, so the backlog waits in the queue instead of piling up inside the pool.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.services.detection import worker
+from app.utils.logger import get_logger
+from app.utils.metrics import DETECTION_BATCH_SIZE, DETECTION_DURATION, DETECTION_QUEUE_DEPTH
+
+load_dotenv()
+logger = get_logger(__name__)
+
+DETECTOR = os.getenv("DETECTOR", "stub")  # "stub" or "onnx"
+DETECTOR_MODEL_PATH = os.getenv("DETECTOR_MODEL_PATH")
+DETECTOR_LABELS = os.getenv("DETECTOR_LABELS")  # comma-separated class names, in model order
+DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+DETECTION_BATCH_WINDOW_MS = float(os.getenv("DETECTION_BATCH_WINDOW_MS", 5))
+DETECTION_MAX_BATCH = int(os.getenv("DETECTION_MAX_BATCH", 8))
+DETECTION_TIMEOUT_SECONDS = float(os.getenv("DETECTION_TIMEOUT_SECONDS", 30))
+
+
+class DetectionService:
+    def __init__(self, workers: int = DETECTION_WORKERS, window_ms: float = DETECTION_BATCH_WINDOW_MS,
+                 max_batch: int = DETECTION_MAX_BATCH):
+        self.workers = workers
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: set = set()
+
+    def _ensure_started(self) -> None:
+        """Starts the pool and collector on first use, keeping app startup fast."""
+        if self._collector is not None:
+            return
+        labels = [label.strip() for label in DETECTOR_LABELS.split(",")] if DETECTOR_LABELS else None
+        # spawn: never fork a process that is running an event loop and driver threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=worker.init_worker,
+            initargs=(DETECTOR, DETECTOR_MODEL_PATH, labels),
+        )
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._collector = asyncio.create_task(self._collect())
+        logger.info("Detection pool started", extra={"detector": DETECTOR, "workers": self.workers})
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            DETECTION_QUEUE_DEPTH.set(self._queue.qsize())
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[worker.ImageRef, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self._pool, worker.run_batch, [ref for ref, _ in batch])
+            for (_, future), detections in zip(batch, results):
+                if future.done():
+                    continue
+                if detections is None:
+                    future.set_exception(ValueError("Image could not be read or decoded."))
+                else:
+                    future.set_result(detections)
+        except Exception as e:
+            logger.error("Detection batch failed", extra={"size": len(batch), "error": str(e)})
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+            DETECTION_BATCH_SIZE.observe(len(batch))
+            DETECTION_DURATION.observe(time.perf_counter() - start)
+
+    async def _submit(self, ref: worker.ImageRef) -> List[dict]:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((ref, future))
+        return await asyncio.wait_for(future, DETECTION_TIMEOUT_SECONDS)
+
+    async def detect_path(self, path: str) -> List[dict]:
+        """Detects ingredients in an image file; the worker reads the file itself."""
+        return await self._submit(("path", os.path.abspath(path), 0))
+
+    async def detect_bytes(self, data: bytes) -> List[dict]:
+        """Detects ingredients in in-memory image bytes, handed to the worker through shared memory."""
+        segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        try:
+            segment.buf[:len(data)] = data
+            return await self._submit(("shm", segment.name, len(data)))
+        finally:
+            segment.close()
+            segment.unlink()
+
+    async def hash_path(self, path: str) -> Optional[int]:
+        """
+        Perceptual hash of an image file (see `worker.image_hash`). Not batched: it is a
+        small decode, so it goes straight to the pool instead of waiting for a window.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, worker.image_hash, ("path", os.path.abspath(path), 0))
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown, wait=True, cancel_futures=True)
+            self._pool = None
+
+
+detection_service = DetectionService()
@@ -0,0 +1,78 @@
+"""
+Entry points executed inside detection worker processes.
+
+Kept import-light (NumPy and the detector only) so spawning a worker is cheap.
+Images arrive either as a path the worker reads itself (blob store objects) or
+as a shared-memory segment written by the API process, so image bytes are not
+pickled through the pool's pipe.
+"""
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.detection.detector import Detector, ImageMeta, create_detector
+from app.services.detection.preprocess import decode_grayscale, decode_image, dhash, ensure_batch_buffer, preprocess_batch
+
+# ("path", "/abs/path", 0) or ("shm", "segment-name", size)
+ImageRef = Tuple[str, str, int]
+
+_detector: Optional[Detector] = None
+_buffer: Optional[np.ndarray] = None
+
+
+def init_worker(kind: str, model_path: Optional[str], labels: Optional[Sequence[str]]) -> None:
+    global _detector
+    _detector = create_detector(kind, model_path, labels)
+
+
+def _load(ref: ImageRef) -> bytes:
+    kind, location, size = ref
+    if kind == "path":
+        with open(location, "rb") as fh:
+            return fh.read()
+    # Workers are spawned by the API process and share its resource tracker,
+    # which already knows the segment; the API process unlinks it
+    segment = shared_memory.SharedMemory(name=location)
+    try:
+        return bytes(segment.buf[:size])
+    finally:
+        segment.close()
+
+
+def run_batch(refs: List[ImageRef]) -> List[Optional[List[dict]]]:
+    """
+    Detects one micro-batch. Returns detections as plain dicts (cheap to pickle back);
+    a slot whose image could not be read or decoded is None and does not fail the others.
+    """
+    global _buffer
+    raws, pixels, slots = [], [], []
+    for i, ref in enumerate(refs):
+        try:
+            raw = _load(ref)
+            if _detector.needs_pixels:
+                pixels.append(decode_image(raw))
+        except Exception:
+            continue
+        raws.append(raw)
+        slots.append(i)
+
+    results: List[Optional[List[dict]]] = [None] * len(refs)
+    if not slots:
+        return results
+    if _detector.needs_pixels:
+        _buffer = ensure_batch_buffer(_buffer, len(pixels), _detector.input_size)
+        batch, metas = preprocess_batch(pixels, _buffer)
+    else:
+        batch, metas = None, [ImageMeta(width=0, height=0) for _ in raws]
+    for i, detections in zip(slots, _detector.detect_batch(batch, metas, raws)):
+        results[i] = [det.to_dict() for det in detections]
+    return results
+
+
+def image_hash(ref: ImageRef) -> Optional[int]:
+    """64-bit dHash of the image, or None if it can't be decoded (or Pillow is not installed)."""
+    try:
+        return dhash(decode_grayscale(_load(ref)))
+    except Exception:
+        return None
@@ -0,0 +1,210 @@
+"""
+Ingredient name canonicalization.
+
+Names arrive as free text from clients, the detector and the LLM ("Tomatoes",
+"2 roma tomatoes, diced", "brocoli"). `canonicalize` maps them onto one name per
+ingredient so cache keys, stored `ingredient_keys` and searches agree:
+
+1. normalize: lowercase, strip accents, digits and punctuation, drop descriptor
+   words ("fresh", "chopped", ...), singularize each token;
+2. correct typos: a token outside the dictionary vocabulary is replaced by its
+   nearest vocabulary word when it is close enough. Candidates come from a
+   symmetric-delete index (every vocabulary word with up to two letters removed),
+   so a lookup is a handful of dict probes plus an edit-distance check on the few
+   words that share a deletion, rather than a scan of the vocabulary;
+3. match: the longest dictionary phrase inside the token sequence, found with a
+   token trie, gives the canonical name, provided the tokens around it are only
+   modifiers (units, containers, parts such as "clove" or "leaf"). Anything else
+   makes it a different ingredient ("red pepper flakes", "onion powder", "corn
+   flour"), so the name keeps its normalized form without leading or trailing modifiers.
+
+The dictionary is app/data/ingredient_synonyms.json. Results are memoized, so
+repeated names cost a dict lookup.
+"""
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SYNONYMS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ingredient_synonyms.json")
+
+_NON_ALPHA = re.compile(r"[^a-z ]+")
+_IRREGULAR_PLURALS = {
+    "leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife",
+    "chilies": "chili", "chillies": "chilli", "chiles": "chile",
+}
+_END = ""  # trie key marking the end of a phrase
+_MAX_TYPO_DISTANCE = 2
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (insert, delete, substitute), two-row dynamic programming."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    """`word` and every string obtained by removing up to `depth` letters from it."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def _max_typo_distance(token: str) -> int:
+    """Short words get no correction: "pea" -> "tea" would be a different ingredient."""
+    if len(token) <= 4:
+        return 0
+    return 1 if len(token) <= 7 else _MAX_TYPO_DISTANCE
+
+
+class IngredientCanonicalizer:
+    def __init__(self, data: dict):
+        self.descriptors = frozenset(data.get("descriptors", []))
+        self.invariant = frozenset(data.get("invariant", []))
+        self.modifiers = frozenset(self.singularize(m) for m in data.get("modifiers", []))
+        self._trie: dict = {}
+        self.vocabulary: set = set()
+        self.conflicts: List[Tuple[str, str, str]] = []
+
+        # Canonical names first, so a synonym can never take over a canonical name's phrase
+        entries = data.get("ingredients", {})
+        for canonical in entries:
+            self._insert(canonical, canonical)
+        for canonical, synonyms in entries.items():
+            for synonym in synonyms:
+                self._insert(synonym, canonical)
+        self._typos: Dict[str, List[str]] = {}
+        for word in sorted(self.vocabulary):
+            for variant in _deletes(word, _MAX_TYPO_DISTANCE):
+                self._typos.setdefault(variant, []).append(word)
+        self.canonicalize = lru_cache(maxsize=65536)(self._canonicalize)
+
+    # --- Normalization ---
+    def singularize(self, token: str) -> str:
+        if token in self.invariant or len(token) <= 3:
+            return token
+        if token in _IRREGULAR_PLURALS:
+            return _IRREGULAR_PLURALS[token]
+        if token.endswith("ies") and len(token) > 4:
+            return token[:-3] + "y"
+        if token.endswith(("oes", "ches", "shes", "xes", "sses", "zes")):
+            return token[:-2]
+        if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            return token[:-1]
+        return token
+
+    def tokens(self, name: str) -> List[str]:
+        text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+        text = _NON_ALPHA.sub(" ", text.replace("-", " "))
+        return [self.singularize(t) for t in text.split() if t not in self.descriptors]
+
+    # --- Dictionary ---
+    def _insert(self, phrase: str, canonical: str) -> None:
+        tokens = self.tokens(phrase)
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+            self.vocabulary.add(token)
+        existing = node.get(_END)
+        if existing is None:
+            node[_END] = canonical
+        elif existing != canonical:
+            self.conflicts.append((" ".join(tokens), existing, canonical))
+
+    def _correct(self, token: str) -> str:
+        limit = _max_typo_distance(token)
+        if token in self.vocabulary or token in self.modifiers or limit == 0:
+            return token
+        candidates = {word for variant in _deletes(token, limit) for word in self._typos.get(variant, ())}
+        best, best_distance = token, limit + 1
+        for word in sorted(candidates):
+            distance = levenshtein(token, word)
+            if distance < best_distance:
+                best, best_distance = word, distance
+        return best
+
+    def _longest_match(self, tokens: List[str]) -> Optional[str]:
+        """
+        Canonical name of the longest dictionary phrase in `tokens` whose other tokens
+        are all modifiers; the rightmost wins ties.
+        """
+        best: Optional[str] = None
+        best_len = 0
+        for start in range(len(tokens)):
+            if any(t not in self.modifiers for t in tokens[:start]):
+                break  # every later phrase would leave this token over
+            node = self._trie
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                length = end - start + 1
+                if (_END in node and length >= best_len
+                        and all(t in self.modifiers for t in tokens[end + 1:])):
+                    best, best_len = node[_END], length
+        return best
+
+    def _canonicalize(self, name: str) -> str:
+        tokens = [self._correct(t) for t in self.tokens(name or "")]
+        if not tokens:
+            return ""
+        match = self._longest_match(tokens)
+        if match:
+            return match
+        start, end = 0, len(tokens)
+        while start < end - 1 and tokens[start] in self.modifiers:
+            start += 1
+        while end > start + 1 and tokens[end - 1] in self.modifiers:
+            end -= 1
+        return " ".join(tokens[start:end])
+
+
+@lru_cache(maxsize=1)
+def get_canonicalizer() -> IngredientCanonicalizer:
+    with open(SYNONYMS_PATH, encoding="utf-8") as fh:
+        canonicalizer = IngredientCanonicalizer(json.load(fh))
+    for phrase, kept, dropped in canonicalizer.conflicts:
+        logger.warning("Ingredient synonym conflict", extra={"phrase": phrase, "kept": kept, "dropped": dropped})
+    return canonicalizer
+
+
+def canonicalize(name: str) -> str:
+    """Canonical ingredient name ("2 Roma Tomatoes, diced" -> "tomato"); "" if nothing is left."""
+    return get_canonicalizer().canonicalize(name)
+
+
+def canonical_detections(detections: Iterable[dict]) -> List[dict]:
+    """Detector output with canonical names; duplicates collapse onto the most confident one."""
+    best: Dict[str, dict] = {}
+    for detection in detections:
+        name = canonicalize(detection["name"]) or detection["name"]
+        if name not in best or detection["confidence"] > best[name]["confidence"]:
+            best[name] = {**detection, "name": name}
+    return sorted(best.values(), key=lambda d: -d["confidence"])
+
+
+def ingredient_keys(names: Iterable[str]) -> List[str]:
+    """Sorted, de-duplicated canonical names; the form stored on recipes and used in cache keys."""
+    return sorted({key for key in map(canonicalize, names) if key})
@@ -0,0 +1,300 @@
+"""
+Tolerant extraction of recipe suggestions from model output.
+
+`json.loads` fails on output a person would still read as fine, and every
+failure costs a full new generation when the client retries. Repairs are
+tried in order, cheapest first, and each one used is counted
+(llm_output_repairs_total):
+
+- "fence": a ```json ... ``` code fence around the object;
+- "surrounding_text": prose before or after the JSON value holding the recipes
+  (other values in the prose, such as "[1]", are skipped);
+- "trailing_comma": commas before } or ];
+- "truncated": output cut off mid-recipe (max_tokens). The complete
+  objects of the recipe array are kept and the cut-off one is dropped.
+
+Each recipe is then coerced to what RecipeBase accepts ("easy" -> "Easy",
+"15 minutes" -> 15, ingredient strings -> {"name", "quantity"}, instruction
+text -> list of steps), then validated on its own. One bad recipe no longer
+discards the others. llm_output_total counts each response as clean,
+repaired, partial (recipes were dropped) or failed.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.recipe_model import RecipeBase
+from app.utils.logger import get_logger
+from app.utils.metrics import LLM_OUTPUT, LLM_OUTPUT_REPAIRS
+
+logger = get_logger(__name__)
+
+RECIPES_KEY = "recipe_suggestions"
+
+_decoder = json.JSONDecoder()
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+@dataclass
+class RecipeExtraction:
+    recipes: List[dict]
+    repairs: List[str] = field(default_factory=list)
+    dropped: int = 0  # recipes lost to truncation or failed validation
+    parsed: bool = True  # False when no JSON could be recovered at all
+
+    @property
+    def outcome(self) -> str:
+        if not self.recipes:
+            return "failed"
+        if self.dropped:
+            return "partial"
+        return "repaired" if self.repairs else "clean"
+
+
+# --- JSON recovery ---
+def _strip_trailing_commas(text: str) -> str:
+    """Removes commas directly before } or ], leaving string contents alone."""
+    out, in_string, escaped = [], False, False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]"):
+                continue
+        out.append(char)
+    return "".join(out)
+
+
+_VALUE_START = re.compile(r"[{\[]")
+
+
+def _decode_recipes(text: str) -> Tuple[Any, int, int]:
+    """
+    Decodes the first JSON value in `text` that holds recipes, skipping complete values
+    that don't ("see [1]"); returns (value, start, end). Stops at the first value that
+    fails to decode: anything after it may be nested inside it, which is for
+    `_salvage_array` to sort out.
+    """
+    position = 0
+    while True:
+        match = _VALUE_START.search(text, position)
+        if match is None:
+            raise ValueError("no JSON value with recipes")
+        value, end = _decoder.raw_decode(text, match.start())
+        if any(isinstance(recipe, dict) for recipe in _recipe_list(value)):
+            return value, match.start(), end
+        position = end
+
+
+def _salvage_array(text: str) -> Tuple[List[Any], bool]:
+    """
+    Complete elements of the recipe array in truncated output, and whether the array
+    was cut off (an incomplete element, or the end of the text before its `]`).
+    No elements if there is no array.
+    """
+    match = re.search(rf'"{RECIPES_KEY}"\s*:\s*\[', text)
+    if match:
+        position = match.end()
+    elif text.lstrip().startswith("["):
+        position = text.index("[") + 1
+    else:
+        return [], False
+    items = []
+    while True:
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text):
+            return items, True  # cut after a complete element
+        if text[position] == "]":
+            return items, False
+        try:
+            item, position = _decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            return items, True  # the cut-off element
+        items.append(item)
+
+
+def _load(text: str, repairs: List[str]) -> Tuple[Any, bool]:
+    """
+    Parses model output, recording the repairs it needed. Returns (value, whether
+    a cut-off recipe was dropped); raises ValueError if nothing is usable.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+        repairs.append("fence")
+    for candidate, repair in ((text, None), (_strip_trailing_commas(text), "trailing_comma")):
+        try:
+            value, start, end = _decode_recipes(candidate)
+        except ValueError:  # JSONDecodeError included
+            continue
+        if repair:
+            repairs.append(repair)
+        if candidate[:start].strip() or candidate[end:].strip():
+            repairs.append("surrounding_text")
+        return value, False
+
+    salvaged, cut = _salvage_array(_strip_trailing_commas(text))
+    if salvaged:
+        repairs.append("truncated")
+        return salvaged, cut
+    raise ValueError("unrecoverable model output")
+
+
+def _recipe_list(data: Any) -> List[Any]:
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        return []
+    if isinstance(data.get(RECIPES_KEY), list):
+        return data[RECIPES_KEY]
+    if "title" in data:
+        return [data]  # a single recipe without the wrapper
+    lists = [value for value in data.values() if isinstance(value, list) and value and isinstance(value[0], dict)]
+    return lists[0] if len(lists) == 1 else []
+
+
+# --- Field coercion ---
+_DIFFICULTY = {
+    "easy": "Easy", "simple": "Easy", "beginner": "Easy", "very easy": "Easy",
+    "medium": "Medium", "moderate": "Medium", "intermediate": "Medium", "easy/medium": "Medium",
+    "hard": "Hard", "difficult": "Hard", "advanced": "Hard", "challenging": "Hard", "medium/hard": "Hard",
+}
+_HOURS = re.compile(r"(\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hour|hours)\b", re.IGNORECASE)
+_MINUTES = re.compile(r"(\d+(?:\.\d+)?)\s*(?:m|min|mins|minute|minutes)\b", re.IGNORECASE)
+_FIRST_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _to_int(value: Any, minutes: bool = False) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    text = str(value)
+    if minutes:
+        hours, mins = _HOURS.search(text), _MINUTES.search(text)
+        if hours or mins:
+            return int(round(float(hours.group(1)) * 60 if hours else 0) + round(float(mins.group(1)) if mins else 0))
+    number = _FIRST_NUMBER.search(text)  # "4-6 servings" -> 4
+    return int(round(float(number.group()))) if number else None
+
+
+def _ingredient(value: Any) -> Optional[dict]:
+    if isinstance(value, str):
+        return {"name": value.strip(), "quantity": None} if value.strip() else None
+    if not isinstance(value, dict):
+        return None
+    name = value.get("name") or value.get("ingredient") or value.get("item")
+    if not name:
+        return None
+    quantity = value.get("quantity", value.get("amount"))
+    unit = value.get("unit")
+    if quantity is not None and not isinstance(quantity, str):
+        quantity = f"{quantity:g}" if isinstance(quantity, float) else str(quantity)
+    if unit and quantity is not None and str(unit) not in quantity:
+        quantity = f"{quantity} {unit}"
+    return {"name": str(name).strip(), "quantity": quantity}
+
+
+def _steps(value: Any) -> List[str]:
+    if isinstance(value, str):
+        # one step per line, or per "1." / "Step 2:" when the model wrote a paragraph
+        value = re.split(r"\n+|(?<=[.!?])\s+(?=(?:step\s*)?\d+[.):])", value, flags=re.IGNORECASE)
+    steps = []
+    for step in value if isinstance(value, list) else []:
+        if isinstance(step, dict):
+            step = step.get("text") or step.get("instruction") or step.get("step") or step.get("description")
+        if isinstance(step, (str, int, float)) and str(step).strip():
+            steps.append(str(step).strip())
+    return steps
+
+
+def coerce_recipe(raw: dict) -> dict:
+    """Best-effort mapping of one model recipe onto RecipeBase's field types."""
+    recipe = dict(raw)
+    difficulty = recipe.get("difficulty")
+    if difficulty is not None:
+        recipe["difficulty"] = _DIFFICULTY.get(str(difficulty).strip().lower())
+    for key in ("prep_time_minutes", "cook_time_minutes"):
+        if key in recipe:
+            recipe[key] = _to_int(recipe[key], minutes=True)
+    if "servings" in recipe:
+        recipe["servings"] = _to_int(recipe["servings"])
+    recipe["ingredients"] = [i for i in map(_ingredient, recipe.get("ingredients") or []) if i]
+    recipe["instructions"] = _steps(recipe.get("instructions"))
+    tags = recipe.get("tags")
+    if isinstance(tags, str):
+        recipe["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    elif isinstance(tags, list):
+        recipe["tags"] = [str(tag).strip() for tag in tags if str(tag).strip()]
+    dietary = recipe.get("dietary_preferences")
+    if isinstance(dietary, list):
+        recipe["dietary_preferences"] = ", ".join(str(d) for d in dietary) or None
+    # nutrition is computed locally and ownership/timestamps are set by the route
+    for key in ("nutritional_info", "ratings", "owner", "vector_embedding", "createdAt", "updatedAt", "_id", "id"):
+        recipe.pop(key, None)
+    return recipe
+
+
+# --- Entry point ---
+def extract_recipes(text: Optional[str]) -> RecipeExtraction:
+    """Recipes from one model response; `recipes` is empty when nothing usable was found."""
+    repairs: List[str] = []
+    try:
+        data, cut = _load(text or "", repairs)
+    except ValueError:
+        extraction = RecipeExtraction(recipes=[], repairs=repairs, parsed=False)
+        _record(extraction, text)
+        return extraction
+
+    recipes, dropped, coerced = [], 1 if cut else 0, False
+    for raw in _recipe_list(data):
+        if not isinstance(raw, dict):
+            dropped += 1
+            continue
+        recipe = coerce_recipe(raw)
+        try:
+            RecipeBase.model_validate(recipe)
+        except ValidationError:
+            dropped += 1
+            continue
+        if not recipe["ingredients"] or not recipe["instructions"]:
+            dropped += 1
+            continue
+        coerced = coerced or any(recipe.get(key) != raw.get(key) for key in recipe)
+        recipes.append(recipe)
+    if coerced:
+        repairs.append("coerced")
+    extraction = RecipeExtraction(recipes=recipes, repairs=repairs, dropped=dropped)
+    _record(extraction, text)
+    return extraction
+
+
+def _record(extraction: RecipeExtraction, text: Optional[str]) -> None:
+    LLM_OUTPUT.inc(outcome=extraction.outcome)
+    for repair in extraction.repairs:
+        LLM_OUTPUT_REPAIRS.inc(kind=repair)
+    if extraction.dropped:
+        LLM_OUTPUT_REPAIRS.inc(extraction.dropped, kind="dropped_recipe")
+    if extraction.outcome != "clean":
+        logger.info("Model output needed repair", extra={
+            "outcome": extraction.outcome, "repairs": extraction.repairs,
+            "recipes": len(extraction.recipes), "dropped": extraction.dropped,
+            "chars": len(text or ""), "head": (text or "")[:200],
+        })
@@ -0,0 +1,215 @@
+"""
+Per-serving nutrition computed from the bundled nutrient table.
+
+Each ingredient line is resolved to grams of a table row:
+
+- the name is canonicalized (services.ingredients) and looked up in
+  app/data/nutrients.csv (per 100 g, with density and per-piece weights);
+- the quantity string is parsed into amount and unit ("1 1/2 cups", "200g",
+  "2-3 cloves", "a pinch", "to taste").
+
+Parsing and lookup are memoized per string; the arithmetic for a whole batch of
+recipes runs as NumPy array operations. Lines that can't be resolved (unknown
+ingredient, or a count of something with no piece weight) are left out, and
+`coverage` reports the share of lines that were counted.
+"""
+import csv
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.ingredients import canonicalize
+
+NUTRIENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "nutrients.csv")
+
+# Output keys, in the column order of the table
+NUTRIENTS = ("calories", "protein_g", "carbs_g", "fat_g", "fiber_g")
+
+# --- Units ---
+MASS, VOLUME, COUNT = 0, 1, 2
+
+_UNITS = {
+    # mass, in grams
+    "g": (MASS, 1.0), "gm": (MASS, 1.0), "gram": (MASS, 1.0), "gramme": (MASS, 1.0),
+    "kg": (MASS, 1000.0), "kilogram": (MASS, 1000.0), "mg": (MASS, 0.001),
+    "oz": (MASS, 28.35), "ounce": (MASS, 28.35), "lb": (MASS, 453.6), "pound": (MASS, 453.6),
+    # volume, in millilitres
+    "ml": (VOLUME, 1.0), "milliliter": (VOLUME, 1.0), "millilitre": (VOLUME, 1.0),
+    "cl": (VOLUME, 10.0), "dl": (VOLUME, 100.0),
+    "l": (VOLUME, 1000.0), "liter": (VOLUME, 1000.0), "litre": (VOLUME, 1000.0),
+    "cup": (VOLUME, 240.0), "tbsp": (VOLUME, 15.0), "tablespoon": (VOLUME, 15.0), "tbs": (VOLUME, 15.0),
+    "tsp": (VOLUME, 5.0), "teaspoon": (VOLUME, 5.0), "pint": (VOLUME, 473.0), "quart": (VOLUME, 946.0),
+    "fl oz": (VOLUME, 29.57),
+    # counts, in pieces of the ingredient's g_per_piece
+    "piece": (COUNT, 1.0), "pc": (COUNT, 1.0), "pcs": (COUNT, 1.0), "whole": (COUNT, 1.0),
+    "clove": (COUNT, 1.0), "slice": (COUNT, 1.0), "head": (COUNT, 1.0), "pod": (COUNT, 1.0),
+    "leaf": (COUNT, 1.0), "stick": (COUNT, 1.0), "fillet": (COUNT, 1.0),
+    "medium": (COUNT, 1.0), "small": (COUNT, 0.7), "large": (COUNT, 1.3),
+    # loose measures with a fixed weight
+    "pinch": (MASS, 0.4), "dash": (MASS, 0.6), "sprig": (MASS, 1.0), "stalk": (MASS, 40.0),
+    "handful": (MASS, 30.0), "bunch": (MASS, 100.0), "can": (MASS, 400.0), "tin": (MASS, 400.0),
+    "packet": (MASS, 200.0), "inch": (MASS, 5.0),
+}
+_UNIT_PLURALS = {"leaves": "leaf", "pinches": "pinch", "dashes": "dash", "bunches": "bunch", "inches": "inch"}
+
+_ZERO = ("to taste", "as needed", "as required", "as per taste", "for garnish", "optional")
+_WORD_NUMBERS = {"a": 1.0, "an": 1.0, "one": 1.0, "two": 2.0, "three": 3.0, "four": 4.0, "half": 0.5, "quarter": 0.25}
+_FRACTIONS = {"½": " 1/2", "⅓": " 1/3", "⅔": " 2/3", "¼": " 1/4", "¾": " 3/4", "⅛": " 1/8"}
+
+# "1,000" / "12,500.5" (thousands separators), "1.5" / "1,5" (decimal point or comma), ".5"
+_THOUSANDS = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+_DECIMAL = rf"(?:{_THOUSANDS.pattern}(?![\d,])|\d+(?:[.,]\d+)?|\.\d+)"
+_NUMBER = rf"(?:\d+/\d+|{_DECIMAL}(?:\s+\d+/\d+)?)"
+_AMOUNT = re.compile(rf"^\s*({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*")
+_PARENTHESIZED_MASS = re.compile(rf"\(\s*({_NUMBER})\s*(g|kg|oz|lb|ml|l)\b[^)]*\)")
+
+
+@dataclass(frozen=True)
+class Quantity:
+    amount: float
+    kind: int = COUNT  # MASS, VOLUME or COUNT; a bare or unknown unit ("2", "3 nos") counts pieces
+    factor: float = 1.0  # grams, millilitres or pieces per unit
+
+
+def _number(text: str) -> float:
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        elif _THOUSANDS.fullmatch(part):
+            total += float(part.replace(",", ""))
+        else:
+            total += float(part.replace(",", "."))
+    return total
+
+
+def _mentions_unit(text: str) -> bool:
+    """Whether the words before the first comma or parenthesis include a unit ("heaped tbsp")."""
+    head = re.split(r"[,(]", text.lstrip(" ,.;:"), maxsplit=1)[0]
+    return any(_unit(word) for word in re.findall(r"[a-z]+", head))
+
+
+def _unit(text: str):
+    text = text.strip().rstrip(".")
+    if text.startswith("fl oz") or text.startswith("fl. oz"):
+        return _UNITS["fl oz"]
+    word = re.split(r"[\s,(]", text, maxsplit=1)[0].rstrip(".")
+    word = _UNIT_PLURALS.get(word, word)
+    if word not in _UNITS and word.endswith("s"):
+        word = word[:-1]
+    return _UNITS.get(word)
+
+
+@lru_cache(maxsize=16384)
+def parse_quantity(text: Optional[str]) -> Optional[Quantity]:
+    """
+    "1 1/2 cups" -> 1.5 x 240 ml; "2-3 cloves" -> 2.5 pieces; "1 (400 g) can" -> 400 g;
+    "to taste" -> nothing. None when there is no usable amount.
+    """
+    text = (text or "").lower()
+    for symbol, replacement in _FRACTIONS.items():
+        text = text.replace(symbol, replacement)
+    text = text.strip()
+    if not text:
+        return None
+    if any(phrase in text for phrase in _ZERO):
+        return Quantity(0.0, MASS)
+
+    match = _AMOUNT.match(text)
+    if match:
+        amount = _number(match.group(1))
+        if match.group(2):
+            amount = (amount + _number(match.group(2))) / 2
+        rest = text[match.end():]
+    else:
+        first, _, rest = text.partition(" ")
+        if first not in _WORD_NUMBERS:
+            unit = _unit(text)
+            return Quantity(1.0, *unit) if unit else None  # "pinch", "handful"
+        amount = _WORD_NUMBERS[first]
+
+    parenthesized = _PARENTHESIZED_MASS.search(rest)
+    if parenthesized:
+        kind, factor = _UNITS[parenthesized.group(2)]
+        return Quantity(amount * _number(parenthesized.group(1)), kind, factor)
+    unit = _unit(rest) if rest else None
+    if unit:
+        return Quantity(amount, *unit)
+    # A unit further on means the amount wasn't understood; counting pieces would be off by orders of magnitude
+    return None if _mentions_unit(rest) else Quantity(amount)
+
+
+class NutrientTable:
+    def __init__(self, path: str = NUTRIENTS_PATH):
+        with open(path, encoding="utf-8") as fh:
+            rows = list(csv.DictReader(line for line in fh if not line.startswith("#")))
+        self.index: Dict[str, int] = {row["name"]: i for i, row in enumerate(rows)}
+        columns = ("kcal", "protein_g", "carbs_g", "fat_g", "fiber_g")
+        self.per_100g = np.array([[float(row[c]) for c in columns] for row in rows], dtype=np.float64)
+        self.g_per_ml = np.array([float(row["g_per_ml"] or "nan") for row in rows], dtype=np.float64)
+        self.g_per_piece = np.array([float(row["g_per_piece"] or "nan") for row in rows], dtype=np.float64)
+
+    def row(self, name: str) -> Optional[int]:
+        return self.index.get(canonicalize(name))
+
+
+@lru_cache(maxsize=1)
+def get_table() -> NutrientTable:
+    return NutrientTable()
+
+
+def compute_nutrition(recipes: Sequence[dict]) -> List[Optional[dict]]:
+    """
+    Per-serving `nutritional_info` for each recipe (same order), or None when no
+    ingredient line could be resolved. Recipes need `ingredients` and `servings`.
+    """
+    table = get_table()
+    owners, rows, amounts, kinds, factors = [], [], [], [], []
+    lines = np.zeros(len(recipes))
+    for r, recipe in enumerate(recipes):
+        for ingredient in recipe.get("ingredients") or []:
+            lines[r] += 1
+            row = table.row(ingredient.get("name") or "")
+            quantity = parse_quantity(ingredient.get("quantity"))
+            if row is None or quantity is None:
+                continue
+            owners.append(r)
+            rows.append(row)
+            amounts.append(quantity.amount)
+            kinds.append(quantity.kind)
+            factors.append(quantity.factor)
+
+    rows_a = np.asarray(rows, dtype=np.int64)
+    kinds_a = np.asarray(kinds, dtype=np.int8)
+    base = np.asarray(amounts, dtype=np.float64) * np.asarray(factors, dtype=np.float64)
+    grams = np.select(
+        [kinds_a == MASS, kinds_a == VOLUME, kinds_a == COUNT],
+        [base, base * table.g_per_ml[rows_a], base * table.g_per_piece[rows_a]],
+        default=np.nan,
+    )
+    resolved = ~np.isnan(grams)
+    owners_a = np.asarray(owners, dtype=np.int64)[resolved]
+
+    totals = np.zeros((len(recipes), len(NUTRIENTS)))
+    np.add.at(totals, owners_a, table.per_100g[rows_a[resolved]] * (grams[resolved] / 100.0)[:, None])
+    counted = np.bincount(owners_a, minlength=len(recipes))
+    servings = np.array([max(int(recipe.get("servings") or 1), 1) for recipe in recipes], dtype=np.float64)
+    per_serving = totals / servings[:, None]
+
+    results: List[Optional[dict]] = []
+    for r in range(len(recipes)):
+        if not counted[r]:
+            results.append(None)
+            continue
+        info = {key: round(float(value), 1) for key, value in zip(NUTRIENTS, per_serving[r])}
+        info["calories"] = int(math.floor(info["calories"] + 0.5))
+        info["per"] = "serving"
+        info["coverage"] = round(float(counted[r] / lines[r]), 2)
+        results.append(info)
+    return results
@@ -1,14 +1,32 @@
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from app.utils.logger import get_logger
+from app.utils.metrics import LLM_REQUEST_DURATION, LLM_TOKENS
 
 load_dotenv()
+logger = get_logger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "mistralai/mistral-7b-instruct:free")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
 
-client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key=OPENAI_API_KEY,
-)
+
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    The OpenAI client, created on first use: importing `openai` takes about 0.4 s,
+    a third of the app's import time, and most workers start before any LLM call.
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+      base_url=OPENAI_BASE_URL,
+      api_key=OPENAI_API_KEY,
+      timeout=LLM_TIMEOUT_SECONDS,
+    )
 
 # System prompt (cached by openAI) - Define once globally
 RECIPE_GENERATION_SYSTEM_PROMPT = """
@@ -23,6 +41,7 @@ Generate 2 distinct recipe suggestions that prominently feature the detected ing
 - You may add up to 3 common pantry staples (e.g., oil, salt, pepper, water, common spices like turmeric or chili powder) if they are essential for the recipe. List them in the ingredients.
 - Prioritize using the detected ingredients.
 - The instructions should be a clear, numbered list of steps.
+- Give every ingredient a measurable quantity (e.g. "2 cups", "200 g", "3 cloves", "to taste").
 
 ### OUTPUT FORMAT
 Your entire response MUST be a single, valid JSON object. Do not include any text or explanations outside of the JSON. The structure must follow this exact schema:
@@ -42,25 +61,43 @@ Your entire response MUST be a single, valid JSON object. Do not include any tex
       "cook_time_minutes": 0,
       "servings": 0,
       "difficulty": "Easy/Medium/Hard",
-      "tags": ["tag1", "tag2"],
-      "nutritional_info": {}
+      "tags": ["tag1", "tag2"]
     }
   ]
 }
 """
 
 
+@dataclass
+class LLMResult:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
 def openAI_call(prompt: str) -> str:
     """
     Makes an API call to the specified model on OpenRouter with a custom prompt.
     """
+    return openAI_completion(prompt).content
+
+
+def openAI_completion(prompt: str) -> LLMResult:
+    """
+    Same call as `openAI_call`, also returning token usage (used for budgeting).
+    """
+    start = time.perf_counter()
     try:
-        completion = client.chat.completions.create(
+        completion = get_client().chat.completions.create(
             extra_headers={
                 "HTTP-Referer": "<YOUR_SITE_URL>", # Optional. Site URL for rankings on openrouter.ai.
                 "X-Title": "<YOUR_SITE_NAME>", # Optional. Site title for rankings on openrouter.ai.
             },
-            model="mistralai/mistral-7b-instruct:free",
+            model=LLM_MODEL,
             max_tokens=4096,
             # system=[
             #     {
@@ -84,6 +121,16 @@ def openAI_call(prompt: str) -> str:
             }
         )
         
-        return completion.choices[0].message.content
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - start, model=LLM_MODEL, outcome="success")
+        result = LLMResult(content=completion.choices[0].message.content)
+        usage = getattr(completion, "usage", None)
+        if usage is not None:
+            result.prompt_tokens = usage.prompt_tokens or 0
+            result.completion_tokens = usage.completion_tokens or 0
+            LLM_TOKENS.inc(result.prompt_tokens, model=LLM_MODEL, kind="prompt")
+            LLM_TOKENS.inc(result.completion_tokens, model=LLM_MODEL, kind="completion")
+        return result
     except Exception as e:
-        return f"An error occurred during the API call: {e}"
\ No newline at end of file
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - start, model=LLM_MODEL, outcome="error")
+        logger.error("LLM call failed", extra={"model": LLM_MODEL, "error": str(e)})
+        return LLMResult(content=f"An error occurred during the API call: {e}")
\ No newline at end of file
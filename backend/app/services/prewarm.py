@@ -0,0 +1,209 @@
+"""
+Off-peak pre-warming of the recipe cache.
+
+During configured windows the pre-warmer mines recent generation history for
+the most requested (region, ingredient set, diet) combinations and generates
+the ones that are not cached yet, until the window's token budget is spent.
+A Mongo lease makes sure only one worker pre-warms at a time. The lease
+document also carries the window's spent tokens, so a worker taking over the
+lease continues the same budget instead of starting a new one.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.database.connection import MongoDB
+from app.services.recipe_cache import GenerationKey, recipe_cache
+from app.services.recipe_generation import GENERATIONS_COLLECTION, generate_suggestions
+from app.utils.logger import get_logger
+from app.utils.metrics import PREWARM_GENERATIONS
+
+load_dotenv()
+logger = get_logger(__name__)
+
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+PREWARM_WINDOWS = os.getenv("PREWARM_WINDOWS", "02:00-05:00,15:00-17:00")
+PREWARM_TIMEZONE = os.getenv("PREWARM_TIMEZONE", "UTC")
+PREWARM_TOP_K = int(os.getenv("PREWARM_TOP_K", 50))
+PREWARM_LOOKBACK_DAYS = int(os.getenv("PREWARM_LOOKBACK_DAYS", 7))
+PREWARM_MIN_REQUESTS = int(os.getenv("PREWARM_MIN_REQUESTS", 3))
+PREWARM_TOKEN_BUDGET = int(os.getenv("PREWARM_TOKEN_BUDGET", 200_000))  # per window
+PREWARM_CHECK_SECONDS = float(os.getenv("PREWARM_CHECK_SECONDS", 300))
+PREWARM_PAUSE_SECONDS = float(os.getenv("PREWARM_PAUSE_SECONDS", 2))  # between LLM calls
+
+LEASE_COLLECTION = "scheduler_leases"
+LEASE_ID = "recipe_prewarm"
+
+
+def parse_windows(spec: str) -> List[Tuple[dtime, dtime]]:
+    """Parses 'HH:MM-HH:MM,...'. A window may wrap midnight (e.g. 23:00-02:00)."""
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        windows.append((dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip())))
+    return windows
+
+
+def current_window(now: datetime, windows: List[Tuple[dtime, dtime]]) -> Optional[datetime]:
+    """Returns the start datetime of the window containing `now`, or None outside all windows."""
+    clock = now.time()
+    for start, end in windows:
+        if start <= end:
+            if start <= clock < end:
+                return now.replace(hour=start.hour, minute=start.minute, second=0, microsecond=0)
+        elif clock >= start or clock < end:
+            started = now.replace(hour=start.hour, minute=start.minute, second=0, microsecond=0)
+            return started if clock >= start else started - timedelta(days=1)
+    return None
+
+
+def top_combinations_pipeline(limit: int, since: datetime, min_requests: int) -> List[dict]:
+    return [
+        {"$match": {"createdAt": {"$gte": since}}},
+        {"$group": {
+            "_id": {"region": "$region", "ingredients": "$ingredients", "diet": "$diet"},
+            "requests": {"$sum": 1},
+        }},
+        {"$match": {"requests": {"$gte": min_requests}}},
+        {"$sort": {"requests": -1}},
+        {"$limit": limit},
+    ]
+
+
+async def top_combinations(limit: int, lookback_days: int, min_requests: int) -> List[dict]:
+    """Most requested generation keys in the lookback period, most popular first."""
+    since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+    pipeline = top_combinations_pipeline(limit, since, min_requests)
+    cursor = MongoDB.get_db()[GENERATIONS_COLLECTION].aggregate(pipeline)
+    return await cursor.to_list(length=limit)
+
+
+class CachePrewarmer:
+    def __init__(self):
+        self.windows = parse_windows(PREWARM_WINDOWS)
+        self.tz = ZoneInfo(PREWARM_TIMEZONE)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _lease_until() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=PREWARM_CHECK_SECONDS * 2)
+
+    async def _acquire_lease(self, window: str) -> Optional[int]:
+        """
+        Takes or renews the pre-warm lease and returns the tokens already spent in
+        `window` (reset when a new window starts); None if another worker holds it.
+        """
+        collection = MongoDB.get_db()[LEASE_COLLECTION]
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await collection.find_one_and_update(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expiresAt": self._lease_until()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None
+        if lease.get("window") != window:
+            await collection.update_one(
+                {"_id": LEASE_ID, "owner": self.owner},
+                {"$set": {"window": window, "tokensSpent": 0}},
+            )
+            return 0
+        return lease.get("tokensSpent", 0)
+
+    async def _renew_lease(self) -> Optional[int]:
+        """Extends a held lease; returns the window's spent tokens, or None if the lease was lost."""
+        lease = await MongoDB.get_db()[LEASE_COLLECTION].find_one_and_update(
+            {"_id": LEASE_ID, "owner": self.owner},
+            {"$set": {"expiresAt": self._lease_until()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        return None if lease is None else lease.get("tokensSpent", 0)
+
+    async def _record_spend(self, window: str, tokens: int) -> None:
+        """Adds `tokens` to the window's shared spend, whether or not this worker still holds the lease."""
+        await MongoDB.get_db()[LEASE_COLLECTION].update_one(
+            {"_id": LEASE_ID, "window": window}, {"$inc": {"tokensSpent": tokens}},
+        )
+
+    async def run_once(self) -> int:
+        """One pass inside a window. Returns the number of combinations generated."""
+        window_start = current_window(datetime.now(self.tz), self.windows)
+        if window_start is None:
+            return 0
+        window = window_start.isoformat()
+        # Held (and renewed) even once the budget is spent, so no other worker starts over
+        tokens_spent = await self._acquire_lease(window)
+        if tokens_spent is None or tokens_spent >= PREWARM_TOKEN_BUDGET:
+            return 0
+
+        generated = 0
+        for combo in await top_combinations(PREWARM_TOP_K, PREWARM_LOOKBACK_DAYS, PREWARM_MIN_REQUESTS):
+            if tokens_spent >= PREWARM_TOKEN_BUDGET or current_window(datetime.now(self.tz), self.windows) is None:
+                break
+            fields = combo["_id"]
+            key = GenerationKey(region=fields["region"], ingredients=tuple(fields["ingredients"]), diet=fields["diet"])
+            if await recipe_cache.contains(key):
+                continue
+            # A long pass must keep the lease, or a second worker starts on the same combinations
+            tokens_spent = await self._renew_lease()
+            if tokens_spent is None:
+                break
+            try:
+                result = await generate_suggestions(
+                    ingredient_names=list(key.ingredients),
+                    region=key.region,
+                    dietary_pref=None if key.diet == "none" else key.diet,
+                    source="prewarm",
+                    use_cache=False,
+                )
+            except Exception as e:
+                PREWARM_GENERATIONS.inc(outcome="error")
+                logger.warning("Pre-warm generation failed", extra={"key": key.digest, "error": str(e)})
+                continue
+            await self._record_spend(window, result.tokens)
+            tokens_spent += result.tokens
+            generated += 1
+            PREWARM_GENERATIONS.inc(outcome="success")
+            await asyncio.sleep(PREWARM_PAUSE_SECONDS)
+
+        if generated:
+            logger.info("Recipe cache pre-warmed", extra={"generated": generated, "tokens_spent": tokens_spent})
+        return generated
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Pre-warm pass failed", extra={"error": str(e)})
+            await asyncio.sleep(PREWARM_CHECK_SECONDS)
+
+    async def start(self) -> None:
+        if PREWARM_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+cache_prewarmer = CachePrewarmer()
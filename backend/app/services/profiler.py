@@ -0,0 +1,212 @@
+"""
+On-demand statistical profiler for a live worker.
+
+Nothing here runs until a session is started, so there is no cost when it is off.
+A session starts two things for N seconds:
+- a sampler thread that snapshots the event-loop thread's stack via
+  `sys._current_frames()` every `interval` and aggregates collapsed stacks
+  (the `a;b;c count` format flamegraph.pl / speedscope read);
+- a heartbeat task on the loop. When the heartbeat is late by more than
+  `block_threshold`, the loop is blocked (sync LLM call, bcrypt, ...) and the
+  stacks seen during the stall are reported as a block.
+"""
+import asyncio
+import os
+import signal
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", 30))
+MAX_PROFILE_SECONDS = 300
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+_SITE = sysconfig.get_paths()["purelib"]
+
+# Only one session per worker at a time
+_session_lock = threading.Lock()
+
+# Signal-triggered sessions; the loop only keeps weak references to tasks
+_signal_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class LoopBlock:
+    started_at: str
+    duration_ms: float
+    stack: str
+
+
+@dataclass
+class ProfileResult:
+    seconds: float
+    interval_ms: float
+    samples: int
+    stacks: Counter = field(default_factory=Counter)
+    blocks: List[LoopBlock] = field(default_factory=list)
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text, one `frame;frame;frame count` line per unique stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_dict(self) -> Dict:
+        return {
+            "seconds": self.seconds,
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "blocks": [block.__dict__ for block in self.blocks],
+            "collapsed": self.collapsed(),
+        }
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    for prefix in (_SITE, _STDLIB, os.getcwd()):
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class LoopProfiler:
+    """One profiling session against the event loop running on `loop_thread_id`."""
+
+    def __init__(self, loop_thread_id: int, interval: float = 0.005, block_threshold: float = 0.1):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._last_beat = time.perf_counter()
+
+    async def _heartbeat(self, stop: threading.Event) -> None:
+        beat = min(self.block_threshold / 4, 0.01)
+        while not stop.is_set():
+            self._last_beat = time.perf_counter()
+            await asyncio.sleep(beat)
+
+    def _sample(self, seconds: float, stop: threading.Event) -> ProfileResult:
+        result = ProfileResult(seconds=seconds, interval_ms=self.interval * 1000, samples=0)
+        block_start: Optional[float] = None
+        block_stacks: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    stack = _collapse(frame)
+                    result.stacks[stack] += 1
+                    result.samples += 1
+                    del frame
+
+                    stalled = now - self._last_beat
+                    if stalled > self.block_threshold:
+                        if block_start is None:
+                            block_start = self._last_beat
+                        block_stacks[stack] += 1
+                    elif block_start is not None:
+                        result.blocks.append(self._close_block(block_start, self._last_beat, block_stacks))
+                        block_start, block_stacks = None, Counter()
+                time.sleep(self.interval)
+            if block_start is not None:
+                result.blocks.append(self._close_block(block_start, time.perf_counter(), block_stacks))
+        finally:
+            stop.set()
+        return result
+
+    def _close_block(self, start: float, end: float, stacks: Counter) -> LoopBlock:
+        wall_start = datetime.now(timezone.utc).timestamp() - (time.perf_counter() - start)
+        block = LoopBlock(
+            started_at=datetime.fromtimestamp(wall_start, timezone.utc).isoformat(),
+            duration_ms=round((end - start) * 1000, 2),
+            stack=stacks.most_common(1)[0][0] if stacks else "",
+        )
+        logger.warning("Event loop blocked", extra={"duration_ms": block.duration_ms, "stack": block.stack})
+        return block
+
+    async def run(self, seconds: float) -> ProfileResult:
+        stop = threading.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(stop))
+        try:
+            return await asyncio.to_thread(self._sample, seconds, stop)
+        finally:
+            stop.set()
+            await heartbeat
+
+
+async def profile_loop(seconds: float, interval: float = 0.005, block_threshold: float = 0.1) -> ProfileResult:
+    """
+    Profiles the running event loop for `seconds`. Must be awaited on that loop.
+    Raises ProfilerBusy if a session is already active in this worker.
+    """
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profiling session is already running in this worker.")
+    try:
+        profiler = LoopProfiler(threading.get_ident(), interval=interval, block_threshold=block_threshold)
+        return await profiler.run(min(seconds, MAX_PROFILE_SECONDS))
+    finally:
+        _session_lock.release()
+
+
+async def _profile_to_file(seconds: float) -> None:
+    try:
+        result = await profile_loop(seconds)
+    except ProfilerBusy:
+        logger.warning("Profile signal ignored: session already running.")
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(PROFILE_DIR, f"profile-{os.getpid()}-{stamp}.collapsed")
+    with open(path, "w") as fh:
+        fh.write(result.collapsed())
+    logger.info("Profile written", extra={"path": path, "samples": result.samples, "blocks": len(result.blocks)})
+
+
+def _signal_task_done(task: asyncio.Task) -> None:
+    _signal_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Signal-triggered profile failed", exc_info=task.exception())
+
+
+def _start_signal_profile(loop: asyncio.AbstractEventLoop) -> None:
+    task = loop.create_task(_profile_to_file(PROFILE_SIGNAL_SECONDS))
+    _signal_tasks.add(task)
+    task.add_done_callback(_signal_task_done)
+
+
+def install_signal_handler(loop: asyncio.AbstractEventLoop) -> bool:
+    """
+    `kill -USR2 <pid>` profiles that worker for PROFILE_SIGNAL_SECONDS and writes a
+    collapsed-stack file to PROFILE_DIR. No-op on platforms without SIGUSR2.
+    """
+    if not hasattr(signal, "SIGUSR2"):
+        return False
+    try:
+        loop.add_signal_handler(signal.SIGUSR2, _start_signal_profile, loop)
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
@@ -0,0 +1,262 @@
+"""
+Token-bucket rate limiting for LLM-backed endpoints.
+
+Decisions are always made against in-process buckets, so a check is O(1); the
+database is only read to seed a bucket (below). The Mongo backend shares budgets across workers by
+syncing each bucket's consumption in the background (write-behind): every
+`sync_interval` it applies the locally consumed tokens to a shared bucket
+document and adopts the shared balance. A bucket a worker has not seen yet is
+seeded from the shared document before its first decision, so a fresh worker
+starts from the shared balance rather than a full bucket.
+
+Between syncs each worker spends from the balance it last adopted without
+seeing the others, so with N workers one interval can admit up to N times the
+shared balance (N x capacity when the bucket is full). The overdraw is recorded
+as a negative shared balance (down to -capacity) and paid back by refill.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+from app.database.connection import MongoDB
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "mongo"
+RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", 5))
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", 5))
+RATE_LIMIT_GLOBAL_CAPACITY = float(os.getenv("RATE_LIMIT_GLOBAL_CAPACITY", 60))
+RATE_LIMIT_GLOBAL_PER_MINUTE = float(os.getenv("RATE_LIMIT_GLOBAL_PER_MINUTE", 60))
+RATE_LIMIT_SYNC_SECONDS = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", 1))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "pending")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.pending = 0.0  # consumed locally, not yet synced
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-key token buckets held in an LRU-bounded dict.
+    Evicting an idle bucket is harmless: it would have refilled to capacity anyway.
+    """
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def _bucket(self, key: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.capacity, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            elapsed = now - bucket.updated
+            if elapsed > 0:
+                bucket.tokens = min(self.capacity, bucket.tokens + elapsed * self.refill_per_second)
+                bucket.updated = now
+        return bucket
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Takes `cost` tokens. Returns 0.0 on success, otherwise seconds until enough tokens refill."""
+        bucket = self._bucket(key, time.monotonic())
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            bucket.pending += cost
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return (cost - bucket.tokens) / self.refill_per_second
+
+    def refund(self, key: str, cost: float = 1.0) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(self.capacity, bucket.tokens + cost)
+            bucket.pending -= cost
+
+    async def prepare(self, key: str) -> None:
+        """Makes sure `key` has a bucket before `acquire`; in-process buckets start full."""
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class MongoRateLimitBackend(InMemoryRateLimitBackend):
+    """In-memory buckets whose consumption is reconciled through `rate_limits` documents."""
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float,
+                 sync_interval: float = RATE_LIMIT_SYNC_SECONDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        super().__init__(name, capacity, refill_per_second, max_keys)
+        self.sync_interval = sync_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _update_pipeline(self, consumed: float) -> list:
+        elapsed_seconds = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updatedAt", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [
+            self.capacity,
+            {"$add": [{"$ifNull": ["$tokens", self.capacity]}, {"$multiply": [self.refill_per_second, elapsed_seconds]}]},
+        ]}
+        # Idle documents expire once they would have refilled completely
+        ttl_ms = int(1000 * (self.capacity / self.refill_per_second if self.refill_per_second > 0 else 86_400)) + 60_000
+        return [{"$set": {
+            "tokens": {"$max": [-self.capacity, {"$subtract": [refilled, consumed]}]},
+            "updatedAt": "$$NOW",
+            "expiresAt": {"$add": ["$$NOW", ttl_ms]},
+        }}]
+
+    async def prepare(self, key: str) -> None:
+        """Seeds an unseen bucket from the shared document, refilled up to now."""
+        if key in self._buckets:
+            return
+        tokens = self.capacity
+        try:
+            doc = await MongoDB.get_db()[RATE_LIMIT_COLLECTION].find_one(
+                {"_id": f"{self.name}:{key}"}, {"tokens": 1, "updatedAt": 1},
+            )
+        except Exception as e:
+            logger.warning("Rate limit seed failed", extra={"limiter": self.name, "error": str(e)})
+            doc = None
+        if doc is not None and "tokens" in doc:
+            tokens = doc["tokens"]
+            updated = doc.get("updatedAt")
+            if updated is not None:
+                if updated.tzinfo is None:
+                    updated = updated.replace(tzinfo=timezone.utc)
+                elapsed = max(0.0, (datetime.now(timezone.utc) - updated).total_seconds())
+                tokens = min(self.capacity, tokens + elapsed * self.refill_per_second)
+        if key not in self._buckets:  # a concurrent request may have seeded it meanwhile
+            self._buckets[key] = _Bucket(tokens, time.monotonic())
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+    async def sync(self) -> None:
+        """
+        Applies each bucket's pending consumption to its shared document. `pending` is
+        only reduced once a write is confirmed, so a failed write is retried next sync.
+        """
+        collection = MongoDB.get_relaxed_write_collection(RATE_LIMIT_COLLECTION)
+        dirty = [(key, bucket, bucket.pending) for key, bucket in list(self._buckets.items()) if bucket.pending]
+        failed, last_error = 0, None
+        for key, bucket, consumed in dirty:
+            try:
+                doc = await collection.find_one_and_update(
+                    {"_id": f"{self.name}:{key}"},
+                    self._update_pipeline(consumed),
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except Exception as e:
+                failed += 1
+                last_error = e
+                continue
+            # Anything consumed locally while the round-trip was in flight stays pending
+            bucket.pending -= consumed
+            if doc is not None and self._buckets.get(key) is bucket:
+                bucket.tokens = doc["tokens"] - bucket.pending
+                bucket.updated = time.monotonic()
+        if failed:
+            logger.warning("Rate limit sync failed", extra={
+                "limiter": self.name, "keys": failed, "of": len(dirty), "error": str(last_error),
+            })
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Rate limit sync failed", extra={"limiter": self.name, "error": str(e)})
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.warning("Final rate limit sync failed", extra={"limiter": self.name, "error": str(e)})
+
+
+def _create_backend(name: str, capacity: float, per_minute: float) -> InMemoryRateLimitBackend:
+    if RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend(name, capacity, per_minute / 60.0)
+    return InMemoryRateLimitBackend(name, capacity, per_minute / 60.0)
+
+
+class RateLimiter:
+    """Checks a per-user bucket and then a global bucket; refunds the user if the global one is empty."""
+
+    def __init__(self, name: str, user_backend: InMemoryRateLimitBackend, global_backend: InMemoryRateLimitBackend):
+        self.name = name
+        self.user_backend = user_backend
+        self.global_backend = global_backend
+
+    async def prepare(self, user_id: str) -> None:
+        """Seeds the buckets `acquire` is about to use (a no-op once they exist)."""
+        await self.user_backend.prepare(user_id)
+        await self.global_backend.prepare("global")
+
+    def acquire(self, user_id: str, cost: float = 1.0) -> tuple[str, float]:
+        """Returns ("", 0.0) when allowed, otherwise (scope, retry_after_seconds)."""
+        retry_after = self.user_backend.acquire(user_id, cost)
+        if retry_after:
+            return "user", retry_after
+        retry_after = self.global_backend.acquire("global", cost)
+        if retry_after:
+            self.user_backend.refund(user_id, cost)
+            return "global", retry_after
+        return "", 0.0
+
+    def refund(self, user_id: str, cost: float = 1.0) -> None:
+        """Gives back a granted `acquire` whose call turned out not to reach the model."""
+        self.user_backend.refund(user_id, cost)
+        self.global_backend.refund("global", cost)
+
+    async def start(self) -> None:
+        await self.user_backend.start()
+        await self.global_backend.start()
+
+    async def stop(self) -> None:
+        await self.user_backend.stop()
+        await self.global_backend.stop()
+
+
+llm_rate_limiter = RateLimiter(
+    "llm",
+    _create_backend("llm:user", RATE_LIMIT_USER_CAPACITY, RATE_LIMIT_USER_PER_MINUTE),
+    _create_backend("llm:global", RATE_LIMIT_GLOBAL_CAPACITY, RATE_LIMIT_GLOBAL_PER_MINUTE),
+)
@@ -0,0 +1,123 @@
+"""
+Cache of LLM recipe suggestions keyed by (region, ingredient set, diet).
+
+Two tiers: a per-worker LRU in memory, backed by the `recipe_cache` collection
+so entries written by one worker (or by the pre-warmer) are visible to all.
+Mongo documents expire through a TTL index on `expiresAt`.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.database.connection import MongoDB
+from app.services.ingredients import ingredient_keys
+from app.utils.logger import get_logger
+from app.utils.metrics import record_cache_lookup
+
+load_dotenv()
+logger = get_logger(__name__)
+
+RECIPE_CACHE_ENABLED = os.getenv("RECIPE_CACHE_ENABLED", "true").lower() == "true"
+RECIPE_CACHE_TTL_HOURS = float(os.getenv("RECIPE_CACHE_TTL_HOURS", 72))
+RECIPE_CACHE_MEMORY_ENTRIES = int(os.getenv("RECIPE_CACHE_MEMORY_ENTRIES", 2048))
+
+RECIPE_CACHE_COLLECTION = "recipe_cache"
+
+
+@dataclass(frozen=True)
+class GenerationKey:
+    """Normalized inputs of one generation; equal keys must produce interchangeable recipes.
+    Ingredients are canonical names, so "Tomatoes" and "roma tomato" share an entry."""
+    region: str
+    ingredients: tuple
+    diet: str
+
+    @classmethod
+    def build(cls, ingredient_names: Iterable[str], region: Optional[str], diet: Optional[str]) -> "GenerationKey":
+        return cls(
+            region=(region or "").strip().lower(),
+            ingredients=tuple(ingredient_keys(ingredient_names)),
+            diet=(diet or "none").strip().lower() or "none",
+        )
+
+    @property
+    def digest(self) -> str:
+        raw = f"{self.region}|{','.join(self.ingredients)}|{self.diet}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class RecipeCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, list]]" = OrderedDict()
+
+    def _collection(self):
+        return MongoDB.get_relaxed_write_collection(RECIPE_CACHE_COLLECTION)
+
+    def _remember(self, digest: str, suggestions: list) -> None:
+        self._entries[digest] = (time.monotonic() + self.ttl_seconds, suggestions)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: GenerationKey) -> Optional[List[dict]]:
+        if not RECIPE_CACHE_ENABLED:
+            return None
+        digest = key.digest
+        entry = self._entries.get(digest)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(digest)
+                record_cache_lookup("recipe_llm", True)
+                return entry[1]
+            del self._entries[digest]
+
+        doc = None
+        try:
+            doc = await self._collection().find_one({"_id": digest}, {"suggestions": 1})
+        except Exception as e:
+            logger.warning("Recipe cache lookup failed", extra={"error": str(e)})
+        record_cache_lookup("recipe_llm", doc is not None)
+        if doc is None:
+            return None
+        self._remember(digest, doc["suggestions"])
+        return doc["suggestions"]
+
+    async def contains(self, key: GenerationKey) -> bool:
+        """Existence check that does not count as a lookup (used by the pre-warmer)."""
+        if key.digest in self._entries:
+            return True
+        return await self._collection().count_documents({"_id": key.digest}, limit=1) > 0
+
+    async def put(self, key: GenerationKey, suggestions: List[dict], source: str = "request") -> None:
+        if not RECIPE_CACHE_ENABLED or not suggestions:
+            return
+        digest = key.digest
+        self._remember(digest, suggestions)
+        now = datetime.now(timezone.utc)
+        try:
+            await self._collection().replace_one(
+                {"_id": digest},
+                {
+                    "region": key.region,
+                    "ingredients": list(key.ingredients),
+                    "diet": key.diet,
+                    "suggestions": suggestions,
+                    "source": source,
+                    "createdAt": now,
+                    "expiresAt": now + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("Recipe cache write failed", extra={"error": str(e)})
+
+
+recipe_cache = RecipeCache(RECIPE_CACHE_TTL_HOURS * 3600, RECIPE_CACHE_MEMORY_ENTRIES)
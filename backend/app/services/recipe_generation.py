@@ -0,0 +1,109 @@
+"""
+Cache-aware recipe generation shared by the API routes and the pre-warmer.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import status
+from starlette.concurrency import run_in_threadpool
+
+from app.database.connection import MongoDB
+from app.services.llm_output import RecipeExtraction, extract_recipes
+from app.services.openAI import openAI_completion
+from app.services.recipe_cache import GenerationKey, recipe_cache
+from app.utils.exception import ApiError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Generation history, mined by the cache pre-warmer
+GENERATIONS_COLLECTION = "generations"
+
+
+@dataclass
+class GenerationResult:
+    suggestions: List[dict]
+    cache_hit: bool
+    tokens: int = 0
+
+
+def build_user_prompt(ingredients_str: str, region: str, dietary_pref: str) -> str:
+    return f"""
+    Region: {region}
+    Dietary Preferences: {dietary_pref}
+    Detected Ingredients: {ingredients_str}
+
+    Generate 2 recipes following the system instructions.
+    """
+
+
+def parse_suggestions(response: str) -> RecipeExtraction:
+    """
+    Extracts the recipes from the model output, repairing what it can (services.llm_output).
+    Raises ApiError only when not a single valid recipe could be recovered.
+    """
+    extraction = extract_recipes(response)
+    if not extraction.parsed:
+        logger.warning("Invalid JSON output from model", extra={"chars": len(response or ""), "head": (response or "")[:200]})
+        raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, "Failed to parse recipe generation response.from LLM")
+    if not extraction.recipes:
+        raise ApiError(status.HTTP_500_INTERNAL_SERVER_ERROR, "No recipes generated by LLM.")
+    return extraction
+
+
+async def generate_suggestions(
+    ingredient_names: List[str],
+    region: str,
+    dietary_pref: Optional[str],
+    source: str = "request",
+    use_cache: bool = True,
+) -> GenerationResult:
+    """
+    Returns recipe suggestions for the inputs, from the cache when possible.
+    The blocking LLM client runs in the threadpool so the event loop keeps serving.
+    """
+    key = GenerationKey.build(ingredient_names, region, dietary_pref)
+    if use_cache:
+        cached = await recipe_cache.get(key)
+        if cached is not None:
+            return GenerationResult(suggestions=cached, cache_hit=True)
+
+    # The prompt is built from the key, so every request sharing the cache entry asks the same thing
+    prompt = build_user_prompt(
+        ingredients_str=", ".join(key.ingredients),
+        region=region,
+        dietary_pref=dietary_pref or "None",
+    )
+    result = await run_in_threadpool(openAI_completion, prompt)
+    logger.debug("LLM response received", extra={"chars": len(result.content), "tokens": result.total_tokens})
+
+    extraction = parse_suggestions(result.content)
+    # Salvaged recipes are returned and stored, but a partial set isn't cached:
+    # the next identical request should get a complete one
+    if not extraction.dropped:
+        await recipe_cache.put(key, extraction.recipes, source=source)
+    return GenerationResult(suggestions=extraction.recipes, cache_hit=False, tokens=result.total_tokens)
+
+
+async def record_generation(
+    user_id: str,
+    ingredient_names: List[str],
+    region: str,
+    dietary_pref: Optional[str],
+    result: GenerationResult,
+) -> None:
+    """Appends one history entry with the normalized key fields; failures never fail the request."""
+    key = GenerationKey.build(ingredient_names, region, dietary_pref)
+    try:
+        await MongoDB.get_relaxed_write_collection(GENERATIONS_COLLECTION).insert_one({
+            "user": ObjectId(user_id),
+            "region": key.region,
+            "ingredients": list(key.ingredients),
+            "diet": key.diet,
+            "cache_hit": result.cache_hit,
+            "createdAt": datetime.now(timezone.utc),
+        })
+    except Exception as e:
+        logger.warning("Failed to record generation history", extra={"error": str(e)})
@@ -0,0 +1,315 @@
+"""
+Retention of generated recipes: cold ones move out of `recipes` into a compressed archive.
+
+Access tracking: recipe views are collected in memory and written as one
+`lastViewedAt` update_many per RETENTION_VIEW_FLUSH_SECONDS. A recipe whose
+view was written recently by this worker is skipped for
+RETENTION_VIEW_RESOLUTION_SECONDS (a day): coldness is measured in weeks,
+so finer timestamps would only cost writes. New recipes start with
+`lastViewedAt` = `createdAt`; older ones without it fall back to `createdAt`.
+
+Archiving: a recipe that is unrated, in no user's favorites and not viewed for
+RETENTION_COLD_DAYS is copied to `recipes_archive` as zlib-compressed BSON
+(with `owner` kept in the clear for listing) and then deleted from `recipes`.
+The delete re-checks the cold/unrated filter, so a recipe viewed or rated
+during the move stays hot and its archive copy is dropped. One worker
+archives at a time (lease in `scheduler_leases`, as for the pre-warmer), or
+run `python -m app.scripts.archive_recipes`.
+
+Lookups by id fall back to the archive and restore the recipe into `recipes`:
+being viewed, rated or favorited means it isn't cold any more.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+import bson
+from bson import Binary, ObjectId
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.database.connection import MongoDB
+from app.services.search_cache import search_cache
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+RETENTION_COLD_DAYS = float(os.getenv("RETENTION_COLD_DAYS", 90))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+RETENTION_MAX_BATCHES = int(os.getenv("RETENTION_MAX_BATCHES", 20))  # per scheduled pass
+RETENTION_CHECK_SECONDS = float(os.getenv("RETENTION_CHECK_SECONDS", 3600))
+RETENTION_PAUSE_SECONDS = float(os.getenv("RETENTION_PAUSE_SECONDS", 1))  # between batches
+RETENTION_COMPRESSION_LEVEL = int(os.getenv("RETENTION_COMPRESSION_LEVEL", 6))
+RETENTION_VIEW_FLUSH_SECONDS = float(os.getenv("RETENTION_VIEW_FLUSH_SECONDS", 60))
+RETENTION_VIEW_RESOLUTION_SECONDS = float(os.getenv("RETENTION_VIEW_RESOLUTION_SECONDS", 24 * 60 * 60))
+RETENTION_MAX_PENDING_VIEWS = int(os.getenv("RETENTION_MAX_PENDING_VIEWS", 50_000))
+
+RECIPES_COLLECTION = "recipes"
+ARCHIVE_COLLECTION = "recipes_archive"
+LEASE_COLLECTION = "scheduler_leases"
+LEASE_ID = "recipe_retention"
+ARCHIVE_FORMAT = "bson+zlib"
+_ID_CHUNK = 1000  # ids per $in
+
+
+def cold_filter(cutoff: datetime) -> dict:
+    """Recipes not viewed since `cutoff` and never rated (served by the lastViewedAt index)."""
+    return {
+        "$or": [
+            {"lastViewedAt": {"$lt": cutoff}},
+            {"lastViewedAt": None, "createdAt": {"$lt": cutoff}},
+        ],
+        "ratings.count": {"$not": {"$gt": 0}},
+    }
+
+
+def _chunks(ids: List[ObjectId], size: int = _ID_CHUNK):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+# --- Archive format ---
+def pack(doc: dict, now: datetime) -> dict:
+    return {
+        "_id": doc["_id"],
+        "owner": doc.get("owner"),
+        "archivedAt": now,
+        "format": ARCHIVE_FORMAT,
+        "data": Binary(zlib.compress(bson.encode(doc), RETENTION_COMPRESSION_LEVEL)),
+    }
+
+
+def unpack(archived: dict) -> dict:
+    return bson.decode(zlib.decompress(archived["data"]))
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    """Applies an exclusion projection such as RECIPE_PUBLIC_PROJECTION to an unpacked document."""
+    if not projection:
+        return doc
+    return {key: value for key, value in doc.items() if projection.get(key, 1)}
+
+
+# --- Lookups ---
+async def restore(recipe_id: ObjectId) -> Optional[dict]:
+    """Moves an archived recipe back into `recipes`. Returns it, or None if it isn't archived."""
+    db = MongoDB.get_db()
+    archived = await db[ARCHIVE_COLLECTION].find_one({"_id": recipe_id})
+    if archived is None:
+        return None
+    doc = unpack(archived)
+    doc["lastViewedAt"] = datetime.now(timezone.utc)
+    try:
+        await db[RECIPES_COLLECTION].insert_one(doc)
+    except DuplicateKeyError:
+        pass  # restored concurrently, or archiving is still deleting it; either way it's hot
+    await db[ARCHIVE_COLLECTION].delete_one({"_id": recipe_id})
+    await search_cache.invalidate([doc.get("region_key")])
+    logger.info("Archived recipe restored", extra={"recipe_id": str(recipe_id)})
+    return doc
+
+
+async def find_recipe(recipe_id: ObjectId, projection: Optional[dict] = None) -> Optional[dict]:
+    """`recipes` lookup by id that falls back to the archive (restoring the recipe)."""
+    recipe = await MongoDB.get_db()[RECIPES_COLLECTION].find_one({"_id": recipe_id}, projection)
+    if recipe is not None:
+        return recipe
+    restored = await restore(recipe_id)
+    return _project(restored, projection) if restored is not None else None
+
+
+async def list_owned(owner: ObjectId, skip: int, limit: int, projection: Optional[dict] = None) -> List[dict]:
+    """A user's recipes from both tiers, newest first, without restoring archived ones."""
+    db = MongoDB.get_db()
+    window = skip + limit
+    archived = await db[ARCHIVE_COLLECTION].find({"owner": owner}).sort("_id", -1).limit(window).to_list(length=window)
+    hot = db[RECIPES_COLLECTION].find({"owner": owner}, projection).sort("_id", -1)
+    if not archived:
+        return await hot.skip(skip).limit(limit).to_list(length=limit)
+    # Both tiers are sorted by _id, so the page lies within the first skip + limit of each
+    merged = await hot.limit(window).to_list(length=window) + [_project(unpack(doc), projection) for doc in archived]
+    merged.sort(key=lambda doc: doc["_id"], reverse=True)
+    return merged[skip:window]
+
+
+# --- Access tracking ---
+class ViewTracker:
+    def __init__(self, flush_seconds: float, resolution_seconds: float, max_pending: int):
+        self.flush_seconds = flush_seconds
+        self.resolution_seconds = resolution_seconds
+        self.max_pending = max_pending
+        self._pending: set = set()
+        self._written: "OrderedDict[ObjectId, float]" = OrderedDict()  # id -> monotonic time of its last write
+        self._flush_now = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, recipe_id: ObjectId) -> None:
+        written = self._written.get(recipe_id)
+        if written is not None and time.monotonic() - written < self.resolution_seconds:
+            return
+        self._pending.add(recipe_id)
+        if len(self._pending) >= self.max_pending:
+            self._flush_now.set()
+
+    async def flush(self) -> int:
+        ids, self._pending = list(self._pending), set()
+        if not ids:
+            return 0
+        now, stamp = datetime.now(timezone.utc), time.monotonic()
+        collection = MongoDB.get_relaxed_write_collection(RECIPES_COLLECTION)
+        for chunk in _chunks(ids):
+            await collection.update_many({"_id": {"$in": chunk}}, {"$set": {"lastViewedAt": now}})
+        for recipe_id in ids:
+            self._written[recipe_id] = stamp
+            self._written.move_to_end(recipe_id)
+        while len(self._written) > self.max_pending:
+            self._written.popitem(last=False)
+        return len(ids)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Recipe view flush failed", extra={"error": str(e)})
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Recipe view flush failed", extra={"error": str(e)})
+
+
+# --- Archiving ---
+async def _favorited(ids: Iterable[ObjectId]) -> set:
+    ids = list(ids)
+    favorited = set()
+    for chunk in _chunks(ids):
+        favorited.update(await MongoDB.get_db()["users"].distinct("favorites", {"favorites": {"$in": chunk}}))
+    return favorited
+
+
+async def archive_batch(cutoff: datetime, batch_size: int) -> int:
+    """Archives up to `batch_size` cold recipes. Returns how many left `recipes`."""
+    db = MongoDB.get_db()
+    recipes, archive = db[RECIPES_COLLECTION], db[ARCHIVE_COLLECTION]
+    candidates = await recipes.find(cold_filter(cutoff)).limit(batch_size).to_list(length=batch_size)
+    favorited = await _favorited(doc["_id"] for doc in candidates)
+    docs = [doc for doc in candidates if doc["_id"] not in favorited]
+    if not docs:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    try:
+        await archive.insert_many([pack(doc, now) for doc in docs], ordered=False)
+    except BulkWriteError as e:
+        # Copies left by an interrupted run are fine; anything else is not
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+    ids = [doc["_id"] for doc in docs]
+    deleted = 0
+    for chunk in _chunks(ids):
+        deleted += (await recipes.delete_many({"_id": {"$in": chunk}, **cold_filter(cutoff)})).deleted_count
+
+    # Viewed or rated during the move: still hot, so drop the copy
+    if deleted < len(ids):
+        still_hot = [doc["_id"] async for doc in recipes.find({"_id": {"$in": ids}}, {"_id": 1})]
+        await archive.delete_many({"_id": {"$in": still_hot}})
+    # Favorited during the move: bring back
+    for recipe_id in await _favorited(ids):
+        await restore(recipe_id)
+
+    await search_cache.invalidate({doc.get("region_key") for doc in docs})
+    return deleted
+
+
+async def archive_cold(cold_days: float, batch_size: int, max_batches: Optional[int] = None) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=cold_days)
+    archived, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        moved = await archive_batch(cutoff, batch_size)
+        batches += 1
+        archived += moved
+        if moved == 0:
+            break
+        await asyncio.sleep(RETENTION_PAUSE_SECONDS)
+    if archived:
+        logger.info("Cold recipes archived", extra={"archived": archived, "cold_days": cold_days})
+    return archived
+
+
+class RecipeArchiver:
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _acquire_lease(self, until: datetime) -> bool:
+        """Takes or renews the retention lease until `until`; False if another worker holds it."""
+        now = datetime.now(timezone.utc)
+        try:
+            await MongoDB.get_db()[LEASE_COLLECTION].update_one(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expiresAt": until}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def run_once(self) -> int:
+        if not await self._acquire_lease(datetime.now(timezone.utc) + timedelta(seconds=RETENTION_CHECK_SECONDS * 2)):
+            return 0
+        return await archive_cold(RETENTION_COLD_DAYS, RETENTION_BATCH_SIZE, RETENTION_MAX_BATCHES)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Recipe archiving pass failed", extra={"error": str(e)})
+            await asyncio.sleep(RETENTION_CHECK_SECONDS)
+
+    async def start(self) -> None:
+        if RETENTION_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+view_tracker = ViewTracker(
+    flush_seconds=RETENTION_VIEW_FLUSH_SECONDS,
+    resolution_seconds=RETENTION_VIEW_RESOLUTION_SECONDS,
+    max_pending=RETENTION_MAX_PENDING_VIEWS,
+)
+recipe_archiver = RecipeArchiver()
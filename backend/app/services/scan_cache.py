@@ -0,0 +1,176 @@
+"""
+Cache of scan results keyed by a perceptual image hash.
+
+Users re-photograph the same shelf several times in a row. A scan whose dHash is
+within SCAN_CACHE_MAX_DISTANCE bits of a recent scan by the same user for the same
+region reuses that scan's detected ingredients instead of running detection again.
+The reused ingredient list is identical, so the follow-up /recipes/generate call
+is served by the recipe LLM cache as well.
+
+Each (user, region) gets a small BK-tree over Hamming distance. Trees live in a
+per-worker LRU; a cold tree is loaded from recent `scans` documents, so restarts
+and other workers start warm.
+"""
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from app.database.connection import MongoDB
+from app.models.recipe_model import region_key
+from app.utils.bktree import BKTree, hamming
+from app.utils.logger import get_logger
+from app.utils.metrics import record_cache_lookup
+
+load_dotenv()
+logger = get_logger(__name__)
+
+SCAN_CACHE_ENABLED = os.getenv("SCAN_CACHE_ENABLED", "true").lower() == "true"
+SCAN_CACHE_MAX_DISTANCE = int(os.getenv("SCAN_CACHE_MAX_DISTANCE", 6))  # of 64 bits
+SCAN_CACHE_TTL_MINUTES = float(os.getenv("SCAN_CACHE_TTL_MINUTES", 30))
+SCAN_CACHE_MAX_PER_USER = int(os.getenv("SCAN_CACHE_MAX_PER_USER", 32))
+SCAN_CACHE_MAX_USERS = int(os.getenv("SCAN_CACHE_MAX_USERS", 10000))
+
+
+def content_hash_fallback(image_id: str) -> int:
+    """
+    Stand-in hash when the image can't be decoded (e.g. Pillow missing): the first
+    64 bits of the SHA-256. Unrelated digests are ~32 bits apart, so this degrades
+    to exact-duplicate matching rather than producing false hits.
+    """
+    return int(image_id[:16], 16)
+
+
+@dataclass(frozen=True)
+class ScanCacheEntry:
+    phash: int
+    scan_id: str
+    ingredients: list
+    expires: float  # time.monotonic() deadline
+
+
+class _Shelf:
+    """Recent scans of one user for one region."""
+
+    def __init__(self):
+        self.entries: Dict[int, ScanCacheEntry] = {}  # insertion-ordered, oldest first
+        self.tree: BKTree[int] = BKTree(hamming)
+
+    def _rebuild(self) -> None:
+        self.tree = BKTree(hamming, self.entries)
+
+    def prune(self, now: float) -> None:
+        expired = [phash for phash, entry in self.entries.items() if entry.expires <= now]
+        for phash in expired:
+            del self.entries[phash]
+        if expired:
+            self._rebuild()
+
+    def add(self, entry: ScanCacheEntry, max_entries: int) -> None:
+        replaced = self.entries.pop(entry.phash, None) is not None
+        self.entries[entry.phash] = entry
+        if len(self.entries) > max_entries:
+            del self.entries[next(iter(self.entries))]
+            self._rebuild()
+        elif not replaced:
+            self.tree.add(entry.phash)
+
+
+def recent_scans_filter(user_id: str, region: Optional[str], since: datetime) -> dict:
+    # Same normalization as the shelf key, so "Indian" and "indian" warm one shelf from both spellings
+    return {
+        "owner": ObjectId(user_id),
+        "region_key": region_key(region),
+        "phash": {"$exists": True},
+        "createdAt": {"$gte": since},
+    }
+
+
+RECENT_SCANS_SORT = [("createdAt", -1)]  # newest first, so the limit keeps the latest
+
+
+class ScanCache:
+    def __init__(self, max_distance: int, ttl_seconds: float, max_per_user: int, max_users: int):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_per_user = max_per_user
+        self.max_users = max_users
+        self._shelves: "OrderedDict[Tuple[str, str], _Shelf]" = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: str, region: Optional[str]) -> Tuple[str, str]:
+        return str(user_id), region_key(region) or ""
+
+    async def _load(self, user_id: str, region: Optional[str]) -> _Shelf:
+        """Seeds a shelf from the user's scans still inside the TTL."""
+        shelf = _Shelf()
+        now = datetime.now(timezone.utc)
+        try:
+            cursor = MongoDB.get_db()["scans"].find(
+                recent_scans_filter(user_id, region, now - timedelta(seconds=self.ttl_seconds)),
+                {"phash": 1, "ingredients": 1, "createdAt": 1},
+            ).sort(RECENT_SCANS_SORT).limit(self.max_per_user)
+            docs = await cursor.to_list(length=self.max_per_user)
+            clock = time.monotonic()
+            for doc in reversed(docs):  # replay oldest first to keep the shelf's insertion order
+                created = doc["createdAt"]
+                if created.tzinfo is None:
+                    created = created.replace(tzinfo=timezone.utc)
+                age = (now - created).total_seconds()
+                shelf.add(ScanCacheEntry(
+                    phash=int(doc["phash"], 16),
+                    scan_id=str(doc["_id"]),
+                    ingredients=doc.get("ingredients", []),
+                    expires=clock + self.ttl_seconds - age,
+                ), self.max_per_user)
+        except Exception as e:
+            logger.warning("Scan cache load failed", extra={"error": str(e)})
+        return shelf
+
+    async def _shelf(self, user_id: str, region: Optional[str]) -> _Shelf:
+        key = self._key(user_id, region)
+        shelf = self._shelves.get(key)
+        if shelf is None:
+            shelf = await self._load(user_id, region)
+            self._shelves[key] = shelf
+        self._shelves.move_to_end(key)
+        while len(self._shelves) > self.max_users:
+            self._shelves.popitem(last=False)
+        return shelf
+
+    async def lookup(self, user_id: str, region: Optional[str], phash: int) -> Optional[Tuple[int, ScanCacheEntry]]:
+        """Returns (distance, entry) of the nearest recent scan within the threshold, or None."""
+        if not SCAN_CACHE_ENABLED:
+            return None
+        shelf = await self._shelf(user_id, region)
+        shelf.prune(time.monotonic())
+        matches: List[Tuple[int, int]] = shelf.tree.search(phash, self.max_distance)
+        record_cache_lookup("scan", bool(matches))
+        if not matches:
+            return None
+        distance, nearest = matches[0]
+        return distance, shelf.entries[nearest]
+
+    async def add(self, user_id: str, region: Optional[str], phash: int, scan_id: str, ingredients: list) -> None:
+        if not SCAN_CACHE_ENABLED:
+            return
+        shelf = await self._shelf(user_id, region)
+        shelf.add(ScanCacheEntry(
+            phash=phash,
+            scan_id=scan_id,
+            ingredients=ingredients,
+            expires=time.monotonic() + self.ttl_seconds,
+        ), self.max_per_user)
+
+
+scan_cache = ScanCache(
+    max_distance=SCAN_CACHE_MAX_DISTANCE,
+    ttl_seconds=SCAN_CACHE_TTL_MINUTES * 60,
+    max_per_user=SCAN_CACHE_MAX_PER_USER,
+    max_users=SCAN_CACHE_MAX_USERS,
+)
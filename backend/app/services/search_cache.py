@@ -0,0 +1,179 @@
+"""
+Cache of /recipes/search response bodies, invalidated by generation counters.
+
+An entry is keyed by the normalized filter plus skip/limit and stores the encoded
+JSON body. Every entry remembers the generation of the scope it depends on: its
+region when the filter has one, otherwise "*" (all recipes). A write to recipes
+bumps "*" and the written recipe's region, so only the searches that could see
+the change miss afterwards; nothing has to be found and deleted.
+
+Generations are (shared, local) pairs. Local bumps invalidate this worker
+immediately. With SEARCH_CACHE_SHARED_GENERATIONS each bump is also $inc'ed on a
+Mongo counter document that every worker re-reads every SEARCH_CACHE_SYNC_SECONDS,
+so other workers stop serving pre-write results within one sync interval.
+SEARCH_CACHE_TTL_SECONDS is a backstop for writes that bypass the API (scripts).
+Misses are read from the primary: rows from a lagging secondary would be cached
+under the generation that should have excluded them.
+
+Memory is bounded by the total size of the cached bodies, evicting least recently used.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import orjson
+from dotenv import load_dotenv
+
+from app.database.connection import MongoDB
+from app.utils.logger import get_logger
+from app.utils.metrics import SEARCH_CACHE_BYTES, record_cache_lookup
+
+load_dotenv()
+logger = get_logger(__name__)
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+SEARCH_CACHE_MAX_ENTRY_BYTES = int(os.getenv("SEARCH_CACHE_MAX_ENTRY_BYTES", 1024 * 1024))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 300))
+SEARCH_CACHE_SHARED_GENERATIONS = os.getenv("SEARCH_CACHE_SHARED_GENERATIONS", "true").lower() == "true"
+SEARCH_CACHE_SYNC_SECONDS = float(os.getenv("SEARCH_CACHE_SYNC_SECONDS", 1))
+
+GENERATIONS_COLLECTION = "cache_generations"
+GENERATIONS_DOC_ID = "recipes"
+ALL_SCOPE = "*"
+
+Generation = Tuple[int, int]  # (shared, local)
+
+
+def search_key(filter_query: dict, skip: int, limit: int) -> bytes:
+    """Stable key for a normalized filter (see recipe.build_search_filter) and page."""
+    return orjson.dumps([filter_query, skip, limit], option=orjson.OPT_SORT_KEYS)
+
+
+def search_scope(filter_query: dict) -> str:
+    return filter_query.get("region_key") or ALL_SCOPE
+
+
+def _counter_field(scope: str) -> str:
+    """Field name of a scope in the counters document (no dots or leading $ in field names)."""
+    return scope.replace(".", "_").replace("$", "_")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    scope: str
+    generation: Generation
+    body: bytes
+    expires: float
+
+
+class SearchCache:
+    def __init__(self, max_bytes: int, max_entry_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._shared: Dict[str, int] = {}
+        self._local: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def generation(self, scope: str) -> Generation:
+        return self._shared.get(_counter_field(scope), 0), self._local.get(scope, 0)
+
+    # --- Lookups ---
+    def get(self, key: bytes) -> Optional[bytes]:
+        if not SEARCH_CACHE_ENABLED:
+            return None
+        entry = self._entries.get(key)
+        hit = (
+            entry is not None
+            and entry.generation == self.generation(entry.scope)
+            and entry.expires > time.monotonic()
+        )
+        record_cache_lookup("search", hit)
+        if not hit:
+            if entry is not None:
+                self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.body
+
+    def put(self, key: bytes, scope: str, generation: Generation, body: bytes) -> None:
+        """`generation` must be read before the query ran, so a write racing the query invalidates it."""
+        if not SEARCH_CACHE_ENABLED or len(body) > self.max_entry_bytes:
+            return
+        if generation != self.generation(scope):
+            return  # already stale
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = _Entry(scope, generation, body, time.monotonic() + self.ttl_seconds)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        SEARCH_CACHE_BYTES.set(self._bytes)
+
+    def _drop(self, key: bytes) -> None:
+        self._bytes -= len(self._entries.pop(key).body)
+        SEARCH_CACHE_BYTES.set(self._bytes)
+
+    # --- Invalidation ---
+    async def invalidate(self, region_keys: Iterable[Optional[str]]) -> None:
+        """Called after a write to recipes; bumps "*" and each touched region."""
+        scopes = {ALL_SCOPE} | {key for key in region_keys if key}
+        for scope in scopes:
+            self._local[scope] = self._local.get(scope, 0) + 1
+        if not SEARCH_CACHE_SHARED_GENERATIONS:
+            return
+        try:
+            await MongoDB.get_relaxed_write_collection(GENERATIONS_COLLECTION).update_one(
+                {"_id": GENERATIONS_DOC_ID},
+                {"$inc": {f"counters.{_counter_field(scope)}": 1 for scope in scopes}},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("Search cache generation bump failed", extra={"error": str(e)})
+
+    async def sync(self) -> None:
+        """Adopts the shared counters, so writes made through other workers invalidate here too."""
+        doc = await MongoDB.get_db()[GENERATIONS_COLLECTION].find_one({"_id": GENERATIONS_DOC_ID})
+        if doc:
+            self._shared = {scope: int(value) for scope, value in doc.get("counters", {}).items()}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Search cache generation sync failed", extra={"error": str(e)})
+            await asyncio.sleep(SEARCH_CACHE_SYNC_SECONDS)
+
+    async def start(self) -> None:
+        if SEARCH_CACHE_ENABLED and SEARCH_CACHE_SHARED_GENERATIONS and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+search_cache = SearchCache(
+    max_bytes=SEARCH_CACHE_MAX_BYTES,
+    max_entry_bytes=SEARCH_CACHE_MAX_ENTRY_BYTES,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+)
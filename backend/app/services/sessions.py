@@ -0,0 +1,208 @@
+"""
+Login sessions: one document per device in the `sessions` collection.
+
+A session stores the SHA-256 of its current refresh token (never the token),
+device metadata and `expiresAt`, which a TTL index uses to delete it. Refresh
+tokens and access tokens carry the session id as the `sid` claim.
+
+- Refresh rotates the token with one find_one_and_update on `_id` that also
+  matches the old token's hash, so a replayed or already-rotated token fails.
+- Logout marks the session `revokedAt` instead of deleting it, so every worker
+  can learn about it (the document goes away with its TTL).
+- Access tokens are checked against an in-memory Bloom filter of revoked session
+  ids. Almost every request gets "definitely not revoked" and never touches the
+  database; a positive is confirmed in `sessions`, so a false positive costs one
+  lookup and never logs anyone out. Each worker adds revocations made through
+  other workers every SESSION_REVOCATION_SYNC_SECONDS. Two filters, each covering
+  one access-token lifetime, rotate so memory stays bounded.
+"""
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi import Request
+from pymongo import ReturnDocument
+
+from app.database.connection import MongoDB
+from app.utils.bloom import BloomFilter
+from app.utils.jwt import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+SESSIONS_COLLECTION = "sessions"
+SESSION_MAX_PER_USER = int(os.getenv("SESSION_MAX_PER_USER", 10))
+SESSION_REVOCATION_SYNC_SECONDS = float(os.getenv("SESSION_REVOCATION_SYNC_SECONDS", 5))
+# Re-read window behind the last sync: revocations stamped by a host whose clock is behind,
+# or committed after a later one, still arrive within it
+SESSION_REVOCATION_SYNC_MARGIN_SECONDS = float(os.getenv(
+    "SESSION_REVOCATION_SYNC_MARGIN_SECONDS", max(60.0, 4 * SESSION_REVOCATION_SYNC_SECONDS),
+))
+SESSION_REVOCATION_CAPACITY = int(os.getenv("SESSION_REVOCATION_CAPACITY", 100_000))  # per access-token lifetime
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def device_info(request: Request) -> dict:
+    return {
+        "user_agent": (request.headers.get("user-agent") or "")[:256],
+        "ip": request.client.host if request.client else None,
+    }
+
+
+class RevocationFilter:
+    """Revoked session ids of the last one or two access-token lifetimes."""
+
+    def __init__(self, capacity: int, window_seconds: float):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self._current = BloomFilter(capacity)
+        self._previous = BloomFilter(capacity)
+        self._rotated = time.monotonic()
+
+    def _rotate(self) -> None:
+        # Tokens of sessions revoked before the previous window have expired on their own
+        if time.monotonic() - self._rotated >= self.window_seconds:
+            self._previous, self._current = self._current, BloomFilter(self.capacity)
+            self._rotated = time.monotonic()
+
+    def add(self, session_id: str) -> None:
+        self._rotate()
+        self._current.add(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        self._rotate()
+        return session_id in self._current or session_id in self._previous
+
+
+class SessionStore:
+    def __init__(self, max_per_user: int, refresh_days: float, access_minutes: float, revocation_capacity: int):
+        self.max_per_user = max_per_user
+        self.refresh_ttl = timedelta(days=refresh_days)
+        self.access_ttl = timedelta(minutes=access_minutes)
+        self.revoked = RevocationFilter(revocation_capacity, self.access_ttl.total_seconds())
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _collection(self):
+        return MongoDB.get_db()[SESSIONS_COLLECTION]
+
+    @staticmethod
+    def new_session_id() -> str:
+        return secrets.token_urlsafe(16)
+
+    async def create(self, session_id: str, user_id: str, refresh_token: str, device: dict) -> None:
+        """Stores a new session; beyond SESSION_MAX_PER_USER the least recently used ones are revoked."""
+        now = datetime.now(timezone.utc)
+        await self._collection().insert_one({
+            "_id": session_id,
+            "user": ObjectId(user_id),
+            "token_hash": token_hash(refresh_token),
+            "device": device,
+            "createdAt": now,
+            "lastUsedAt": now,
+            "expiresAt": now + self.refresh_ttl,
+        })
+        cursor = self._collection().find(
+            {"user": ObjectId(user_id), "revokedAt": None}, {"_id": 1}
+        ).sort("lastUsedAt", -1).skip(self.max_per_user)
+        for doc in await cursor.to_list(length=None):
+            await self.revoke(doc["_id"], user_id)
+
+    async def rotate(self, session_id: str, user_id: str, old_token: str, new_token: str, device: dict) -> bool:
+        """Swaps the session's refresh token; False if the session is gone, revoked or the token is stale."""
+        now = datetime.now(timezone.utc)
+        updated = await self._collection().find_one_and_update(
+            {"_id": session_id, "user": ObjectId(user_id), "token_hash": token_hash(old_token), "revokedAt": None},
+            {"$set": {
+                "token_hash": token_hash(new_token),
+                "lastUsedAt": now,
+                "expiresAt": now + self.refresh_ttl,
+                "device.ip": device.get("ip"),
+            }},
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return updated is not None
+
+    async def revoke(self, session_id: str, user_id: str) -> bool:
+        """Revokes one of the user's sessions. Returns False if it wasn't active."""
+        now = datetime.now(timezone.utc)
+        result = await self._collection().update_one(
+            {"_id": session_id, "user": ObjectId(user_id), "revokedAt": None},
+            # Kept until the user's access tokens for it have expired, so other workers see the revocation
+            {"$set": {"revokedAt": now, "expiresAt": now + self.access_ttl}},
+        )
+        if result.modified_count == 0:
+            return False
+        # Only real revocations enter the filter: unknown ids would fill it and raise false positives
+        self.revoked.add(session_id)
+        return True
+
+    async def list_active(self, user_id: str) -> List[dict]:
+        cursor = self._collection().find(
+            {"user": ObjectId(user_id), "revokedAt": None},
+            {"token_hash": 0},
+        ).sort("lastUsedAt", -1)
+        return await cursor.to_list(length=self.max_per_user)
+
+    async def is_revoked(self, session_id: str) -> bool:
+        """Access-token check: a Bloom-filter miss answers without touching the database."""
+        if session_id not in self.revoked:
+            return False
+        doc = await self._collection().find_one({"_id": session_id}, {"revokedAt": 1})
+        return doc is None or doc.get("revokedAt") is not None
+
+    # --- Revocations made by other workers ---
+    async def sync(self) -> None:
+        """
+        Adds revocations stamped since the previous sync, minus a safety margin.
+        Ids seen again are re-added to the filter, which is harmless.
+        """
+        started = datetime.now(timezone.utc)
+        if self._synced_until is None:
+            since = started - self.access_ttl
+        else:
+            since = self._synced_until - timedelta(seconds=SESSION_REVOCATION_SYNC_MARGIN_SECONDS)
+        cursor = self._collection().find({"revokedAt": {"$gte": since}}, {"_id": 1})
+        async for doc in cursor:
+            self.revoked.add(doc["_id"])
+        self._synced_until = started
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Session revocation sync failed", extra={"error": str(e)})
+            await asyncio.sleep(SESSION_REVOCATION_SYNC_SECONDS)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+session_store = SessionStore(
+    max_per_user=SESSION_MAX_PER_USER,
+    refresh_days=REFRESH_TOKEN_EXPIRE_DAYS,
+    access_minutes=ACCESS_TOKEN_EXPIRE_MINUTES,
+    revocation_capacity=SESSION_REVOCATION_CAPACITY,
+)
@@ -0,0 +1,148 @@
+"""
+Content-addressed blob storage for uploaded images.
+
+Blobs are keyed by the SHA-256 of their bytes, so storing the same photo twice
+keeps a single copy. `BlobStore` is the extension point for S3 or similar;
+`LocalBlobStore` keeps objects on the local filesystem under
+`<root>/objects/ab/cd/<sha256>`.
+"""
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOB_STORE = os.getenv("BLOB_STORE", "local")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "storage")
+
+
+class BlobWriter(ABC):
+    """Receives a blob chunk by chunk while hashing it."""
+
+    def __init__(self):
+        self._hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunks: Iterable[memoryview]) -> None:
+        """Hashes and persists the given chunks. Blocking; call from a worker thread."""
+        for chunk in chunks:
+            self._hasher.update(chunk)
+            self.size += len(chunk)
+            self._persist(chunk)
+
+    @property
+    def digest(self) -> str:
+        return self._hasher.hexdigest()
+
+    @abstractmethod
+    def _persist(self, chunk: memoryview) -> None: ...
+
+    @abstractmethod
+    def commit(self) -> bool:
+        """Stores the blob under its digest. Returns False if it already existed (deduplicated)."""
+
+    @abstractmethod
+    def abort(self) -> None: ...
+
+
+class HashOnlyWriter(BlobWriter):
+    """
+    Hashes without writing, for uploads whose digest the client announced and we already hold.
+    `commit` only confirms the announced digest matched.
+    """
+
+    def __init__(self, expected_digest: str):
+        super().__init__()
+        self.expected_digest = expected_digest
+
+    def _persist(self, chunk: memoryview) -> None:
+        pass
+
+    def commit(self) -> bool:
+        if self.digest != self.expected_digest:
+            raise ValueError("Uploaded content does not match the announced SHA-256.")
+        return False
+
+    def abort(self) -> None:
+        pass
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    def open_writer(self) -> BlobWriter: ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a blob if the backend has one (lets workers read without copying)."""
+
+    @abstractmethod
+    def read(self, key: str) -> bytes: ...
+
+
+class _LocalBlobWriter(BlobWriter):
+    def __init__(self, store: "LocalBlobStore"):
+        super().__init__()
+        self._store = store
+        self._tmp_path = os.path.join(store.tmp_dir, uuid.uuid4().hex)
+        self._fh = open(self._tmp_path, "wb", buffering=0)
+
+    def _persist(self, chunk: memoryview) -> None:
+        self._fh.write(chunk)
+
+    def commit(self) -> bool:
+        self._fh.close()
+        final_path = self._store._object_path(self.digest)
+        if os.path.exists(final_path):
+            os.unlink(self._tmp_path)
+            return False
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self._tmp_path, final_path)
+        return True
+
+    def abort(self) -> None:
+        self._fh.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], key[2:4], key)
+
+    def open_writer(self) -> BlobWriter:
+        return _LocalBlobWriter(self)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._object_path(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._object_path(key)
+
+    def read(self, key: str) -> bytes:
+        with open(self._object_path(key), "rb") as fh:
+            return fh.read()
+
+
+_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        if BLOB_STORE != "local":
+            raise ValueError(f"Unsupported BLOB_STORE '{BLOB_STORE}'.")
+        _store = LocalBlobStore(BLOB_STORE_DIR)
+    return _store
@@ -0,0 +1,65 @@
+"""
+BK-tree: a metric tree for "everything within distance d of x" queries.
+
+Works with any integer metric that satisfies the triangle inequality
+(Hamming distance between hashes, Levenshtein distance between words).
+A query only descends into children whose edge distance lies in
+[dist - d, dist + d], so it visits a small part of the tree when d is small.
+"""
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class _Node(Generic[T]):
+    __slots__ = ("item", "children")
+
+    def __init__(self, item: T):
+        self.item = item
+        self.children: dict = {}
+
+
+class BKTree(Generic[T]):
+    def __init__(self, distance: Callable[[T, T], int], items: Iterable[T] = ()):
+        self.distance = distance
+        self._root: Optional[_Node[T]] = None
+        self._size = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, item: T) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = _Node(item)
+            return
+        node = self._root
+        while True:
+            d = self.distance(item, node.item)
+            child = node.children.get(d)
+            if child is None:
+                node.children[d] = _Node(item)
+                return
+            node = child
+
+    def search(self, item: T, max_distance: int) -> List[Tuple[int, T]]:
+        """Returns (distance, item) pairs within max_distance, nearest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = self.distance(item, node.item)
+            if d <= max_distance:
+                found.append((d, node.item))
+            low, high = d - max_distance, d + max_distance
+            stack.extend(child for edge, child in node.children.items() if low <= edge <= high)
+        found.sort(key=lambda pair: pair[0])
+        return found
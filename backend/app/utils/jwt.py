@@ -1,10 +1,13 @@
 import os
+import secrets
 import jwt
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from app.utils.logger import get_logger
 
 load_dotenv()
+logger = get_logger(__name__)
 
 ACCESS_TOKEN_SECRET = os.getenv("ACCESS_TOKEN_SECRET")
 REFRESH_TOKEN_SECRET = os.getenv("REFRESH_TOKEN_SECRET")
@@ -21,16 +24,19 @@ def create_token(data: Dict[str, any], secret_key: str, expires_delta: timedelta
     to_encode.update({"exp": int(expire.timestamp()), "iat": int(datetime.now(timezone.utc).timestamp())})
     return jwt.encode(to_encode, secret_key, algorithm=JWT_ALGORITHM)
 
-def create_access_token(subject: Any) -> str:
+def create_access_token(subject: Any, session_id: Optional[str] = None) -> str:
     """Creates a JWT access token containing the subject (e.g., user ID or email)."""
     expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    # The 'sub' (subject) claim is standard for identifying the user
-    return create_token({"sub": str(subject)}, ACCESS_TOKEN_SECRET, expires)
-
-def create_refresh_token(subject: Any) -> str:
-    """Creates a JWT refresh token."""
+    # The 'sub' (subject) claim is standard for identifying the user; 'sid' ties it to a login session
+    claims = {"sub": str(subject)}
+    if session_id:
+        claims["sid"] = session_id
+    return create_token(claims, ACCESS_TOKEN_SECRET, expires)
+
+def create_refresh_token(subject: Any, session_id: str) -> str:
+    """Creates a JWT refresh token for a session; 'jti' makes every rotation a distinct token."""
     expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    return create_token({"sub": str(subject)}, REFRESH_TOKEN_SECRET, expires)
+    return create_token({"sub": str(subject), "sid": session_id, "jti": secrets.token_hex(8)}, REFRESH_TOKEN_SECRET, expires)
 
 def decode_token(token: str, secret_key: str) -> Dict | None:
     """Decodes a JWT token. Returns payload or None if invalid."""
@@ -38,13 +44,13 @@ def decode_token(token: str, secret_key: str) -> Dict | None:
         payload = jwt.decode(token, secret_key, algorithms=[JWT_ALGORITHM])
         exp = payload.get("exp")
         if exp and datetime.now(timezone.utc).timestamp() > exp:
-            print("⚠️ Token has expired.")
+            logger.debug("Token has expired.")
             return None
 
         return payload
     except jwt.ExpiredSignatureError:
-        print("⚠️ Token expired (jwt.ExpiredSignatureError).")
+        logger.debug("Token expired (jwt.ExpiredSignatureError).")
         return None
     except jwt.InvalidTokenError:
-        print("❌ Invalid token structure or signature.")
+        logger.debug("Invalid token structure or signature.")
         return None
\ No newline at end of file
@@ -0,0 +1,236 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, wide enough to cover LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge that can go up and down."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets (seconds by convention)."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def time(self, **labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Application metrics ---
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method",)
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency as seen by the driver.", ("command", "outcome")
+))
+MONGO_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "mongo_pool_connections", "MongoDB pool connections by state (open, checked_out, waiting).", ("address", "state")
+))
+LLM_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "LLM completion latency.", ("model", "outcome")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens_total", "LLM tokens consumed.", ("model", "kind")
+))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "rate_limited_requests_total", "Requests rejected by a rate limiter.", ("limiter", "scope")
+))
+PREWARM_GENERATIONS = REGISTRY.register(Counter(
+    "prewarm_generations_total", "Recipe cache entries generated by the off-peak pre-warmer.", ("outcome",)
+))
+DETECTION_BATCH_SIZE = REGISTRY.register(Histogram(
+    "detection_batch_size", "Images per detection micro-batch.", buckets=(1, 2, 4, 8, 16, 32)
+))
+DETECTION_DURATION = REGISTRY.register(Histogram(
+    "detection_batch_duration_seconds", "Wall time of one detection micro-batch in the worker pool."
+))
+DETECTION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "detection_queue_depth", "Images waiting for a detection batch."
+))
+SEARCH_CACHE_BYTES = REGISTRY.register(Gauge(
+    "search_cache_bytes", "Size of the response bodies held by the search result cache."
+))
+LLM_OUTPUT = REGISTRY.register(Counter(
+    "llm_output_total", "Model responses by extraction outcome (clean, repaired, partial, failed).", ("outcome",)
+))
+LLM_OUTPUT_REPAIRS = REGISTRY.register(Counter(
+    "llm_output_repairs_total", "Repairs applied to model output, and recipes dropped from it.", ("kind",)
+))
+CONCURRENCY_LIMIT = REGISTRY.register(Gauge(
+    "concurrency_limit", "Current adaptive concurrency limit per route class.", ("route_class",)
+))
+CONCURRENCY_QUEUED = REGISTRY.register(Gauge(
+    "concurrency_queued_requests", "Requests waiting for a concurrency slot per route class.", ("route_class",)
+))
+LOAD_SHED = REGISTRY.register(Counter(
+    "load_shed_requests_total", "Requests rejected with 503 by the concurrency limiter.", ("route_class", "reason")
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "Cache lookups by result.", ("cache", "result")
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "cache_hit_ratio", "Hit ratio per cache since process start.", ("cache",)
+))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Counts a cache lookup and refreshes that cache's hit ratio."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.value(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
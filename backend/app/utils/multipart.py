@@ -0,0 +1,126 @@
+from typing import Callable, Dict, List, Optional
+from fastapi import Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from app.services.storage import BlobWriter
+from app.utils.exception import ApiError
+
+MAX_FIELD_BYTES = 4096
+
+
+class StreamedUpload:
+    """Result of `stream_multipart_upload`: the (uncommitted) file writer plus any small text fields."""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.writer: Optional[BlobWriter] = None
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+
+async def stream_multipart_upload(
+    request: Request,
+    file_field: str,
+    open_writer: Callable[[], BlobWriter],
+    max_bytes: int,
+    allowed_types: Optional[set] = None,
+) -> StreamedUpload:
+    """
+    Parses a multipart/form-data body as it arrives, without buffering the file.
+
+    Chunks of `file_field` are handed to the writer as memoryview slices of the
+    received network chunk (no intermediate copies) and are hashed/written in the
+    threadpool. Other fields are small text values collected into `fields`.
+    The caller commits or aborts `upload.writer`.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise ApiError(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "Expected a multipart/form-data upload.")
+
+    upload = StreamedUpload()
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "name": None, "is_file": False}
+    pending: List[memoryview] = []
+    field_buffer = bytearray()
+    received = 0
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["name"] = None
+        state["is_file"] = False
+        field_buffer.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode()
+        state["name"] = name
+        if name == file_field:
+            if upload.writer is not None:
+                raise ApiError(status.HTTP_400_BAD_REQUEST, f"Only one '{file_field}' file is allowed.")
+            part_type = state["headers"].get(b"content-type", b"application/octet-stream").decode().lower()
+            if allowed_types and part_type not in allowed_types:
+                raise ApiError(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f"Unsupported image type '{part_type}'.")
+            upload.content_type = part_type
+            upload.filename = disposition.get(b"filename", b"").decode() or None
+            upload.writer = open_writer()
+            state["is_file"] = True
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if state["is_file"]:
+            pending.append(memoryview(data)[start:end])
+        else:
+            if len(field_buffer) + (end - start) > MAX_FIELD_BYTES:
+                raise ApiError(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"Form field '{state['name']}' is too large.")
+            field_buffer.extend(memoryview(data)[start:end])
+
+    def on_part_end():
+        if not state["is_file"] and state["name"]:
+            upload.fields[state["name"]] = field_buffer.decode("utf-8", errors="replace")
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise ApiError(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "Upload exceeds the maximum allowed size.")
+            parser.write(chunk)
+            if pending:
+                await run_in_threadpool(upload.writer.write, list(pending))
+                pending.clear()
+        parser.finalize()
+        if pending:
+            await run_in_threadpool(upload.writer.write, list(pending))
+            pending.clear()
+    except MultipartParseError:
+        if upload.writer is not None:
+            upload.writer.abort()
+        raise ApiError(status.HTTP_400_BAD_REQUEST, "Malformed multipart upload.")
+    except BaseException:
+        if upload.writer is not None:
+            upload.writer.abort()
+        raise
+
+    if upload.writer is None:
+        raise ApiError(status.HTTP_400_BAD_REQUEST, f"Missing '{file_field}' file in upload.")
+    return upload
@@ -0,0 +1,37 @@
+"""
+Fast JSON path for responses built straight from Mongo documents.
+
+Routes that return stored documents as-is (already validated on write) skip the
+pydantic round trip: the BSON dict is projected to its public fields and encoded
+once with orjson. Routes keep `response_model` for the OpenAPI docs; returning a
+Response instance makes FastAPI send it without re-validating.
+"""
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi import Response, status
+
+# Mongo datetimes are UTC but come back naive; emit them as "...Z" either way
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes to JSON bytes; ObjectId becomes its hex string, datetimes ISO 8601 UTC."""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def json_response(content: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=dumps(content), status_code=status_code, media_type="application/json")
+
+
+def raw_json_response(body: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    """Sends JSON bytes that are already encoded, e.g. a cached body."""
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
@@ -0,0 +1,70 @@
+"""
+Microbenchmark: autocomplete build time and per-query latency on synthetic terms.
+
+No database or server involved; the snapshot is built from generated titles,
+tags and ingredients with Zipf-like weights, then queried with prefixes of
+random length taken from real keys.
+
+Run from `backend/`:
+
+    python -m benchmarks.autocomplete --labels 500000 --queries 20000
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from app.services.autocomplete import AUTOCOMPLETE_PRECOMPUTED_PREFIX, _Snapshot, label_keys, normalize
+
+WORDS = (
+    "chicken paneer tofu lentil chickpea tomato garlic ginger basil curry masala tikka thai green red "
+    "yellow spicy sweet sour roasted grilled fried baked creamy crispy smoky lemon lime coconut mango "
+    "rice noodle pasta soup stew salad bowl wrap taco burrito pizza risotto biryani momo dal sabzi "
+    "pilaf omelette pancake bread cake pie tart"
+).split()
+
+
+def synthetic_terms(labels: int, seed: int) -> List[Tuple[str, str, float]]:
+    rng = random.Random(seed)
+    terms = []
+    for i in range(labels):
+        kind = rng.choices(("title", "tag", "ingredient"), weights=(8, 1, 1))[0]
+        words = rng.sample(WORDS, rng.randint(2, 5) if kind == "title" else 1)
+        text = " ".join(words).title() + (f" {i}" if kind == "title" else f"{i}")
+        terms.append((kind, text, float(int(1000 / (1 + rng.paretovariate(1.2))) + 1)))
+    return terms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Autocomplete build/query microbenchmark")
+    parser.add_argument("--labels", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    terms = synthetic_terms(args.labels, args.seed)
+    start = time.perf_counter()
+    snapshot = _Snapshot(terms, max_terms=10 * args.labels, precomputed_prefix=AUTOCOMPLETE_PRECOMPUTED_PREFIX)
+    build = time.perf_counter() - start
+    print(f"built {len(snapshot):,} keys for {len(snapshot.labels):,} labels in {build:.2f}s "
+          f"({len(snapshot.top):,} precomputed prefixes)")
+
+    rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        key = rng.choice(label_keys(*rng.choice(terms)[:2]))
+        queries.append(key[:rng.randint(1, min(len(key), 12))])
+
+    timings = []
+    for query in queries:
+        t = time.perf_counter()
+        snapshot.search(normalize(query))
+        timings.append(time.perf_counter() - t)
+    timings.sort()
+    for pct in (50, 95, 99, 99.9):
+        print(f"p{pct:<5} {timings[min(len(timings) - 1, int(len(timings) * pct / 100))] * 1e6:8.1f} us")
+    print(f"max    {timings[-1] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
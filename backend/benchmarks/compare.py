@@ -0,0 +1,58 @@
+"""
+Compares two benchmark reports produced by `benchmarks.run`.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import json
+import sys
+
+METRICS = [
+    ("throughput_rps", lambda e: e["throughput_rps"]),
+    ("p50_ms", lambda e: e["latency_ms"]["p50"]),
+    ("p95_ms", lambda e: e["latency_ms"]["p95"]),
+    ("p99_ms", lambda e: e["latency_ms"]["p99"]),
+    ("db_rt", lambda e: e["db_round_trips_per_request"]),
+]
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(baseline: dict, candidate: dict) -> str:
+    lines = [f"{'endpoint':<12} {'metric':<15} {'baseline':>10} {'candidate':>10} {'delta':>8}"]
+    names = sorted(set(baseline["endpoints"]) | set(candidate["endpoints"]))
+    for name in names:
+        old = baseline["endpoints"].get(name)
+        new = candidate["endpoints"].get(name)
+        if not old or not new:
+            lines.append(f"{name:<12} {'(missing in one run)':<15}")
+            continue
+        for metric, getter in METRICS:
+            lines.append(
+                f"{name:<12} {metric:<15} {getter(old):>10.2f} {getter(new):>10.2f} {_delta(getter(old), getter(new)):>8}"
+            )
+    lines.append(
+        f"{'total':<12} {'throughput_rps':<15} {baseline['throughput_rps']:>10.2f} "
+        f"{candidate['throughput_rps']:>10.2f} {_delta(baseline['throughput_rps'], candidate['throughput_rps']):>8}"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    with open(argv[0]) as fh:
+        baseline = json.load(fh)
+    with open(argv[1]) as fh:
+        candidate = json.load(fh)
+    print(compare(baseline, candidate))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
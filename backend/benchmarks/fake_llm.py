@@ -0,0 +1,167 @@
+"""
+Fake OpenRouter server for offline benchmarks.
+
+Speaks just enough of the OpenAI chat-completions protocol for
+`app.services.openAI.openAI_call` and answers with deterministic recipe JSON.
+Latency and output size are configurable so LLM-bound runs are reproducible.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+# Rough chars-per-token ratio used to size the generated output
+CHARS_PER_TOKEN = 4
+
+REGIONS = ["Indian", "Italian", "Mexican", "Japanese", "Thai"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 800.0          # time to first token
+    jitter_ms: float = 100.0           # +/- uniform jitter on latency
+    tokens_per_sec: float = 400.0      # generation speed after the first token
+    output_tokens: int = 600           # approximate completion size
+    recipes: int = 2                   # recipes per completion
+    malformed_rate: float = 0.0        # share of completions fenced, wrapped in prose or cut off
+    seed: int = 42
+
+
+def _build_recipe(rng: random.Random, index: int, ingredients: list[str], region: str, pad_chars: int) -> dict:
+    steps = [f"Step {i + 1}: prepare the {rng.choice(ingredients)} and cook gently." for i in range(4)]
+    if pad_chars > 0:
+        steps.append("Chef's note: " + ("stir and taste " * (pad_chars // 15 + 1))[:pad_chars])
+    return {
+        "title": f"{region} {ingredients[0].title()} Dish {index + 1}",
+        "ingredients": [{"name": name, "quantity": f"{rng.randint(1, 4)} cups"} for name in ingredients] + [
+            {"name": "salt", "quantity": "1 tsp"},
+        ],
+        "instructions": steps,
+        "region": region,
+        "dietary_preferences": "None",
+        "prep_time_minutes": rng.randint(5, 30),
+        "cook_time_minutes": rng.randint(10, 60),
+        "servings": rng.randint(1, 6),
+        "difficulty": rng.choice(DIFFICULTIES),
+        "tags": [region.lower(), "quick", "bench"],
+    }
+
+
+def _malform(rng: random.Random, content: str) -> str:
+    """The ways real models break JSON mode: code fences, chatty prose, max_tokens cut-offs."""
+    kind = rng.choice(("fence", "prose", "truncate"))
+    if kind == "fence":
+        return f"```json\n{content}\n```"
+    if kind == "prose":
+        return f"Here are your recipes:\n{content}\nEnjoy!"
+    return content[: int(len(content) * rng.uniform(0.6, 0.95))]
+
+
+def _parse_prompt(prompt: str) -> tuple[str, list[str]]:
+    """Pulls region and ingredients back out of the user prompt built in `app.api.recipe`."""
+    region = "Indian"
+    ingredients = ["tomato", "onion"]
+    for line in prompt.splitlines():
+        line = line.strip()
+        if line.startswith("Region:"):
+            region = line.split(":", 1)[1].strip() or region
+        elif line.startswith("Detected Ingredients:"):
+            parsed = [i.strip() for i in line.split(":", 1)[1].split(",") if i.strip()]
+            ingredients = parsed or ingredients
+    return region, ingredients
+
+
+def create_fake_llm_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenRouter")
+    rng = random.Random(config.seed)
+    app.state.calls = 0
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        prompt = next((m["content"] for m in body.get("messages", []) if m.get("role") == "user"), "")
+        region, ingredients = _parse_prompt(prompt)
+
+        base = [_build_recipe(rng, i, ingredients, region, 0) for i in range(config.recipes)]
+        base_chars = len(json.dumps({"recipe_suggestions": base}))
+        pad_per_recipe = max(0, (config.output_tokens * CHARS_PER_TOKEN - base_chars) // max(config.recipes, 1))
+        recipes = [_build_recipe(rng, i, ingredients, region, pad_per_recipe) for i in range(config.recipes)]
+        content = json.dumps({"recipe_suggestions": recipes})
+        if config.malformed_rate and rng.random() < config.malformed_rate:
+            content = _malform(rng, content)
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        delay = max(delay, 0.0) / 1000.0
+        if config.tokens_per_sec > 0:
+            delay += completion_tokens / config.tokens_per_sec
+        await asyncio.sleep(delay)
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // CHARS_PER_TOKEN
+        return {
+            "id": f"chatcmpl-bench-{app.state.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeLLMServer:
+    """
+    Runs the fake OpenRouter app with uvicorn on a background thread.
+    Use as a context manager; `base_url` is what OPENAI_BASE_URL should point at.
+    """
+
+    def __init__(self, config: FakeLLMConfig | None = None, port: int | None = None):
+        self.config = config or FakeLLMConfig()
+        self.port = port or _free_port()
+        self.app = create_fake_llm_app(self.config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake LLM server did not start in time.")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,142 @@
+"""
+Boots `app.main:app` in-process for benchmarks.
+
+The database is either mongomock-motor (default, fully offline) or a real
+mongod given by URI. Every collection handed out by `MongoDB.get_db()` is
+wrapped so that awaited operations are counted per benchmark operation,
+which gives DB round-trips per endpoint without touching route code.
+"""
+import contextvars
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# Operation label of the request currently being driven by the load generator
+current_operation: contextvars.ContextVar[str] = contextvars.ContextVar("current_operation", default="setup")
+
+# Collection methods that perform exactly one round-trip when awaited
+_AWAITED_OPS = {
+    "find_one", "insert_one", "insert_many", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "find_one_and_update",
+    "find_one_and_delete", "find_one_and_replace", "count_documents",
+    "estimated_document_count", "distinct", "bulk_write", "create_index",
+}
+# Collection methods returning a cursor; the round-trip happens on to_list()
+_CURSOR_OPS = {"find", "aggregate"}
+
+
+class RoundTripCounter:
+    def __init__(self):
+        self.counts: dict[str, int] = defaultdict(int)
+
+    def hit(self) -> None:
+        self.counts[current_operation.get()] += 1
+
+    def reset(self) -> None:
+        self.counts.clear()
+
+
+class _CountingCursor:
+    def __init__(self, cursor, counter: RoundTripCounter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name == "to_list":
+            async def to_list(*args, **kwargs):
+                self._counter.hit()
+                return await attr(*args, **kwargs)
+            return to_list
+        if name in {"skip", "limit", "sort", "batch_size", "hint"}:
+            def chain(*args, **kwargs):
+                attr(*args, **kwargs)
+                return self
+            return chain
+        return attr
+
+    def __aiter__(self):
+        self._counter.hit()
+        return self._cursor.__aiter__()
+
+
+class _CountingCollection:
+    def __init__(self, collection, counter: RoundTripCounter, mocked: bool = False):
+        self._collection = collection
+        self._counter = counter
+        self._mocked = mocked
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in _AWAITED_OPS:
+            async def op(*args, **kwargs):
+                self._counter.hit()
+                return await attr(*args, **kwargs)
+            return op
+        if name in _CURSOR_OPS:
+            def cursor_op(*args, **kwargs):
+                return _CountingCursor(attr(*args, **kwargs), self._counter)
+            return cursor_op
+        if name == "with_options":
+            def with_options(*args, **kwargs):
+                if self._mocked:
+                    # The mock has no replicas or write concerns, and its with_options drops the async wrapper
+                    return self
+                return _CountingCollection(attr(*args, **kwargs), self._counter)
+            return with_options
+        return attr
+
+
+class _CountingDatabase:
+    def __init__(self, database, counter: RoundTripCounter, mocked: bool = False):
+        self._database = database
+        self._counter = counter
+        self._mocked = mocked
+
+    def __getitem__(self, name):
+        return _CountingCollection(self._database[name], self._counter, self._mocked)
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+
+def configure_environment(llm_base_url: str, mongo_uri: str | None, db_name: str) -> None:
+    """Sets the env vars `app` reads at import time. Must run before importing `app.main`."""
+    os.environ["OPENAI_BASE_URL"] = llm_base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+    os.environ["MONGO_URI"] = mongo_uri or "mongodb://mongomock.invalid:27017"
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("ACCESS_TOKEN_SECRET", "bench-access-secret")
+    os.environ.setdefault("REFRESH_TOKEN_SECRET", "bench-refresh-secret")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Measure the app, not the limiter; set RATE_LIMIT_ENABLED=true to include it
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+@asynccontextmanager
+async def boot_app(mongo_uri: str | None, db_name: str) -> AsyncIterator[tuple[object, RoundTripCounter]]:
+    """
+    Yields `(app, counter)` with the app's lifespan running.
+    `configure_environment` must have been called first.
+    """
+    from app.database.connection import MongoDB
+    from app.main import app
+
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_uri)
+        await client.drop_database(db_name)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+
+    counter = RoundTripCounter()
+    original_get_db = MongoDB.get_db.__func__
+    MongoDB.client = client
+    MongoDB.get_db = classmethod(lambda cls: _CountingDatabase(original_get_db(cls), counter, mocked=not mongo_uri))
+    try:
+        async with app.router.lifespan_context(app):
+            yield app, counter
+    finally:
+        MongoDB.get_db = classmethod(original_get_db)
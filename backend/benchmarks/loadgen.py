@@ -0,0 +1,226 @@
+"""
+Async load generator driving a realistic operation mix against the API.
+
+Each virtual user owns an access token and picks operations from a weighted
+mix; latencies are recorded per operation and summarised into percentiles.
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.harness import current_operation
+
+PREFIX = "/api/v1"
+PASSWORD = "bench-password"
+
+REGIONS = ["Indian", "Italian", "Mexican", "Japanese", "Thai"]
+PANTRY = ["tomato", "onion", "garlic", "potato", "spinach", "paneer", "rice", "chickpea", "carrot", "egg"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+DEFAULT_MIX = {
+    "login": 1,
+    "generate": 1,
+    "search": 4,
+    "get_by_id": 6,
+    "rate": 2,
+    "favorites": 2,
+}
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    token: str = ""
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class LoadState:
+    users: list[VirtualUser]
+    recipe_ids: list[str]
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+def parse_mix(spec: str | None) -> dict[str, int]:
+    """Parses `login=1,search=4,...`; unknown operations are rejected."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from: {', '.join(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+# --- Operations ---
+async def op_login(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    response = await client.post(f"{PREFIX}/auth/login", params={"email": user.email, "password": PASSWORD})
+    if response.status_code == 200:
+        user.token = response.json()["access_token"]
+    return response
+
+
+async def op_generate(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    ingredients = [{"name": name, "quantity": "1 cup"} for name in rng.sample(PANTRY, 3)]
+    response = await client.post(
+        f"{PREFIX}/recipes/generate",
+        params={"region": rng.choice(REGIONS)},
+        json=ingredients,
+        headers=user.headers,
+    )
+    if response.status_code == 201:
+        state.recipe_ids.extend(r["_id"] for r in response.json())
+    return response
+
+
+async def op_search(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    params = {"page": rng.randint(1, 3), "limit": 10}
+    choice = rng.random()
+    if choice < 0.5:
+        params["region"] = rng.choice(REGIONS)
+    elif choice < 0.8:
+        params["difficulty"] = rng.choice(DIFFICULTIES)
+    else:
+        params["title"] = rng.choice(PANTRY)
+    return await client.post(f"{PREFIX}/recipes/search", params=params)
+
+
+async def op_get_by_id(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    return await client.get(f"{PREFIX}/recipes/{rng.choice(state.recipe_ids)}")
+
+
+async def op_rate(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    return await client.post(
+        f"{PREFIX}/recipes/{rng.choice(state.recipe_ids)}/rate",
+        json={"score": rng.randint(1, 5)},
+        headers=user.headers,
+    )
+
+
+async def op_favorites(client: httpx.AsyncClient, state: LoadState, user: VirtualUser, rng: random.Random):
+    if rng.random() < 0.3:
+        return await client.post(f"{PREFIX}/user/favorites/{rng.choice(state.recipe_ids)}", headers=user.headers)
+    return await client.get(f"{PREFIX}/user/favorites", headers=user.headers)
+
+
+OPERATIONS = {
+    "login": op_login,
+    "generate": op_generate,
+    "search": op_search,
+    "get_by_id": op_get_by_id,
+    "rate": op_rate,
+    "favorites": op_favorites,
+}
+
+
+# --- Setup ---
+async def seed(client: httpx.AsyncClient, users: int, recipes_per_user: int, seed_value: int) -> LoadState:
+    """Registers users, logs them in and generates an initial recipe corpus."""
+    rng = random.Random(seed_value)
+    state = LoadState(users=[], recipe_ids=[])
+    for i in range(users):
+        user = VirtualUser(email=f"bench{i}@example.com")
+        response = await client.post(f"{PREFIX}/auth/register", json={
+            "username": f"bench{i}",
+            "email": user.email,
+            "fullName": f"Bench User {i}",
+            "region": rng.choice(REGIONS),
+            "password": PASSWORD,
+        })
+        response.raise_for_status()
+        (await op_login(client, state, user, rng)).raise_for_status()
+        state.users.append(user)
+        for _ in range(recipes_per_user):
+            (await op_generate(client, state, user, rng)).raise_for_status()
+    if not state.recipe_ids:
+        raise RuntimeError("Seeding produced no recipes; check the fake LLM configuration.")
+    return state
+
+
+# --- Driver ---
+async def _virtual_user(client, state, user, mix, rng, stop_at, remaining):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while time.perf_counter() < stop_at and remaining[0] > 0:
+        remaining[0] -= 1
+        name = rng.choices(names, weights)[0]
+        token = current_operation.set(name)
+        start = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, state, user, rng)
+            failed = response.status_code >= 400
+        except Exception:
+            failed = True
+        finally:
+            current_operation.reset(token)
+        state.latencies[name].append((time.perf_counter() - start) * 1000.0)
+        if failed:
+            state.errors[name] += 1
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    state: LoadState,
+    mix: dict[str, int],
+    concurrency: int,
+    duration: float,
+    max_requests: int,
+    seed_value: int,
+) -> float:
+    """Runs the mix until `duration` seconds or `max_requests` pass. Returns elapsed seconds."""
+    start = time.perf_counter()
+    stop_at = start + duration
+    remaining = [max_requests]
+    tasks = [
+        _virtual_user(client, state, state.users[i % len(state.users)], mix, random.Random(seed_value + i), stop_at, remaining)
+        for i in range(concurrency)
+    ]
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile on an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarise(state: LoadState, db_round_trips: dict[str, int], elapsed: float) -> dict:
+    endpoints = {}
+    total = 0
+    for name, values in sorted(state.latencies.items()):
+        values = sorted(values)
+        total += len(values)
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": state.errors.get(name, 0),
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "mean": round(sum(values) / len(values), 3),
+                "max": round(values[-1], 3),
+            },
+            "db_round_trips_per_request": round(db_round_trips.get(name, 0) / len(values), 3),
+        }
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": total,
+        "total_errors": sum(state.errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,187 @@
+"""
+Query-plan check: runs the routes' query shapes through explain() and fails on
+COLLSCAN or an in-memory SORT stage.
+
+Needs a real mongod (mongomock has no query planner). It seeds a scratch
+database, builds the registry indexes from app/database/indexes.py, explains
+every shape and drops the database again. Exit code 1 if any plan regresses.
+
+Run from `backend/`:
+
+    python -m benchmarks.query_plans --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import random
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from bson import ObjectId
+
+from benchmarks.harness import configure_environment
+
+# Stages that mean "read everything" or "sort in memory"
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+
+
+@dataclass
+class QueryShape:
+    name: str
+    collection: str
+    filter: Optional[dict] = None
+    sort: Optional[list] = None
+    limit: int = 20
+    pipeline: Optional[list] = None  # explain an aggregate instead of a find
+
+    def explain_command(self) -> dict:
+        if self.pipeline is not None:
+            command = {"aggregate": self.collection, "pipeline": self.pipeline, "cursor": {}}
+        else:
+            command = {"find": self.collection, "filter": self.filter or {}, "limit": self.limit}
+            if self.sort:
+                command["sort"] = dict(self.sort)
+        return {"explain": command, "verbosity": "queryPlanner"}
+
+
+def plan_stages(node) -> Iterator[str]:
+    """Yields every stage name inside the winning plan(s) of an explain document."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                yield from _stage_names(value)
+            else:
+                yield from plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from plan_stages(item)
+
+
+def _stage_names(node) -> Iterator[str]:
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            yield node["stage"]
+        for value in node.values():
+            yield from _stage_names(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _stage_names(item)
+
+
+async def seed(db, users: int = 50, recipes: int = 3000) -> dict:
+    """Enough varied data that the planner has real choices to make."""
+    rng = random.Random(7)
+    regions = ["Italian", "Thai", "Mexican", "Indian", "Nepali", "Japanese"]
+    difficulties = ["Easy", "Medium", "Hard"]
+    now = datetime.now(timezone.utc)
+    user_ids = [ObjectId() for _ in range(users)]
+    await db["users"].insert_many([
+        {"_id": uid, "email": f"user{i}@bench.local", "username": f"user{i}", "favorites": []}
+        for i, uid in enumerate(user_ids)
+    ])
+    docs = []
+    for i in range(recipes):
+        region = rng.choice(regions)
+        docs.append({
+            "title": f"{region} dish {i}",
+            "region": region,
+            "region_key": region.lower(),
+            "ingredient_keys": sorted(rng.sample(["tomato", "onion", "garlic", "rice", "egg", "chicken", "basil"], 3)),
+            "difficulty": rng.choice(difficulties),
+            "owner": rng.choice(user_ids),
+            "ratings": {"count": 0, "average": 0.0, "user_ratings": {}},
+            "createdAt": now,
+        })
+    result = await db["recipes"].insert_many(docs)
+    await db["scans"].insert_many([
+        {"owner": rng.choice(user_ids), "region": region, "region_key": region.lower(),
+         "phash": f"{rng.getrandbits(64):016x}", "createdAt": now - timedelta(minutes=rng.randint(0, 600))}
+        for region in (rng.choice(regions) for _ in range(2000))
+    ])
+    await db["generations"].insert_many([
+        {"region": rng.choice(regions).lower(), "ingredients": ["egg"], "diet": "none",
+         "createdAt": now - timedelta(days=rng.randint(0, 29))}
+        for _ in range(2000)
+    ])
+    return {"user_id": user_ids[0], "recipe_ids": result.inserted_ids[:25]}
+
+
+def build_shapes(ids: dict) -> List[QueryShape]:
+    """The query shapes the routes and services issue, built with their own helpers where they exist."""
+    from app.api.recipe import SEARCH_SORT, build_search_filter
+    from app.services.prewarm import top_combinations_pipeline
+    from app.services.retention import cold_filter
+    from app.services.scan_cache import RECENT_SCANS_SORT, recent_scans_filter
+
+    user_id = ids["user_id"]
+    now = datetime.now(timezone.utc)
+    shapes = [
+        QueryShape("login: user by email", "users", {"email": "user1@bench.local"}, limit=1),
+        QueryShape("register: user by username", "users", {"username": "user1"}, limit=1),
+        QueryShape("auth: user by id", "users", {"_id": user_id}, limit=1),
+        QueryShape("recipe by id", "recipes", {"_id": ids["recipe_ids"][0]}, limit=1),
+        # user.py: my_recipes and favorites
+        QueryShape("my_recipes", "recipes", {"owner": user_id}, [("_id", -1)]),
+        QueryShape("favorites", "recipes", {"_id": {"$in": ids["recipe_ids"]}}, [("_id", -1)]),
+        QueryShape("scan cache warm-up", "scans",
+                   recent_scans_filter(str(user_id), "Thai", now - timedelta(minutes=30)), RECENT_SCANS_SORT, 32),
+        QueryShape("prewarm top combinations", "generations",
+                   pipeline=top_combinations_pipeline(20, now - timedelta(days=7), 3)),
+        QueryShape("retention: cold recipes", "recipes", cold_filter(now - timedelta(days=90)), limit=500),
+        QueryShape("retention: favorited recipes", "users", {"favorites": {"$in": ids["recipe_ids"]}}),
+        QueryShape("my_recipes (archive)", "recipes_archive", {"owner": user_id}, [("_id", -1)]),
+    ]
+    for title, region, difficulty, ingredient in [
+        (None, None, None, None),
+        (None, "thai", None, None),
+        (None, None, "easy", None),
+        (None, "Thai", "Hard", None),
+        ("dish 1", None, None, None),
+        ("dish 1", "italian", None, None),
+        (None, None, None, "Tomatoes"),
+    ]:
+        params = (("title", title), ("region", region), ("difficulty", difficulty), ("ingredient", ingredient))
+        label = ", ".join(f"{k}={v}" for k, v in params if v)
+        shapes.append(QueryShape(f"search [{label or 'no filter'}]", "recipes",
+                                 build_search_filter(title, region, difficulty, ingredient), SEARCH_SORT))
+    return shapes
+
+
+async def _main(args: argparse.Namespace) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.database.indexes import ensure_indexes
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.db_name]
+    await client.drop_database(args.db_name)
+    failures = 0
+    try:
+        ids = await seed(db)
+        await ensure_indexes(db)
+        for shape in build_shapes(ids):
+            explain = await db.command(shape.explain_command())
+            stages = list(plan_stages(explain))
+            bad = sorted(FORBIDDEN_STAGES.intersection(stages))
+            failures += bool(bad)
+            print(f"{'FAIL' if bad else 'ok  '}  {shape.name:42} {' > '.join(stages)}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db_name)
+        client.close()
+    print(f"\n{failures} shape(s) with COLLSCAN or in-memory SORT" if failures else "\nAll query shapes use indexes.")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fail on COLLSCAN / in-memory SORT in route query plans")
+    parser.add_argument("--mongo-uri", required=True, help="A real mongod; the planner is what is being tested")
+    parser.add_argument("--db-name", default="dishguru_query_plans")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database for inspection")
+    args = parser.parse_args()
+    configure_environment("http://127.0.0.1:9", args.mongo_uri, args.db_name)  # lets app modules import
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Offline benchmark runner.
+
+Boots the API in-process against mongomock-motor (or a local mongod) and a
+fake OpenRouter server, seeds users and recipes, drives the operation mix
+and writes a JSON report.
+
+Run from `backend/`:
+
+    python -m benchmarks.run --duration 30 --concurrency 16 --out bench.json
+    python -m benchmarks.run --mongo-uri mongodb://localhost:27017 --llm-latency-ms 1500
+    python -m benchmarks.compare baseline.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from benchmarks.fake_llm import FakeLLMConfig, FakeLLMServer
+from benchmarks.harness import boot_app, configure_environment
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="DishGuru offline benchmark suite")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to drive load for")
+    parser.add_argument("--requests", type=int, default=1_000_000, help="Stop after this many requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--users", type=int, default=8, help="Registered users to seed")
+    parser.add_argument("--recipes-per-user", type=int, default=2, help="Generate calls per user while seeding")
+    parser.add_argument("--mix", default=None, help="Operation weights, e.g. 'login=1,generate=1,search=4'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-uri", default=None, help="Use a real mongod instead of mongomock-motor")
+    parser.add_argument("--db-name", default="dishguru_bench")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=600)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="Share of fenced/chatty/truncated completions")
+    parser.add_argument("--out", default=None, help="Write the JSON report here instead of stdout")
+    return parser
+
+
+async def _main(args: argparse.Namespace, llm: FakeLLMServer) -> dict:
+    import httpx
+    from benchmarks.loadgen import parse_mix, run_load, seed, summarise
+
+    mix = parse_mix(args.mix)
+    async with boot_app(args.mongo_uri, args.db_name) as (app, counter):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            state = await seed(client, args.users, args.recipes_per_user, args.seed)
+            counter.reset()
+            llm_calls_before = llm.calls
+            elapsed = await run_load(client, state, mix, args.concurrency, args.duration, args.requests, args.seed)
+            report = summarise(state, counter.counts, elapsed)
+            report["llm_calls"] = llm.calls - llm_calls_before
+    report["mix"] = mix
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    llm_config = FakeLLMConfig(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        tokens_per_sec=args.llm_tokens_per_sec,
+        output_tokens=args.llm_output_tokens,
+        malformed_rate=args.llm_malformed_rate,
+        seed=args.seed,
+    )
+    with FakeLLMServer(llm_config) as llm:
+        configure_environment(llm.base_url, args.mongo_uri, args.db_name)
+        report = asyncio.run(_main(args, llm))
+
+    report["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": "mongod" if args.mongo_uri else "mongomock-motor",
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "seed": args.seed,
+        "llm": asdict(llm_config),
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Microbenchmark: CPU cost per recipe of the response paths.
+
+Compares the previous pydantic round trips with the lean path (validate once,
+project the BSON dict, encode with orjson). No database or server involved.
+
+Run from `backend/`:
+
+    python -m benchmarks.serialization --recipes 10 --rounds 2000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.recipe_model import RecipeBase, RecipeInDB, RecipePublic, recipe_public_dict
+from app.utils.serialization import dumps
+
+_PUBLIC_LIST = TypeAdapter(List[RecipePublic])
+
+
+def sample_suggestion(i: int) -> dict:
+    """Shape of one parsed LLM suggestion."""
+    return {
+        "title": f"Sample Dish {i}",
+        "ingredients": [{"name": f"ingredient {j}", "quantity": f"{j + 1} cups"} for j in range(8)],
+        "instructions": [f"Step {j + 1}: do the thing with care and taste as you go." for j in range(6)],
+        "region": "Italian",
+        "dietary_preferences": "None",
+        "prep_time_minutes": 10,
+        "cook_time_minutes": 25,
+        "servings": 4,
+        "difficulty": "Medium",
+        "tags": ["dinner", "quick", "italian"],
+        "nutritional_info": {"calories": 420, "protein_g": 18, "carbs_g": 50, "fat_g": 14},
+    }
+
+
+def sample_document(i: int) -> dict:
+    """Shape of one stored recipe as motor returns it (naive datetimes, ObjectIds)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=123000)
+    doc = sample_suggestion(i)
+    doc.update(
+        _id=ObjectId(),
+        owner=ObjectId(),
+        ratings={"count": 3, "average": 4.33, "user_ratings": {str(ObjectId()): 4.0 for _ in range(3)}},
+        vector_embedding=None,
+        createdAt=now,
+        updatedAt=now,
+    )
+    return doc
+
+
+# --- Write path: /recipes/generate ---
+def generate_before(suggestions: List[dict]) -> bytes:
+    out = []
+    for recipe in suggestions:
+        validated = RecipeBase(**recipe)
+        in_db = RecipeInDB(**validated.model_dump())
+        in_db.owner = ObjectId()
+        stored = in_db.model_dump(by_alias=True, exclude={"id"})
+        stored["_id"] = ObjectId()
+        in_db.id = str(stored["_id"])
+        out.append(RecipePublic(**in_db.model_dump(by_alias=True)))
+    # FastAPI: validate against response_model, then jsonable_encoder + json.dumps
+    return json.dumps(jsonable_encoder(_PUBLIC_LIST.validate_python(out))).encode()
+
+
+def generate_after(suggestions: List[dict]) -> bytes:
+    documents = []
+    for recipe in suggestions:
+        document = RecipeBase.model_validate(recipe).model_dump()
+        document["owner"] = ObjectId()
+        document["_id"] = ObjectId()
+        documents.append(document)
+    return dumps([recipe_public_dict(doc) for doc in documents])
+
+
+# --- Read path: search / my_recipes / favorites ---
+def read_before(documents: List[dict]) -> bytes:
+    models = [RecipePublic.model_validate(doc) for doc in documents]
+    return json.dumps(jsonable_encoder(_PUBLIC_LIST.validate_python(models))).encode()
+
+
+def read_after(documents: List[dict]) -> bytes:
+    return dumps([recipe_public_dict(doc) for doc in documents])
+
+
+def measure(fn: Callable[[List[dict]], bytes], data: List[dict], rounds: int) -> float:
+    """Best-of-5 microseconds per recipe."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn(data)
+        best = min(best, (time.perf_counter() - start) / (rounds * len(data)))
+    return best * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-recipe serialization cost")
+    parser.add_argument("--recipes", type=int, default=10, help="Recipes per response")
+    parser.add_argument("--rounds", type=int, default=500, help="Responses per timing run")
+    args = parser.parse_args()
+
+    suggestions = [sample_suggestion(i) for i in range(args.recipes)]
+    documents = [sample_document(i) for i in range(args.recipes)]
+    report = {}
+    for name, before, after, data in (
+        ("generate", generate_before, generate_after, suggestions),
+        ("read", read_before, read_after, documents),
+    ):
+        us_before = measure(before, data, args.rounds)
+        us_after = measure(after, data, args.rounds)
+        report[name] = {
+            "before_us_per_recipe": round(us_before, 2),
+            "after_us_per_recipe": round(us_after, 2),
+            "speedup": round(us_before / us_after, 2),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Entry-point benchmark: cold start and steady-state throughput of a real server process.
+
+Compares the development entry point (`python -m app.main`: one uvicorn process,
+asyncio loop, h11) with the production launcher (`python -m app.server`: gunicorn,
+uvicorn workers on uvloop/httptools, preloaded app). For each entry point it
+
+- spawns the server and times spawn -> first 200 from GET / (cold start, median of --runs);
+- drives keep-alive GETs on --path from --clients load processes for --duration
+  seconds and reports requests/s and latency percentiles;
+- sends SIGTERM and times the drain until the process exits.
+
+With --mongo-uri the servers connect to that mongod exactly as in production.
+Without it every server process gets its own mongomock-motor client (per worker
+after the fork), which is fine for DB-free paths such as / and /metrics; the
+development entry point then runs without the reload watcher, which can't carry
+the in-memory database into its child process.
+
+Run from `backend/`:
+
+    python -m benchmarks.startup --duration 10 --clients 4 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.harness import configure_environment
+
+DEV_PORT = 8000  # fixed in app/main.py
+
+
+# --- Server side (child process) ---
+def serve(entry: str, mongo_uri: Optional[str], port: int) -> None:
+    configure_environment("http://127.0.0.1:9/v1", mongo_uri, "dishguru_bench_startup")
+    os.environ["PORT"] = str(port)
+    if entry == "dev" and mongo_uri:
+        import runpy
+        runpy.run_module("app.main", run_name="__main__")
+        return
+    if not mongo_uri:
+        from mongomock_motor import AsyncMongoMockClient
+        from app.database.connection import MongoDB
+        MongoDB.client = AsyncMongoMockClient()
+    if entry == "dev":
+        import uvicorn
+        uvicorn.run("app.main:app", host="127.0.0.1", port=port)
+    else:
+        from app.server import main
+        main()
+
+
+# --- Load side ---
+async def _connection(host: str, port: int, path: str, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    while time.perf_counter() < deadline:
+        # A worker restarting after SERVER_MAX_REQUESTS closes its connections; reconnect and count it
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            errors[0] += 1
+            await asyncio.sleep(0.01)
+            continue
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line[:15].lower() == b"content-length:":
+                        length = int(line[15:])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError):
+            errors[0] += 1
+        finally:
+            writer.close()
+
+
+def _load_process(host: str, port: int, path: str, connections: int, duration: float, queue) -> None:
+    async def run():
+        latencies: List[float] = []
+        errors = [0]
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_connection(host, port, path, deadline, latencies, errors) for _ in range(connections)))
+        return latencies, errors[0]
+
+    queue.put(asyncio.run(run()))
+
+
+def drive_load(port: int, path: str, clients: int, connections: int, duration: float) -> dict:
+    queue = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_load_process, args=("127.0.0.1", port, path, connections, duration, queue))
+        for _ in range(clients)
+    ]
+    for proc in procs:
+        proc.start()
+    results = [queue.get() for _ in procs]
+    latencies = sorted(latency for process_latencies, _ in results for latency in process_latencies)
+    for proc in procs:
+        proc.join()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 1),
+        "connection_errors": sum(errors for _, errors in results),
+        "p50_ms": pct(50),
+        "p99_ms": pct(99),
+    }
+
+
+def _get_ok(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5) as sock:
+            sock.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+            return sock.recv(64).startswith(b"HTTP/1.1 200")
+    except OSError:
+        return False
+
+
+def start_server(entry: str, mongo_uri: Optional[str], port: int, timeout: float = 60.0):
+    """Returns (process, seconds from spawn to the first 200)."""
+    cmd = [sys.executable, "-m", "benchmarks.startup", "--serve", entry, "--port", str(port)]
+    if mongo_uri:
+        cmd += ["--mongo-uri", mongo_uri]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{entry} server exited with {proc.returncode}")
+        if _get_ok(port):
+            return proc, time.perf_counter() - start
+        time.sleep(0.005)
+    stop_server(proc)
+    raise RuntimeError(f"{entry} server didn't answer within {timeout}s")
+
+
+def stop_server(proc: subprocess.Popen) -> float:
+    """SIGTERMs the server's process group and returns the seconds until it exited."""
+    start = time.perf_counter()
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=120)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    return time.perf_counter() - start
+
+
+def bench_entry(entry: str, args: argparse.Namespace) -> dict:
+    port = DEV_PORT if entry == "dev" and args.mongo_uri else args.port
+    cold = []
+    for _ in range(args.runs):
+        proc, seconds = start_server(entry, args.mongo_uri, port)
+        cold.append(seconds)
+        stop_server(proc)
+
+    proc, _ = start_server(entry, args.mongo_uri, port)
+    try:
+        drive_load(port, args.path, args.clients, args.connections, min(2.0, args.duration))  # warm-up
+        load = drive_load(port, args.path, args.clients, args.connections, args.duration)
+    finally:
+        drain = stop_server(proc)
+    return {
+        "cold_start_s": round(statistics.median(cold), 3),
+        "cold_start_runs_s": [round(seconds, 3) for seconds in cold],
+        **load,
+        "drain_s": round(drain, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold start and throughput: dev entry point vs app.server")
+    parser.add_argument("--serve", choices=("dev", "prod"), help=argparse.SUPPRESS)
+    parser.add_argument("--entries", default="dev,prod")
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per entry point")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Load processes")
+    parser.add_argument("--connections", type=int, default=16, help="Keep-alive connections per load process")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.mongo_uri, args.port)
+        return
+
+    report = {
+        "cpus": os.cpu_count(),
+        "workers": os.getenv("SERVER_WORKERS") or os.getenv("WEB_CONCURRENCY") or "auto",
+        "database": "mongod" if args.mongo_uri else "mongomock",
+        "path": args.path,
+    }
+    for entry in args.entries.split(","):
+        report[entry] = bench_entry(entry, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Model-output shapes the recipe extractor has to handle (services/llm_output.py),
+and the rule that only complete sets are cached (services/recipe_generation.py).
+
+Run from `backend/`:
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import recipe_generation
+from app.services.llm_output import extract_recipes
+from app.utils.exception import ApiError
+
+RECIPE = {
+    "title": "Tomato Dal",
+    "description": "Lentils simmered with tomato.",
+    "ingredients": [{"name": "lentil", "quantity": "1 cup"}, {"name": "tomato", "quantity": "2"}],
+    "instructions": ["Rinse the lentils.", "Simmer with tomato until soft."],
+    "difficulty": "Easy",
+    "region": "Indian",
+}
+ONE = json.dumps(RECIPE)
+TWO = json.dumps({"recipe_suggestions": [RECIPE, RECIPE]})
+
+
+# --- Shapes ---
+@pytest.mark.parametrize("text, recipes, dropped, outcome, repairs", [
+    (TWO, 2, 0, "clean", []),
+    ("```json\n" + TWO + "\n```", 2, 0, "repaired", ["fence"]),
+    ("Here are your recipes:\n" + TWO + "\nEnjoy!", 2, 0, "repaired", ["surrounding_text"]),
+    ('{"recipe_suggestions": [' + ONE + ", " + ONE + ",]}", 2, 0, "repaired", ["trailing_comma"]),
+    ("[" + ONE + ", " + ONE + "]", 2, 0, "clean", []),
+    (ONE, 1, 0, "clean", []),
+    # cut off inside the second recipe
+    ('{"recipe_suggestions": [' + ONE + ", " + ONE[:40], 1, 1, "partial", ["truncated"]),
+    # regression: cut right after a complete recipe, before the closing ]
+    ('{"recipe_suggestions":[' + ONE + ",", 1, 1, "partial", ["truncated"]),
+    ('{"recipe_suggestions":[' + ONE, 1, 1, "partial", ["truncated"]),
+    # regression: a complete JSON value without recipes comes first in the prose
+    ("Sure [1]: " + TWO, 2, 0, "repaired", ["surrounding_text"]),
+    ("Sure [1]: " + TWO[:-40], 1, 1, "partial", ["truncated"]),
+    ("I can't help with that.", 0, 0, "failed", []),
+], ids=[
+    "clean", "fence", "prose", "trailing_comma", "bare_list", "single_recipe", "truncated_mid_recipe",
+    "truncated_after_comma", "truncated_after_recipe", "prose_value_first", "prose_value_first_truncated",
+    "no_json",
+])
+def test_shapes(text, recipes, dropped, outcome, repairs):
+    extraction = extract_recipes(text)
+    assert len(extraction.recipes) == recipes
+    assert extraction.dropped == dropped
+    assert extraction.outcome == outcome
+    assert extraction.repairs == repairs
+
+
+def test_string_contents_are_not_repaired():
+    recipe = {**RECIPE, "description": "Not a trailing comma: ,} or ,]"}
+    text = '{"recipe_suggestions": [' + json.dumps(recipe) + ",]}"
+    extraction = extract_recipes(text)
+    assert extraction.outcome == "repaired"
+    assert extraction.recipes[0]["description"] == recipe["description"]
+
+
+def test_fields_are_coerced():
+    raw = {
+        **RECIPE,
+        "difficulty": "moderate",
+        "prep_time_minutes": "1 hour 15 minutes",
+        "servings": "4-6 servings",
+        "ingredients": ["2 tomatoes", {"ingredient": "lentil", "amount": 1.5, "unit": "cup"}],
+        "instructions": "1. Rinse the lentils. 2. Simmer until soft.",
+        "tags": "dal, quick",
+        "nutritional_info": {"calories": 1},
+    }
+    extraction = extract_recipes(json.dumps({"recipe_suggestions": [raw]}))
+    recipe = extraction.recipes[0]
+    assert extraction.repairs == ["coerced"]
+    assert recipe["difficulty"] == "Medium"
+    assert recipe["prep_time_minutes"] == 75
+    assert recipe["servings"] == 4
+    assert recipe["ingredients"] == [{"name": "2 tomatoes", "quantity": None}, {"name": "lentil", "quantity": "1.5 cup"}]
+    assert recipe["instructions"] == ["1. Rinse the lentils.", "2. Simmer until soft."]
+    assert recipe["tags"] == ["dal", "quick"]
+    assert "nutritional_info" not in recipe
+
+
+def test_unusable_recipe_is_dropped():
+    empty = {**RECIPE, "ingredients": []}
+    extraction = extract_recipes(json.dumps({"recipe_suggestions": [RECIPE, empty]}))
+    assert len(extraction.recipes) == 1
+    assert extraction.dropped == 1
+    assert extraction.outcome == "partial"
+
+
+# --- Caching ---
+def _generate(monkeypatch, content):
+    cached = []
+
+    async def put(key, suggestions, source="request"):
+        cached.append(suggestions)
+
+    monkeypatch.setattr(recipe_generation, "openAI_completion", lambda prompt: SimpleNamespace(content=content, total_tokens=100))
+    monkeypatch.setattr(recipe_generation.recipe_cache, "put", put)
+    result = asyncio.run(recipe_generation.generate_suggestions(["tomato", "lentil"], "Indian", None, use_cache=False))
+    return result, cached
+
+
+def test_complete_set_is_cached(monkeypatch):
+    result, cached = _generate(monkeypatch, "Sure [1]: " + TWO)
+    assert len(result.suggestions) == 2
+    assert cached == [result.suggestions]
+
+
+@pytest.mark.parametrize("content", [
+    '{"recipe_suggestions":[' + ONE + ",",
+    '{"recipe_suggestions": [' + ONE + ", " + ONE[:40],
+], ids=["truncated_after_comma", "truncated_mid_recipe"])
+def test_partial_set_is_returned_but_not_cached(monkeypatch, content):
+    result, cached = _generate(monkeypatch, content)
+    assert len(result.suggestions) == 1
+    assert cached == []
+
+
+def test_unusable_output_fails(monkeypatch):
+    with pytest.raises(ApiError):
+        _generate(monkeypatch, "I can't help with that.")